@@ -1,15 +1,43 @@
 import streamlit as st
 import yt_dlp
+import pandas as pd
 import os
+import re
 import time
 import json
+import uuid
+import random
+import heapq
+import socket
+import hashlib
 import threading
 import subprocess
+import shutil
 from datetime import datetime, timedelta
+from contextlib import contextmanager, ExitStack
 import concurrent.futures
 from urllib.parse import urlparse, parse_qs
 import schedule
 
+def parse_time_to_seconds(time_str):
+    """Convert a time string (HH:MM:SS or MM:SS) to seconds"""
+    if not time_str or not time_str.strip():
+        raise ValueError("Time string is empty")
+    
+    parts = time_str.strip().split(':')
+    if len(parts) not in (2, 3):
+        raise ValueError(f"Invalid time format: {time_str}")
+    
+    values = [int(part) for part in parts]
+    if any(value < 0 for value in values):
+        raise ValueError(f"Invalid time format: {time_str}")
+    
+    if len(values) == 2:  # MM:SS format
+        minutes, seconds = values
+        return minutes * 60 + seconds
+    hours, minutes, seconds = values  # HH:MM:SS format
+    return hours * 3600 + minutes * 60 + seconds
+
 def trim_video_segment(input_file, start_seconds=None, end_seconds=None):
     """Trim video segment using FFmpeg after download."""
     
@@ -77,12 +105,79 @@ def trim_video_segment(input_file, start_seconds=None, end_seconds=None):
         print(f"DEBUG: FFmpeg trimming failed with exception: {e}")
         return None
 
-def get_video_info(url):
+AUDIO_ENCODERS = {'mp3': 'libmp3lame', 'm4a': 'aac', 'opus': 'libopus'}
+# Container that holds each source codec when the audio stream is kept as is
+AUDIO_REMUX_CONTAINERS = {'opus': 'opus', 'mp4a': 'm4a', 'aac': 'm4a', 'vorbis': 'ogg', 'mp3': 'mp3', 'flac': 'flac'}
+AUDIO_FORMATS = {
+    'original': "Original stream (no re-encode)",
+    'mp3': "MP3",
+    'm4a': "AAC (m4a)",
+    'opus': "Opus",
+}
+AUDIO_BITRATES = ['96', '128', '160', '192', '256', '320']
+DEFAULT_AUDIO_FORMAT = {'codec': 'mp3', 'bitrate': '192'}
+
+def is_audio_only(quality, audio_choice):
+    """Whether a download fetches only the audio stream and converts it to an audio file"""
+    return quality == "Audio Only" or audio_choice == "audio_only"
+
+def audio_remux_extension(acodec):
+    """File extension for keeping an audio stream of the given yt-dlp acodec without re-encoding"""
+    return AUDIO_REMUX_CONTAINERS.get((acodec or '').split('.')[0].lower(), 'mka')
+
+def audio_format_label(audio_format):
+    """Short label for an audio format setting, e.g. 'opus 128k' or 'original'"""
+    audio_format = audio_format or DEFAULT_AUDIO_FORMAT
+    if audio_format['codec'] == 'original':
+        return 'original'
+    return f"{audio_format['codec']} {audio_format['bitrate']}k"
+
+def extract_audio(input_file, codec='mp3', bitrate='192', source_codec=None, source_bitrate=None):
+    """Convert a downloaded file to an audio-only file with FFmpeg; returns the new path or None
+    
+    codec 'original' keeps the downloaded audio stream and only remuxes it
+    into a container that fits source_codec (yt-dlp's acodec). A source
+    already in the requested codec is remuxed rather than re-encoded when
+    its bitrate (source_bitrate, yt-dlp's abr in kbps) is at or below the
+    requested one.
+    Each transcode uses one thread; the post-processing pool runs one ffmpeg
+    process per CPU.
+    """
+    if not os.path.exists(input_file):
+        print(f"DEBUG: Input file does not exist: {input_file}")
+        return None
+    
+    remux_extension = audio_remux_extension(source_codec) if source_codec and source_codec != 'none' else None
+    already_fits = codec == remux_extension and source_bitrate and float(source_bitrate) <= float(bitrate)
+    if codec == 'original' or already_fits:
+        extension = remux_extension or 'mka'
+        audio_args = ['-c:a', 'copy']
+    else:
+        extension = codec
+        audio_args = ['-c:a', AUDIO_ENCODERS.get(codec, codec), '-b:a', f"{bitrate}k", '-threads', '1']
+    
+    output_file = f"{os.path.splitext(input_file)[0]}.{extension}"
+    if output_file == input_file:
+        return input_file
+    cmd = ['ffmpeg', '-y', '-i', input_file, '-vn', *audio_args, output_file]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=1800)
+        if result.returncode == 0 and os.path.exists(output_file):
+            return output_file
+        print(f"DEBUG: FFmpeg audio extraction failed with return code {result.returncode}: {result.stderr[-500:]}")
+        return None
+    except (subprocess.TimeoutExpired, OSError) as e:
+        print(f"DEBUG: FFmpeg audio extraction failed: {e}")
+        return None
+
+def get_video_info(url, format_option=None):
     ydl_opts = {
         'quiet': True,
         'no_warnings': True,
         'skip_download': True,
     }
+    if format_option:
+        ydl_opts['format'] = format_option
     
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
         try:
@@ -92,15 +187,40 @@ def get_video_info(url):
             # Don't call st.error to avoid ScriptRunContext warnings
             return None
 
-def get_playlist_info(url):
-    """Extract playlist information"""
+PLAYLIST_PREVIEW_LIMIT = 5
+PLAYLIST_PAGE_SIZE = 50
+ENTRY_DETAIL_FIELDS = ('duration', 'thumbnail', 'view_count', 'uploader', 'upload_date', 'description')
+
+def playlist_entry_url(entry):
+    """Watch URL of a flat playlist entry"""
+    if entry.get('ie_key', 'Youtube') == 'Youtube' and entry.get('id'):
+        return f"https://www.youtube.com/watch?v={entry['id']}"
+    return entry.get('url')
+
+def get_playlist_info(url, flat=False, max_entries=None):
+    """Extract playlist information
+    
+    With flat=True only IDs, titles and whatever the playlist page itself
+    lists (usually duration) are fetched, without resolving each video, and
+    listing stops after max_entries. Flat entries can be filled in later with
+    enrich_playlist_entry.
+    """
+    if flat:
+        pager = PlaylistPager(url)
+        if not pager.open():
+            return None
+        pager.load_until(max_entries)
+        pager.close()
+        return pager.playlist_info
+    
+    throttle = get_throttle_controller()
     ydl_opts = {
         'quiet': True,
         'no_warnings': True,
         'skip_download': True,
         'extractor_retries': 3,
         'fragment_retries': 3,
-        'retry_sleep_functions': {'http': lambda n: 0.5 * n},
+        'retry_sleep_functions': {'http': throttle.retry_sleep, 'extractor': throttle.retry_sleep},
     }
     
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
@@ -113,6 +233,457 @@ def get_playlist_info(url):
             # Don't call st.error to avoid ScriptRunContext warnings
             return None
 
+class PlaylistPager:
+    """Flat playlist listing that fetches entries page by page as they are needed
+    
+    The yt-dlp entry generator is kept open between reruns, so moving to the
+    next page only requests the playlist pages that hold it. playlist_info
+    looks like a get_playlist_info result whose 'entries' list grows as more
+    entries are loaded.
+    """
+    def __init__(self, url):
+        self.url = url
+        self.lock = threading.Lock()
+        self.playlist_info = None
+        self.entries = []
+        self.done = False
+        self.error = None
+        self._iterator = None
+        self._stack = ExitStack()
+        self._target = 0
+        self._prefetch_thread = None
+        self._closed = False
+    
+    def open(self):
+        """Fetch the playlist header and first page; returns False if the URL is not a playlist"""
+        throttle = get_throttle_controller()
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'skip_download': True,
+            'extract_flat': 'in_playlist',
+            'lazy_playlist': True,
+            'extractor_retries': 3,
+            'retry_sleep_functions': {'http': throttle.retry_sleep, 'extractor': throttle.retry_sleep},
+        }
+        try:
+            ydl = self._stack.enter_context(yt_dlp.YoutubeDL(ydl_opts))
+            # process=False keeps the entries lazy, so pages nobody looks at are never requested
+            info = ydl.extract_info(self.url, download=False, process=False)
+        except Exception as e:
+            print(f"DEBUG: Could not list playlist {self.url}: {e}")
+            self.close()
+            return False
+        if not info or 'entries' not in info:
+            self.close()
+            return False
+        
+        self._iterator = iter(info['entries'])
+        self.playlist_info = {
+            'id': info.get('id'),
+            'title': info.get('title', 'Unknown Playlist'),
+            'webpage_url': info.get('webpage_url', self.url),
+            'playlist_count': info.get('playlist_count'),
+            'entries': self.entries,
+            'flat': True,
+            'complete': False,
+        }
+        return True
+    
+    @property
+    def total(self):
+        """Number of entries if known, otherwise None while listing continues"""
+        if self.done:
+            return len(self.entries)
+        return self.playlist_info.get('playlist_count') if self.playlist_info else None
+    
+    def load_until(self, count=None):
+        """Load entries until `count` are available or the playlist ends (count=None loads all)
+        
+        The lock is held for one entry at a time, so a small request is not
+        stuck behind a background prefetch of the whole playlist.
+        """
+        while count is None or len(self.entries) < count:
+            with self.lock:
+                if self.done or self._closed or (count is not None and len(self.entries) >= count):
+                    break
+                try:
+                    entry = next(self._iterator)
+                except StopIteration:
+                    self._finish()
+                    break
+                except Exception as e:
+                    print(f"DEBUG: Listing {self.url} stopped after {len(self.entries)} entries: {e}")
+                    self.error = str(e)
+                    self._finish()
+                    break
+                if not entry or not entry.get('id'):
+                    continue
+                self.entries.append({
+                    'id': entry['id'],
+                    'title': entry.get('title') or 'Unknown',
+                    'url': playlist_entry_url(entry),
+                    'duration': int(entry['duration']) if entry.get('duration') else None,
+                })
+        return self.entries[:count] if count is not None else self.entries
+    
+    def prefetch(self, count=None):
+        """Keep loading up to `count` entries in a background thread"""
+        self._target = None if count is None or self._target is None else max(self._target, count)
+        if self.done or (self._prefetch_thread and self._prefetch_thread.is_alive()):
+            return
+        
+        def run():
+            while not self.done and not self._closed and (self._target is None or len(self.entries) < self._target):
+                self.load_until(self._target)
+        
+        self._prefetch_thread = threading.Thread(target=run, daemon=True)
+        self._prefetch_thread.start()
+    
+    def is_loading(self):
+        return bool(self._prefetch_thread and self._prefetch_thread.is_alive())
+    
+    def _finish(self):
+        self.done = True
+        self.playlist_info['complete'] = True
+        self.playlist_info['playlist_count'] = len(self.entries)
+        self._stack.close()
+    
+    def close(self):
+        """Release the yt-dlp instance; entries loaded so far stay available"""
+        self._target = 0
+        # Waits for a prefetch inside next() so the YoutubeDL isn't closed under it
+        with self.lock:
+            self._closed = True
+            self._stack.close()
+
+def enrich_playlist_entry(entry, format_option=None):
+    """Fill in duration, thumbnail, formats, availability and size estimate of a flat playlist entry on first use
+    
+    The size estimate is for format_option (see get_format_option), or
+    yt-dlp's default format if None.
+    """
+    if entry.get('enriched') and entry.get('estimate_format') == format_option:
+        return entry
+    info = get_video_info(entry.get('url') or playlist_entry_url(entry), format_option)
+    apply_entry_details(entry, extract_entry_details(info), format_option)
+    return entry
+
+def extract_entry_details(info):
+    """The parts of a video's info dict kept on playlist entries"""
+    if not info:
+        # Private, removed or region-blocked
+        return {'availability': 'unavailable'}
+    details = {field: info[field] for field in ENTRY_DETAIL_FIELDS if info.get(field) is not None}
+    details['available_heights'] = sorted({f['height'] for f in info.get('formats') or [] if f.get('height')}, reverse=True)
+    details['filesize_estimate'] = requested_filesize(info)
+    details['availability'] = info.get('availability') or 'public'
+    return details
+
+def apply_entry_details(entry, details, format_option=None):
+    entry.update(details)
+    if entry.get('duration'):
+        entry['duration'] = int(entry['duration'])
+    entry['estimate_format'] = format_option
+    entry['enriched'] = True
+
+class EntryEnrichmentPool:
+    """Fetches playlist entry details on a bounded thread pool with a shared cache.
+    
+    Entries are the caller's dicts (e.g. in the Playlist Manager's session
+    state) and are updated in place as each fetch finishes, so a rerun shows
+    whatever has arrived. Requests are tagged with an owner; cancelling an
+    owner drops its fetches that haven't started unless another owner still
+    wants them.
+    """
+    def __init__(self, max_workers=4, cache_size=5000):
+        self.lock = threading.RLock()
+        self.cache = {}    # (video_id, format_option) -> details, oldest first
+        self.pending = {}  # (video_id, format_option) -> (future, waiting entries, owners)
+        self.cache_size = cache_size
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="enrich")
+    
+    def enrich(self, entries, owner, format_option=None):
+        """Schedule details for entries that don't have them yet; returns how many are still being fetched"""
+        with self.lock:
+            for entry in entries:
+                if not entry or not entry.get('id'):
+                    continue
+                if entry.get('enriched') and entry.get('estimate_format') == format_option:
+                    continue
+                key = (entry['id'], format_option)
+                if key in self.cache:
+                    apply_entry_details(entry, self.cache[key], format_option)
+                elif key in self.pending:
+                    self.pending[key][1].append(entry)
+                    self.pending[key][2].add(owner)
+                else:
+                    url = entry.get('url') or playlist_entry_url(entry)
+                    future = self.executor.submit(lambda url=url: extract_entry_details(get_video_info(url, format_option)))
+                    self.pending[key] = (future, [entry], {owner})
+                    future.add_done_callback(lambda future, key=key: self._finished(key, future))
+            return self.pending_count(owner)
+    
+    def _finished(self, key, future):
+        with self.lock:
+            _, waiting, _ = self.pending.pop(key, (None, [], None))
+            if future.cancelled():
+                return
+            details = future.result()
+            self.cache[key] = details
+            while len(self.cache) > self.cache_size:
+                del self.cache[next(iter(self.cache))]
+            for entry in waiting:
+                apply_entry_details(entry, details, key[1])
+    
+    def pending_count(self, owner=None):
+        with self.lock:
+            return sum(1 for _, _, owners in self.pending.values() if owner is None or owner in owners)
+    
+    def wait(self, owner, timeout=None):
+        """Block until the owner's fetches finish or the timeout passes"""
+        with self.lock:
+            futures = [future for future, _, owners in self.pending.values() if owner in owners]
+        concurrent.futures.wait(futures, timeout=timeout)
+    
+    def cancel(self, owner):
+        """Cancel the owner's fetches that haven't started yet"""
+        to_cancel = []
+        with self.lock:
+            for future, _, owners in self.pending.values():
+                owners.discard(owner)
+                if not owners:
+                    to_cancel.append(future)
+        for future in to_cancel:
+            future.cancel()
+
+PLAYLIST_SORT_OPTIONS = {
+    "Playlist Order": (None, True),
+    "Longest First": ('duration', False),
+    "Shortest First": ('duration', True),
+    "Newest First": ('upload_date', False),
+    "Oldest First": ('upload_date', True),
+    "Title A-Z": ('title', True),
+}
+
+class PlaylistTable:
+    """Playlist entries as columns, for vectorized filtering, sorting and bulk selection.
+    
+    Rows are indexed by playlist position, matching the pager's entry list.
+    sync() appends newly listed entries and copies in details as the
+    enrichment pool delivers them. Selection and per-video time ranges are
+    columns too, so the whole table is edited through one grid.
+    """
+    def __init__(self):
+        self.frame = self._make_frame([])
+        self.awaiting_details = set()  # positions whose details haven't arrived yet
+        self.version = 0  # bumped by bulk changes that an open grid doesn't know about
+        self.details_version = 0  # bumped whenever details arrive
+        self.sort_order = None  # (sort option, ordered positions, details_version) frozen when the sort was chosen
+    
+    @staticmethod
+    def _make_frame(rows, start=0):
+        frame = pd.DataFrame(rows, columns=['id', 'title', 'url', 'duration', 'upload_date', 'filesize_estimate', 'availability'],
+                             index=pd.RangeIndex(start, start + len(rows)))
+        frame['duration'] = pd.to_numeric(frame['duration'], errors='coerce').astype('float64')
+        frame['upload_date'] = pd.to_datetime(frame['upload_date'], format='%Y%m%d', errors='coerce')
+        frame['filesize_estimate'] = pd.to_numeric(frame['filesize_estimate'], errors='coerce').astype('float64')
+        frame['selected'] = False
+        frame['start_time'] = pd.Series([None] * len(rows), index=frame.index, dtype='object')
+        frame['end_time'] = pd.Series([None] * len(rows), index=frame.index, dtype='object')
+        return frame
+    
+    @staticmethod
+    def _entry_row(entry):
+        return [entry.get('id'), entry.get('title') or 'Unknown', entry.get('url'), entry.get('duration'),
+                entry.get('upload_date'), entry.get('filesize_estimate'), entry.get('availability')]
+    
+    def __len__(self):
+        return len(self.frame)
+    
+    def sync(self, entries):
+        """Append entries listed since the last sync and fill in details that have arrived"""
+        start = len(self.frame)
+        if len(entries) > start:
+            new_entries = entries[start:]
+            new_rows = self._make_frame([self._entry_row(entry) for entry in new_entries], start)
+            self.frame = pd.concat([self.frame, new_rows]) if start else new_rows
+            self.awaiting_details.update(start + offset for offset, entry in enumerate(new_entries) if not entry.get('enriched'))
+        
+        arrived = [position for position in self.awaiting_details if entries[position].get('enriched')]
+        if arrived:
+            details = self._make_frame([self._entry_row(entries[position]) for position in arrived])
+            details.index = pd.Index(arrived)
+            columns = ['duration', 'upload_date', 'filesize_estimate', 'availability']
+            self.frame.loc[arrived, columns] = details[columns]
+            self.awaiting_details.difference_update(arrived)
+            self.details_version += 1
+    
+    def mask(self, min_duration=None, max_duration=None, title_pattern=None, date_from=None, date_to=None):
+        """Rows matching all given filters; durations in seconds, dates as date/datetime
+        
+        Rows with an unknown duration or upload date don't match a filter on
+        that column. An invalid title pattern raises re.error.
+        """
+        frame = self.frame
+        matches = pd.Series(True, index=frame.index)
+        if min_duration is not None:
+            matches &= frame['duration'] >= min_duration
+        if max_duration is not None:
+            matches &= frame['duration'] <= max_duration
+        if title_pattern:
+            re.compile(title_pattern)
+            matches &= frame['title'].str.contains(title_pattern, case=False, regex=True, na=False)
+        if date_from is not None:
+            matches &= frame['upload_date'] >= pd.Timestamp(date_from)
+        if date_to is not None:
+            matches &= frame['upload_date'] < pd.Timestamp(date_to) + pd.Timedelta(days=1)
+        return matches
+    
+    def view(self, matches=None, sort_option="Playlist Order"):
+        """Matching rows in the chosen order
+        
+        A sort is frozen when it is chosen, so details arriving afterwards
+        don't move rows under a grid being edited; resort() applies them.
+        Rows listed since the sort follow in playlist order.
+        """
+        frame = self.frame
+        column, _ = PLAYLIST_SORT_OPTIONS.get(sort_option, (None, True))
+        if column:
+            if self.sort_order is None or self.sort_order[0] != sort_option:
+                self.resort(sort_option)
+            order = self.sort_order[1]
+            frame = frame.loc[order.append(frame.index[len(order):])]
+        if matches is not None:
+            frame = frame[matches.reindex(frame.index).to_numpy()]
+        return frame
+    
+    def resort(self, sort_option):
+        """Sort again by sort_option with the details known now"""
+        column, ascending = PLAYLIST_SORT_OPTIONS.get(sort_option, (None, True))
+        order = self.frame.index
+        if column:
+            order = self.frame.sort_values(column, ascending=ascending, na_position='last', kind='stable').index
+        self.sort_order = (sort_option, order, self.details_version)
+    
+    def sort_is_stale(self, sort_option):
+        """Whether details arrived since the frozen sort for sort_option was made"""
+        return (PLAYLIST_SORT_OPTIONS.get(sort_option, (None, True))[0] is not None and self.sort_order is not None
+                and self.sort_order[0] == sort_option and self.sort_order[2] != self.details_version)
+    
+    def set_selected(self, positions, selected=True):
+        self.frame.loc[positions, 'selected'] = selected
+        self.version += 1
+    
+    def clear_time_ranges(self):
+        self.frame['start_time'] = None
+        self.frame['end_time'] = None
+        self.version += 1
+    
+    def apply_edits(self, edited):
+        """Write back the Select/Start/End columns of a grid whose index is playlist position"""
+        if edited is None or len(edited) == 0:
+            return
+        self.frame.loc[edited.index, 'selected'] = edited['Select'].fillna(False).astype(bool)
+        for column, target in (('Start', 'start_time'), ('End', 'end_time')):
+            values = edited[column].astype('object').where(edited[column].notna(), None)
+            values = values.map(lambda value: value.strip() or None if isinstance(value, str) else value)
+            self.frame.loc[edited.index, target] = values
+    
+    def selected_positions(self):
+        return self.frame.index[self.frame['selected']].tolist()
+    
+    def time_range(self, position):
+        """{'start', 'end'} for a row, with 00:00:00 as start meaning from the beginning"""
+        start, end = self.frame.at[position, 'start_time'], self.frame.at[position, 'end_time']
+        return {'start': start if start and start != "00:00:00" else None, 'end': end or None}
+    
+    def invalid_time_ranges(self):
+        """Selected rows whose start/end can't be parsed or whose end is not after the start"""
+        invalid = []
+        rows = self.frame[self.frame['selected'] & (self.frame['start_time'].notna() | self.frame['end_time'].notna())]
+        for position, start, end in zip(rows.index, rows['start_time'], rows['end_time']):
+            try:
+                start_seconds = parse_time_to_seconds(start) if start else 0
+                end_seconds = parse_time_to_seconds(end) if end else None
+            except ValueError:
+                invalid.append(position)
+                continue
+            if end_seconds is not None and end_seconds <= start_seconds:
+                invalid.append(position)
+        return invalid
+
+@st.cache_resource
+def get_entry_enrichment_pool():
+    """Shared pool for playlist entry details, kept across reruns and sessions"""
+    return EntryEnrichmentPool()
+
+CHANNEL_URL_PATTERN = re.compile(r'^(https?://(?:www\.|m\.)?youtube\.com/(?:@[^/?#]+|channel/[^/?#]+|c/[^/?#]+|user/[^/?#]+))/?(?:[?#].*)?$')
+
+def normalize_subscription_url(url):
+    """Point bare channel URLs at their Videos tab so entries are listed newest first"""
+    match = CHANNEL_URL_PATTERN.match(url.strip())
+    if match:
+        return f"{match.group(1)}/videos"
+    return url.strip()
+
+def list_new_playlist_entries(url, seen_ids, newest_first=True, max_entries=None, skip=0):
+    """List playlist or channel entries that are not in seen_ids
+    
+    Entries are extracted flat and page by page. For newest-first sources
+    (channel tabs, uploads playlists) listing stops at the first known video
+    ID, so only the pages holding new uploads are fetched. Oldest-first
+    sources pass over the first `skip` entries unchecked. Each new entry
+    carries its 'position' in the listing. Returns (new_entries,
+    playlist_title), or (None, None) if the URL or any page of it can't be
+    listed.
+    """
+    throttle = get_throttle_controller()
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'skip_download': True,
+        'extract_flat': 'in_playlist',
+        'lazy_playlist': True,
+        'extractor_retries': 3,
+        'retry_sleep_functions': {'http': throttle.retry_sleep, 'extractor': throttle.retry_sleep},
+    }
+    seen_ids = set(seen_ids or [])
+    new_entries = []
+    
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        try:
+            # process=False keeps the entries as a lazy generator, so unread pages are never requested
+            info = ydl.extract_info(url, download=False, process=False)
+        except Exception as e:
+            print(f"DEBUG: Could not list {url}: {e}")
+            return None, None
+        if not info or 'entries' not in info:
+            return None, None
+        
+        try:
+            for position, entry in enumerate(info['entries']):
+                if position < skip or not entry or not entry.get('id'):
+                    continue
+                if entry['id'] in seen_ids:
+                    if newest_first:
+                        break
+                    continue
+                new_entries.append({
+                    'id': entry['id'],
+                    'title': entry.get('title', 'Unknown'),
+                    'url': playlist_entry_url(entry),
+                    'position': position
+                })
+                if max_entries and len(new_entries) >= max_entries:
+                    break
+        except Exception as e:
+            # A partial list would let the newest-first cursor skip the entries behind the failed page
+            print(f"DEBUG: Listing {url} failed after {len(new_entries)} new entries: {e}")
+            return None, None
+    
+    return new_entries, info.get('title', 'Unknown')
+
 def is_playlist_url(url):
     """Check if URL is a playlist"""
     parsed_url = urlparse(url)
@@ -163,6 +734,8 @@ class BatchProgress:
         self.current_eta = 0
         self.current_downloaded_mb = 0
         self.current_total_mb = 0
+        self.item_estimates = []  # Pre-flight bytes per video, seeds the overall ETA
+        self.finished_bytes = 0
         
     def update_video_count(self, total):
         self.total_videos = total
@@ -182,7 +755,21 @@ class BatchProgress:
             self.success_count += 1
         else:
             self.error_count += 1
+        self.finished_bytes += self.current_downloaded_mb * 1024 * 1024
         self.overall_progress = ((self.current_video - 1) / self.total_videos) * 100
+    
+    def set_estimates(self, estimates):
+        self.item_estimates = list(estimates)
+    
+    def overall_eta(self):
+        """Seconds left for the whole batch from pre-flight sizes and the throughput so far, or None"""
+        if not self.item_estimates:
+            return None
+        index = max(0, self.current_video - 1)
+        current_total = self.current_total_mb * 1024 * 1024 or (self.item_estimates[index] if index < len(self.item_estimates) else 0)
+        current_done = self.current_downloaded_mb * 1024 * 1024
+        remaining = max(0, current_total - current_done) + sum(self.item_estimates[index + 1:])
+        return batch_eta_seconds(remaining, self.finished_bytes + current_done, time.time() - self.start_time, self.current_speed)
         
     def progress_hook(self, d):
         if d['status'] == 'downloading':
@@ -372,44 +959,726 @@ def get_download_history():
             return []
     return []
 
-def download_video(url, quality, audio_choice="with_audio", output_path="downloads", progress_callback=None, controller=None, start_time=None, end_time=None):
-    if not os.path.exists(output_path):
-        os.makedirs(output_path)
+# Download archive
+YOUTUBE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+_archive_lock = threading.Lock()
+_archive_cache = {'file': None, 'mtime': None, 'entries': {}}
+
+def get_video_id(url):
+    """Extract the YouTube video ID from a URL without making a network request"""
+    if not url:
+        return None
+
+    parsed_url = urlparse(url.strip())
+    host = (parsed_url.hostname or '').lower()
+    path_parts = [part for part in parsed_url.path.split('/') if part]
+    candidate = None
+
+    if host == 'youtu.be' or host.endswith('.youtu.be'):
+        candidate = path_parts[0] if path_parts else None
+    elif host == 'youtube.com' or host.endswith('.youtube.com') or host == 'youtube-nocookie.com' or host.endswith('.youtube-nocookie.com'):
+        if path_parts and path_parts[0] == 'watch':
+            candidate = parse_qs(parsed_url.query).get('v', [None])[0]
+        elif len(path_parts) >= 2 and path_parts[0] in ('shorts', 'embed', 'live', 'v'):
+            candidate = path_parts[1]
+
+    if candidate and YOUTUBE_ID_PATTERN.match(candidate):
+        return candidate
+    return None
+
+def canonical_video_url(url):
+    """Plain watch URL for any YouTube video URL form (youtu.be, shorts, embed, &t=, &list=)
+    
+    Other URLs are returned unchanged. Dropping the list parameter keeps
+    yt-dlp from expanding a watch link into its whole playlist.
+    """
+    video_id = get_video_id(url)
+    if video_id:
+        return f"https://www.youtube.com/watch?v={video_id}"
+    return url.strip() if url else url
+
+def build_archive_key(video_id, quality, audio_choice, start_time=None, end_time=None, extractor="youtube", audio_format=None):
+    """Build the archive key for a video, format profile and time range"""
+    def normalize_time(time_str):
+        if not time_str or not str(time_str).strip():
+            return ''
+        try:
+            return str(parse_time_to_seconds(str(time_str)))
+        except ValueError:
+            return str(time_str).strip()
+
+    start = normalize_time(start_time)
+    if start == '0':
+        start = ''
+    end = normalize_time(end_time)
+    # Keys of mp3 downloads stay as they were before the audio format was configurable;
+    # audio_only downloads were full videos until they fetched the audio stream alone
+    if audio_choice == "audio_only" or (quality == "Audio Only" and audio_format and audio_format != DEFAULT_AUDIO_FORMAT):
+        quality = f"{quality} {audio_format_label(audio_format)}"
+    return f"{extractor.lower()}:{video_id}|{quality}|{audio_choice}|{start}-{end}"
+
+def load_download_archive(archive_file="download_archive.json"):
+    """Load the download archive, reusing the cached copy while the file is unchanged"""
+    with _archive_lock:
+        try:
+            mtime = os.path.getmtime(archive_file)
+        except OSError:
+            return {}
+
+        if _archive_cache['file'] == archive_file and _archive_cache['mtime'] == mtime:
+            return _archive_cache['entries']
+
+        try:
+            with open(archive_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except:
+            entries = {}
+
+        _archive_cache.update({'file': archive_file, 'mtime': mtime, 'entries': entries})
+        return entries
+
+def find_archived_download(archive_key, archive=None, archive_file="download_archive.json"):
+    """Return the archive record for a key if its file still exists on disk"""
+    if archive is None:
+        archive = load_download_archive(archive_file)
+    record = archive.get(archive_key)
+    if record and os.path.exists(record.get('file_path', '')):
+        return record
+    return None
+
+def add_to_download_archive(archive_key, video_info, file_path, archive_file="download_archive.json"):
+    """Record a completed download in the archive"""
+    with _archive_lock:
+        archive = {}
+        if os.path.exists(archive_file):
+            try:
+                with open(archive_file, 'r', encoding='utf-8') as f:
+                    archive = json.load(f)
+            except:
+                archive = {}
+
+        archive[archive_key] = {
+            'title': video_info.get('title', 'Unknown'),
+            'file_path': file_path,
+            'download_date': datetime.now().isoformat()
+        }
+
+        with open(archive_file, 'w', encoding='utf-8') as f:
+            json.dump(archive, f, indent=2, ensure_ascii=False)
+
+        _archive_cache.update({'file': archive_file, 'mtime': os.path.getmtime(archive_file), 'entries': archive})
+
+def precheck_archived_urls(url_items, quality, audio_choice, archive_file="download_archive.json", audio_format=None):
+    """Return the indices of url_items that are already in the archive.
+
+    url_items is a list of dicts with 'url' and optional 'start_time'/'end_time'.
+    The archive is loaded once, so large lists are checked without network calls.
+    """
+    archive = load_download_archive(archive_file)
+    if not archive:
+        return set()
+
+    archived_indices = set()
+    for i, item in enumerate(url_items):
+        video_id = get_video_id(item.get('url'))
+        if not video_id:
+            continue
+        archive_key = build_archive_key(video_id, quality, audio_choice, item.get('start_time'), item.get('end_time'),
+                                        audio_format=audio_format)
+        if find_archived_download(archive_key, archive):
+            archived_indices.add(i)
+    return archived_indices
+
+# Content-addressed blob store
+class StreamingHasher:
+    """Hash a download while it streams by tailing its partial file from the progress hook"""
+    def __init__(self):
+        self.sha256 = hashlib.sha256()
+        self.filename = None
+        self.final_filename = None
+        self.offset = 0
+        self.valid = True
     
-    # Set format based on selected quality and audio option
+    def _consume(self, path):
+        try:
+            with open(path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                if size < self.offset:
+                    # The file was truncated or restarted, the running hash is useless
+                    self.valid = False
+                    return
+                f.seek(self.offset)
+                while True:
+                    chunk = f.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    self.sha256.update(chunk)
+                    self.offset += len(chunk)
+        except OSError:
+            self.valid = False
+    
+    def progress_hook(self, d):
+        if not self.valid:
+            return
+        if d['status'] == 'downloading':
+            partial_file = d.get('tmpfilename') or d.get('filename')
+            if self.filename is None:
+                self.filename = partial_file
+            elif partial_file != self.filename:
+                # A second stream means yt-dlp will merge, so the output differs from what we hashed
+                self.valid = False
+                return
+            if partial_file:
+                self._consume(partial_file)
+        elif d['status'] == 'finished':
+            self.final_filename = d.get('filename')
+            if self.final_filename:
+                self._consume(self.final_filename)
+    
+    def hexdigest_for(self, file_path):
+        """Return the streamed hash if it covers exactly file_path, otherwise None"""
+        if not self.valid or not self.final_filename:
+            return None
+        try:
+            if os.path.abspath(self.final_filename) != os.path.abspath(file_path) or os.path.getsize(file_path) != self.offset:
+                return None
+        except OSError:
+            return None
+        return self.sha256.hexdigest()
+
+def hash_file(file_path):
+    """Compute the SHA-256 of a file"""
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+def store_in_blob_store(file_path, file_hash=None, blob_store_path=os.path.join("downloads", ".blobs")):
+    """Replace file_path with a hardlink to its content-addressed blob.
+    
+    Returns the content hash, or None when the file could not be linked
+    (for example on filesystems without hardlink support).
+    """
+    try:
+        if file_hash is None:
+            file_hash = hash_file(file_path)
+        
+        ext = os.path.splitext(file_path)[1].lower()
+        blob_dir = os.path.join(blob_store_path, file_hash[:2])
+        blob_path = os.path.join(blob_dir, f"{file_hash}{ext}")
+        os.makedirs(blob_dir, exist_ok=True)
+        
+        if not os.path.exists(blob_path):
+            os.link(file_path, blob_path)
+        elif not os.path.samefile(blob_path, file_path):
+            # Swap the duplicate for a link to the existing blob atomically
+            temp_link = f"{file_path}.link"
+            if os.path.exists(temp_link):
+                os.remove(temp_link)
+            os.link(blob_path, temp_link)
+            os.replace(temp_link, file_path)
+            print(f"DEBUG: Deduplicated {file_path} against blob {file_hash}")
+        return file_hash
+    except OSError as e:
+        print(f"DEBUG: Could not store {file_path} in blob store: {e}")
+        return None
+
+def prune_blob_store(blob_store_path=os.path.join("downloads", ".blobs")):
+    """Remove blobs no longer linked from any user-visible file, return (count, bytes) freed"""
+    removed_count = 0
+    removed_bytes = 0
+    if not os.path.exists(blob_store_path):
+        return removed_count, removed_bytes
+    
+    for root, dirs, files in os.walk(blob_store_path):
+        for file in files:
+            blob_path = os.path.join(root, file)
+            try:
+                blob_stats = os.stat(blob_path)
+                if blob_stats.st_nlink <= 1:
+                    os.remove(blob_path)
+                    removed_count += 1
+                    removed_bytes += blob_stats.st_size
+            except OSError:
+                pass
+    return removed_count, removed_bytes
+
+# Shared throttle control
+THROTTLE_ERROR_MARKERS = ('http error 429', 'too many requests', 'rate limit', 'rate-limit', 'throttl', 'not a bot')
+TRANSIENT_ERROR_MARKERS = ('timed out', 'timeout', 'connection reset', 'connection refused', 'connection aborted',
+                           'temporary failure', 'temporarily unavailable', 'incompleteread', 'remote end closed',
+                           'http error 5', 'network is unreachable', 'unable to download webpage', 'fragment')
+
+def classify_download_error(message):
+    """Classify a download error as 'throttled', 'transient', 'stopped' or 'permanent'"""
+    message = (message or '').lower()
+    if 'stopped by user' in message:
+        return 'stopped'
+    if any(marker in message for marker in THROTTLE_ERROR_MARKERS):
+        return 'throttled'
+    if any(marker in message for marker in TRANSIENT_ERROR_MARKERS):
+        return 'transient'
+    return 'permanent'
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Exponential backoff with jitter: half the capped delay plus a random share of the other half"""
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+class ThrottleController:
+    """Back off every download in the process together when the site throttles us.
+    
+    Downloads take a slot before touching the network. A throttling error
+    (HTTP 429 and friends) halves the number of slots and the per-download
+    rate and pauses new requests for a jittered, exponentially growing
+    delay; each success adds the slot and rate back additively (AIMD).
+    """
+    def __init__(self, max_concurrency=8, base_rate=4 * 1024 * 1024, min_rate=256 * 1024,
+                 rate_step=512 * 1024, base_delay=2.0, max_delay=300.0):
+        self.max_concurrency = max_concurrency
+        self.base_rate = base_rate  # Rate cap is lifted once it grows back to this, bytes per second
+        self.min_rate = min_rate
+        self.rate_step = rate_step
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.condition = threading.Condition()
+        self.limit = float(max_concurrency)
+        self.rate = None  # Per-download rate cap, None when not throttled
+        self.active = 0
+        self.strikes = 0  # Consecutive throttles, drives the backoff delay
+        self.backoff_until = 0
+        self.throttle_count = 0
+    
+    def acquire(self, controller=None):
+        """Wait for a free slot and the end of any backoff; False if the download was stopped meanwhile"""
+        with self.condition:
+            while True:
+                if controller and controller.should_stop:
+                    return False
+                wait = self.backoff_until - time.time()
+                if wait <= 0 and self.active < max(1, int(self.limit)):
+                    self.active += 1
+                    return True
+                self.condition.wait(min(wait, 0.5) if wait > 0 else 0.5)
+    
+    def release(self):
+        with self.condition:
+            self.active = max(0, self.active - 1)
+            self.condition.notify_all()
+    
+    def record_throttle(self):
+        """Multiplicative decrease of slots and rate, plus a shared pause"""
+        with self.condition:
+            self.limit = max(1.0, self.limit / 2)
+            self.rate = max(self.min_rate, (self.rate or self.base_rate) / 2)
+            self.backoff_until = max(self.backoff_until, time.time() + backoff_delay(self.strikes, self.base_delay, self.max_delay))
+            self.strikes += 1
+            self.throttle_count += 1
+            print(f"⚠️ Throttled, backing off: {int(self.limit)} concurrent downloads, {self.rate / 1024:.0f} KB/s each")
+    
+    def record_success(self):
+        """Additive increase of slots and rate until back to unthrottled"""
+        with self.condition:
+            self.strikes = 0
+            self.limit = min(float(self.max_concurrency), self.limit + 1)
+            if self.rate is not None:
+                self.rate += self.rate_step
+                if self.rate >= self.base_rate:
+                    self.rate = None
+            self.condition.notify_all()
+    
+    def rate_limit(self):
+        """Current per-download rate cap in bytes per second, or None"""
+        with self.condition:
+            return int(self.rate) if self.rate else None
+    
+    def retry_sleep(self, n):
+        """yt-dlp retry_sleep_functions hook: jittered exponential delay that also honours a shared backoff"""
+        with self.condition:
+            shared_wait = max(0, self.backoff_until - time.time())
+        return max(shared_wait, backoff_delay(n, 0.5, 30.0))
+    
+    def status(self):
+        """Snapshot for display"""
+        with self.condition:
+            return {
+                'limit': int(self.limit),
+                'active': self.active,
+                'rate': int(self.rate) if self.rate else None,
+                'backoff_seconds': max(0, self.backoff_until - time.time()),
+                'throttle_count': self.throttle_count
+            }
+
+@st.cache_resource
+def get_throttle_controller():
+    """Process-wide throttle controller shared by all download threads"""
+    return ThrottleController()
+
+def link_download_output(source, output_path, source_prefix="", filename_prefix=""):
+    """Hardlink (or copy, across filesystems) a finished download into another output folder"""
+    name = os.path.basename(source)
+    if source_prefix and name.startswith(source_prefix):
+        name = name[len(source_prefix):]
+    target = os.path.join(output_path, f"{filename_prefix}{name}")
+    if os.path.abspath(target) == os.path.abspath(source) or os.path.exists(target):
+        return target
+    os.makedirs(output_path, exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+    return target
+
+class DownloadCoalescer:
+    """Merge identical download requests from every job into one download.
+    
+    Requests are keyed by archive key (video ID, format profile and time
+    range). The first request downloads. Identical requests that arrive
+    while it waits for a slot or downloads follow it: they receive its
+    progress and get the finished file linked into their own output folder.
+    If the leading download is stopped, a follower takes over.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}  # archive key -> request being downloaded
+        self.coalesced_count = 0
+    
+    def join(self, key, filename_prefix=""):
+        """Return (request, is_leader) for a download of key"""
+        with self.lock:
+            request = self.requests.get(key)
+            if request:
+                self.coalesced_count += 1
+                return request, False
+            request = {'key': key, 'prefix': filename_prefix, 'done': threading.Event(),
+                       'result': None, 'listeners': []}
+            self.requests[key] = request
+            return request, True
+    
+    def relay(self, request, progress_callback=None):
+        """Progress hook for the leading download that also feeds every follower"""
+        def hook(d):
+            if progress_callback:
+                progress_callback(d)
+            for listener in list(request['listeners']):
+                try:
+                    listener(d)
+                except Exception as e:
+                    print(f"DEBUG: Coalesced progress listener error: {e}")
+        return hook
+    
+    def finish(self, request, result):
+        with self.lock:
+            if self.requests.get(request['key']) is request:
+                del self.requests[request['key']]
+        request['result'] = result
+        request['done'].set()
+    
+    def follow(self, request, output_path, filename_prefix="", progress_callback=None, controller=None):
+        """Wait for the leading download and link its file into output_path
+        
+        Returns the (success, result) of download_video, or None if the
+        leading download was stopped and this request should download itself.
+        """
+        if progress_callback:
+            request['listeners'].append(progress_callback)
+        try:
+            while not request['done'].wait(0.2):
+                if controller and controller.should_stop:
+                    return False, "Download stopped by user"
+        finally:
+            if progress_callback in request['listeners']:
+                request['listeners'].remove(progress_callback)
+        
+        success, result = request['result']
+        if not success:
+            return None if result == "Download stopped by user" else (False, result)
+        try:
+            return True, link_download_output(result, output_path, request['prefix'], filename_prefix)
+        except OSError as e:
+            return False, f"Error linking downloaded file: {e}"
+
+@st.cache_resource
+def get_download_coalescer():
+    """Process-wide registry of downloads in progress, shared by all jobs"""
+    return DownloadCoalescer()
+
+class PostProcessingPool:
+    """Runs the CPU-bound steps after a download on their own workers.
+    
+    Trimming, audio extraction and blob store hashing happen here, after the
+    download has released its network slot, so the next video transfers
+    while ffmpeg runs. The pool is sized to the CPU count. At most
+    max_pending files wait or run; handing over more blocks the download
+    thread, so downloads can't run ahead and pile unprocessed files on disk.
+    """
+    def __init__(self, max_workers=None, max_pending=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 2
+        self.slots = threading.Semaphore(self.max_pending)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="postprocess")
+    
+    def submit(self, fn, controller=None):
+        """Queue fn(); waits while the queue is full. Returns a future, or None if stopped while waiting"""
+        while not self.slots.acquire(timeout=0.2):
+            if controller and controller.should_stop:
+                return None
+        future = self.executor.submit(fn)
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+@st.cache_resource
+def get_postprocessing_pool():
+    """Shared pool for trimming and transcoding, kept across reruns and sessions"""
+    return PostProcessingPool()
+
+def get_format_option(quality, audio_choice="with_audio"):
+    """yt-dlp format selector for the selected quality and audio option"""
     if audio_choice == "video_only":
         if quality == "1080p":
-            format_option = "bestvideo[height<=1080]"
+            return "bestvideo[height<=1080]"
         elif quality == "720p":
-            format_option = "bestvideo[height<=720]"
+            return "bestvideo[height<=720]"
         elif quality == "480p":
-            format_option = "bestvideo[height<=480]"
+            return "bestvideo[height<=480]"
         elif quality == "360p":
-            format_option = "bestvideo[height<=360]"
+            return "bestvideo[height<=360]"
         else:  # Best Quality
-            format_option = "bestvideo"
-    elif quality == "Audio Only":
-        format_option = "bestaudio/best"
+            return "bestvideo"
+    elif is_audio_only(quality, audio_choice):
+        # Sites without a separate audio stream fall back to a muxed file; the video track is dropped afterwards
+        return "bestaudio/best"
     else:  # with_audio (default)
         if quality == "1080p":
-            format_option = "bestvideo[height<=1080]+bestaudio/best[height<=1080]"
+            return "bestvideo[height<=1080]+bestaudio/best[height<=1080]"
         elif quality == "720p":
-            format_option = "bestvideo[height<=720]+bestaudio/best[height<=720]"
+            return "bestvideo[height<=720]+bestaudio/best[height<=720]"
         elif quality == "480p":
-            format_option = "bestvideo[height<=480]+bestaudio/best[height<=480]"
+            return "bestvideo[height<=480]+bestaudio/best[height<=480]"
         elif quality == "360p":
-            format_option = "bestvideo[height<=360]+bestaudio/best[height<=360]"
+            return "bestvideo[height<=360]+bestaudio/best[height<=360]"
         else:  # Best Quality
-            format_option = "bestvideo+bestaudio/best"
+            return "bestvideo+bestaudio/best"
+
+def estimate_download_size(url, quality, audio_choice="with_audio"):
+    """Estimated download size in bytes of the formats yt-dlp would pick, or None if unknown"""
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'skip_download': True,
+        'format': get_format_option(quality, audio_choice),
+    }
+    
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        try:
+            info = ydl.extract_info(url, download=False)
+        except Exception as e:
+            print(f"DEBUG: Could not estimate size of {url}: {e}")
+            return None
+    
+    return requested_filesize(info)
+
+def requested_filesize(info):
+    """Size in bytes of the formats selected in an info dict, or None if unknown"""
+    formats = info.get('requested_formats') or [info]
+    sizes = [fmt.get('filesize') or fmt.get('filesize_approx') for fmt in formats]
+    if not all(sizes):
+        return None
+    return sum(sizes)
+
+PREFLIGHT_DISK_HEADROOM = 1.1  # Free space wanted per estimated byte, for merge and trim temporaries
+
+def free_disk_bytes(path):
+    """Free bytes on the filesystem holding path (or its nearest existing parent), or None"""
+    path = os.path.abspath(path)
+    while not os.path.exists(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+    try:
+        return shutil.disk_usage(path).free
+    except OSError:
+        return None
+
+def plan_preflight(items, quality, audio_choice, output_path, timeout=60):
+    """Estimate the size and media duration of a batch before it starts
+    
+    items are dicts with 'url' and optionally 'title', 'filesize_estimate'
+    and 'duration' (playlist selections carry these already). Missing sizes
+    are fetched for the chosen format through the shared entry enrichment
+    pool, whose cache is keyed by video and format, so planning the same
+    videos again makes no requests. Videos with a time range are downloaded
+    whole before trimming and count in full; videos that can't be sized
+    within timeout count as DEFAULT_ITEM_ESTIMATE_BYTES.
+    
+    status is 'block' when the estimate doesn't fit in the free space of
+    output_path, 'warn' when it fits without headroom or some sizes are
+    guesses, else 'ok'.
+    """
+    format_option = get_format_option(quality, audio_choice)
+    entries = []
+    for item in items:
+        entry = {'id': get_video_id(item['url']), 'url': canonical_video_url(item['url'])}
+        if item.get('filesize_estimate'):
+            apply_entry_details(entry, {'filesize_estimate': item['filesize_estimate'], 'duration': item.get('duration')}, format_option)
+        entries.append(entry)
+    
+    enrichment_pool = get_entry_enrichment_pool()
+    owner = f"preflight_{uuid.uuid4().hex[:8]}"
+    if enrichment_pool.enrich(entries, owner, format_option):
+        enrichment_pool.wait(owner, timeout=timeout)
+        enrichment_pool.cancel(owner)
+    
+    plan_items = []
+    for item, entry in zip(items, entries):
+        size = entry.get('filesize_estimate')
+        plan_items.append({
+            'url': item['url'],
+            'title': item.get('title'),
+            'bytes': int(size) if size else DEFAULT_ITEM_ESTIMATE_BYTES,
+            'known': bool(size),
+            'duration': entry.get('duration') or item.get('duration')
+        })
+    
+    total_bytes = sum(plan_item['bytes'] for plan_item in plan_items)
+    unknown_count = sum(1 for plan_item in plan_items if not plan_item['known'])
+    free_bytes = free_disk_bytes(output_path)
+    required_bytes = int(total_bytes * PREFLIGHT_DISK_HEADROOM)
+    if free_bytes is not None and free_bytes < total_bytes:
+        status = 'block'
+    elif (free_bytes is not None and free_bytes < required_bytes) or unknown_count:
+        status = 'warn'
+    else:
+        status = 'ok'
+    
+    return {
+        'items': plan_items,
+        'total_bytes': total_bytes,
+        'unknown_count': unknown_count,
+        'total_duration': sum(plan_item['duration'] or 0 for plan_item in plan_items),
+        'free_bytes': free_bytes,
+        'required_bytes': required_bytes,
+        'status': status
+    }
+
+def describe_preflight(plan):
+    """One-line summary of a pre-flight plan for display"""
+    hours, minutes = divmod(int(plan['total_duration']) // 60, 60)
+    summary = f"≈ {plan['total_bytes'] / (1024**3):.2f} GB for {len(plan['items'])} videos ({hours}h {minutes}m of media)"
+    if plan['unknown_count']:
+        summary += f", {plan['unknown_count']} sizes guessed"
+    if plan['free_bytes'] is not None:
+        summary += f" | {plan['free_bytes'] / (1024**3):.2f} GB free"
+    return summary
+
+def preflight_warning(plan):
+    """Why a pre-flight plan that fits still needs attention, or None for 'ok' and 'block' plans"""
+    if plan['status'] != 'warn':
+        return None
+    reasons = []
+    if plan['free_bytes'] is not None and plan['free_bytes'] < plan['required_bytes']:
+        reasons.append("little space is left for merging and trimming")
+    if plan['unknown_count']:
+        reasons.append(f"{plan['unknown_count']} sizes could not be fetched and are guessed")
+    return f"Disk space may run short ({', '.join(reasons)}): {describe_preflight(plan)}"
+
+def batch_eta_seconds(remaining_bytes, transferred_bytes, elapsed, fallback_speed=0):
+    """Seconds left for remaining_bytes at the throughput seen so far, or None if unknown"""
+    rate = transferred_bytes / elapsed if elapsed > 0 and transferred_bytes > 0 else fallback_speed
+    if not rate:
+        return None
+    return remaining_bytes / rate
+
+def download_video(url, quality, audio_choice="with_audio", output_path="downloads", progress_callback=None, controller=None, start_time=None, end_time=None, skip_existing=False, dedupe=False, rate_limit=None, filename_prefix="", defer_postprocessing=False, audio_format=None):
+    """Download one video; returns (success, file path or error message)
+    
+    audio_format is {'codec', 'bitrate'} for audio-only downloads (quality
+    "Audio Only" or audio_choice "audio_only"), with
+    codec 'original' to keep the downloaded stream (default mp3 at 192k).
+    
+    With defer_postprocessing=True a download that still needs trimming or
+    audio extraction returns (True, future) as soon as its bytes are on
+    disk. The future resolves to the final (success, result) once the
+    post-processing pool has run, so batch workers can start the next
+    download meanwhile.
+    """
+    # Every URL form of a video is downloaded from the same canonical URL
+    url = canonical_video_url(url)
+    
+    # Consult the archive before any network request
+    archive_key = None
+    video_id = get_video_id(url)
+    if video_id:
+        archive_key = build_archive_key(video_id, quality, audio_choice, start_time, end_time, audio_format=audio_format)
+        archived = _archived_result(archive_key, url, controller) if skip_existing else None
+        if archived:
+            return archived
+    
+    if not archive_key:
+        return _start_video_download(url, quality, audio_choice, output_path, progress_callback, controller, start_time, end_time,
+                                     skip_existing, dedupe, rate_limit, filename_prefix, archive_key, defer_postprocessing, audio_format)
+    
+    # Identical requests from other jobs, queued or downloading, share one download
+    coalescer = get_download_coalescer()
+    while True:
+        request, is_leader = coalescer.join(archive_key, filename_prefix)
+        if is_leader:
+            break
+        print(f"DEBUG: Joining the download of {url} already in progress")
+        followed = coalescer.follow(request, output_path, filename_prefix, progress_callback, controller)
+        if followed is not None:
+            if followed[0]:
+                _mark_download_completed(controller)
+            return followed
+    
+    result = (False, "Error downloading video: interrupted")
+    try:
+        result = _start_video_download(url, quality, audio_choice, output_path, coalescer.relay(request, progress_callback), controller,
+                                       start_time, end_time, skip_existing, dedupe, rate_limit, filename_prefix, archive_key, defer_postprocessing,
+                                       audio_format)
+        return result
+    finally:
+        if isinstance(result[1], concurrent.futures.Future):
+            # Followers get the file once post-processing has finished
+            result[1].add_done_callback(lambda future: coalescer.finish(request, future.result()))
+        else:
+            coalescer.finish(request, result)
+
+def _mark_download_completed(controller):
+    """Show a download that needed no transfer of its own as finished"""
+    if controller:
+        controller.progress_data['status'] = 'completed'
+        controller.progress_data['progress'] = 100
+        controller.is_finished = True
+
+def _archived_result(archive_key, url, controller):
+    """Return (True, file path) if archive_key was downloaded before, else None"""
+    archived = find_archived_download(archive_key)
+    if not archived:
+        return None
+    print(f"DEBUG: Skipping {url} - already downloaded to {archived['file_path']}")
+    _mark_download_completed(controller)
+    return True, archived['file_path']
+
+def _start_video_download(url, quality, audio_choice, output_path, progress_callback, controller, start_time, end_time,
+                          skip_existing, dedupe, rate_limit, filename_prefix, archive_key, defer_postprocessing=False, audio_format=None):
+    if not os.path.exists(output_path):
+        os.makedirs(output_path)
+    
+    # Set format based on selected quality and audio option
+    format_option = get_format_option(quality, audio_choice)
+    throttle = get_throttle_controller()
     
     ydl_opts = {
         'format': format_option,
         'merge_output_format': 'mp4',
-        'outtmpl': os.path.join(output_path, '%(title)s.%(ext)s'),
+        'outtmpl': os.path.join(output_path, f'{filename_prefix}%(title)s.%(ext)s'),
         # Add more robust options for YouTube issues
         'extractor_retries': 3,
         'fragment_retries': 3,
-        'retry_sleep_functions': {'http': lambda n: 0.5 * n},
+        # Retries wait with jittered exponential backoff and respect the shared throttle pause
+        'retry_sleep_functions': {'http': throttle.retry_sleep, 'fragment': throttle.retry_sleep, 'extractor': throttle.retry_sleep},
     }
     
     # Initialize segment_info at function level to avoid scope issues
@@ -455,11 +1724,16 @@ def download_video(url, quality, audio_choice="with_audio", output_path="downloa
                 time_suffix += f"_to_{end_time.replace(':', '')}"
             
             if time_suffix:
-                ydl_opts['outtmpl'] = os.path.join(output_path, f'%(title)s{time_suffix}.%(ext)s')
+                ydl_opts['outtmpl'] = os.path.join(output_path, f'{filename_prefix}%(title)s{time_suffix}.%(ext)s')
             
             print(f"DEBUG: Will trim video after download")
             print(f"DEBUG: Time range: {start_time} to {end_time} ({start_seconds}s to {end_seconds}s)")
     
+    # Hash the download as it streams so deduplication needs no extra pass
+    hasher = StreamingHasher() if dedupe else None
+    if hasher:
+        ydl_opts['progress_hooks'] = [hasher.progress_hook]
+    
     # Add progress hook with pause/stop control if provided
     if progress_callback:
         def controlled_progress_hook(d):
@@ -475,94 +1749,182 @@ def download_video(url, quality, audio_choice="with_audio", output_path="downloa
                 
             progress_callback(d)
         
-        ydl_opts['progress_hooks'] = [controlled_progress_hook]
+        ydl_opts.setdefault('progress_hooks', []).append(controlled_progress_hook)
     
-    # If audio only, change the extension
-    if quality == "Audio Only":
-        ydl_opts['postprocessors'] = [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '192',
-        }]
+    # If audio only, remux or transcode after the download (on the post-processing pool)
+    audio_extraction = (audio_format or DEFAULT_AUDIO_FORMAT) if is_audio_only(quality, audio_choice) else None
     
     # If video only, ensure no audio
     if audio_choice == "video_only" and quality != "Audio Only":
         ydl_opts['postprocessors'] = []
     
+    # Wait for a download slot; all downloads back off together while throttled
+    if not throttle.acquire(controller):
+        return False, "Download stopped by user"
+    
+    # Bandwidth budget for scheduled windows and the throttle's rate cap, in bytes per second
+    rate_caps = [rate for rate in (rate_limit, throttle.rate_limit()) if rate]
+    if rate_caps:
+        ydl_opts['ratelimit'] = min(rate_caps)
+    
+    try:
+        success, result, finish = _run_video_download(ydl_opts, url, quality, audio_choice, controller, archive_key, skip_existing,
+                                                      start_time, end_time, throttle, audio_format)
+    finally:
+        throttle.release()
+    if not finish:
+        return success, result
+    
+    def postprocess():
+        return _finish_video_download(result, finish['info'], finish['archive_key'], quality, audio_choice, controller,
+                                      segment_info, audio_extraction, hasher)
+    
+    # Only ffmpeg and hashing work goes to the pool; plain downloads finish here
+    if not (segment_info or audio_extraction or hasher):
+        return postprocess()
+    future = get_postprocessing_pool().submit(postprocess, controller)
+    if future is None:
+        return False, "Download stopped by user"
+    if defer_postprocessing:
+        return True, future
+    return future.result()
+
+def _run_video_download(ydl_opts, url, quality, audio_choice, controller, archive_key, skip_existing,
+                        start_time, end_time, throttle, audio_format=None):
+    """Network stage: extract and fetch the video
+    
+    Returns (success, result, finish): finish is None when nothing is left
+    to do (errors, archive hits), else the info for _finish_video_download
+    and result is the downloaded file.
+    """
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
         try:
             # Check for stop before starting
             if controller and controller.should_stop:
-                return False, "Download stopped by user"
+                return False, "Download stopped by user", None
             
             # Get video info for history
             info = ydl.extract_info(url, download=False)
             
             # Check for stop after getting info
             if controller and controller.should_stop:
-                return False, "Download stopped by user"
+                return False, "Download stopped by user", None
             
-            # Download the video
-            ydl.download([url])
+            # URLs we could not parse locally are keyed by the extractor's own ID
+            if not archive_key and info.get('id'):
+                archive_key = build_archive_key(info['id'], quality, audio_choice, start_time, end_time, info.get('extractor_key') or 'generic',
+                                                audio_format)
+                archived = _archived_result(archive_key, url, controller) if skip_existing else None
+                if archived:
+                    return (*archived, None)
             
-            # Get the downloaded filename
-            expected_filename = ydl.prepare_filename(info)
+            # Download from the info already extracted instead of extracting the video a second time
+            ydl.process_ie_result(info, download=True)
             
-            # Perform segment trimming if required
-            if segment_info:
-                print("DEBUG: Starting post-download segment trimming...")
-                try:
-                    start_sec = segment_info.get('start_seconds')
-                    end_sec = segment_info.get('end_seconds')
-                    print(f"DEBUG: Calling trim_video_segment with start_sec={start_sec}, end_sec={end_sec}")
-                    trimmed_filename = trim_video_segment(expected_filename, start_sec, end_sec)
-                    if trimmed_filename:
-                        # Delete the original full video file
-                        if os.path.exists(expected_filename):
-                            os.remove(expected_filename)
-                            print(f"DEBUG: Deleted original file: {expected_filename}")
-                        expected_filename = trimmed_filename
-                        print(f"DEBUG: Segment trimming completed: {trimmed_filename}")
-                    else:
-                        print("DEBUG: Segment trimming failed, keeping original file")
-                except Exception as trim_error:
-                    print(f"DEBUG: Exception during trimming: {trim_error}")
-                    print("DEBUG: Keeping original file due to trimming error")
-            
-            # Mark as completed if we have a controller
-            if controller:
-                controller.progress_data['status'] = 'completed'
-                controller.progress_data['progress'] = 100
-                controller.is_finished = True
-            
-            # Save to history only if completed successfully
-            save_download_history(info, f"{quality} ({audio_choice})", expected_filename)
-            
-            return True, expected_filename
+            throttle.record_success()
+            # Get the downloaded filename
+            return True, ydl.prepare_filename(info), {'info': info, 'archive_key': archive_key}
         except Exception as e:
             error_msg = str(e)
+            if classify_download_error(error_msg) == 'throttled':
+                throttle.record_throttle()
             if "stopped by user" in error_msg:
-                return False, "Download stopped by user"
+                return False, "Download stopped by user", None
             elif "ffmpeg" in error_msg.lower() or "postprocessor" in error_msg.lower():
-                return False, f"FFmpeg error (time range may be invalid): {e}"
+                return False, f"FFmpeg error (time range may be invalid): {e}", None
             elif "fragment" in error_msg.lower():
-                return False, f"YouTube streaming error (try different quality): {e}"
+                return False, f"YouTube streaming error (try different quality): {e}", None
             else:
                 # Don't call st.error from background thread - just return the error
-                return False, f"Error downloading video: {e}"
+                return False, f"Error downloading video: {e}", None
 
-def download_playlist(playlist_url, quality, audio_choice="with_audio", max_downloads=None, progress_container=None, start_time=None, end_time=None):
-    """Download videos from a playlist with enhanced progress tracking"""
-    playlist_info = get_playlist_info(playlist_url)
+def _finish_video_download(expected_filename, info, archive_key, quality, audio_choice, controller,
+                           segment_info, audio_extraction, hasher):
+    """Post-processing stage: trim, extract audio, store and record a downloaded file"""
+    try:
+        # Perform segment trimming if required
+        if segment_info:
+            print("DEBUG: Starting post-download segment trimming...")
+            try:
+                start_sec = segment_info.get('start_seconds')
+                end_sec = segment_info.get('end_seconds')
+                print(f"DEBUG: Calling trim_video_segment with start_sec={start_sec}, end_sec={end_sec}")
+                trimmed_filename = trim_video_segment(expected_filename, start_sec, end_sec)
+                if trimmed_filename:
+                    # Delete the original full video file
+                    if os.path.exists(expected_filename):
+                        os.remove(expected_filename)
+                        print(f"DEBUG: Deleted original file: {expected_filename}")
+                    expected_filename = trimmed_filename
+                    print(f"DEBUG: Segment trimming completed: {trimmed_filename}")
+                else:
+                    print("DEBUG: Segment trimming failed, keeping original file")
+            except Exception as trim_error:
+                print(f"DEBUG: Exception during trimming: {trim_error}")
+                print("DEBUG: Keeping original file due to trimming error")
+        
+        # Trimming first leaves less to transcode
+        if audio_extraction:
+            audio_filename = extract_audio(expected_filename, audio_extraction['codec'], audio_extraction['bitrate'],
+                                           info.get('acodec'), info.get('abr'))
+            if not audio_filename:
+                return False, "FFmpeg error: audio extraction failed"
+            if audio_filename != expected_filename and os.path.exists(expected_filename):
+                os.remove(expected_filename)
+            expected_filename = audio_filename
+        
+        # Link the file into the content-addressed blob store
+        if hasher and os.path.exists(expected_filename):
+            store_in_blob_store(expected_filename, hasher.hexdigest_for(expected_filename))
+        
+        # Mark as completed if we have a controller
+        if controller:
+            controller.progress_data['status'] = 'completed'
+            controller.progress_data['progress'] = 100
+            controller.is_finished = True
+        
+        # Save to history only if completed successfully
+        save_download_history(info, f"{quality} ({audio_choice})", expected_filename)
+        if archive_key:
+            add_to_download_archive(archive_key, info, expected_filename)
+        
+        return True, expected_filename
+    except Exception as e:
+        return False, f"FFmpeg error: {e}"
+
+def download_playlist(playlist_url, quality, audio_choice="with_audio", max_downloads=None, progress_container=None, start_time=None, end_time=None, skip_existing=False, dedupe=False, workers=1, output_path="downloads", audio_format=None, preflight=False):
+    """Download videos from a playlist with enhanced progress tracking
+    
+    Up to `workers` videos download at once; a worker hands a finished file
+    to the post-processing pool and starts the next video. Results stay in
+    playlist order, and with more than one worker file names start with the
+    playlist index so they sort in playlist order whatever order they finish in.
+    With preflight=True the listed videos are sized first and nothing is
+    downloaded if they won't fit on disk.
+    """
+    # Downloading resolves each video anyway, so the listing only needs IDs and titles
+    playlist_info = get_playlist_info(playlist_url, flat=True, max_entries=max_downloads)
     if not playlist_info or 'entries' not in playlist_info:
         return False, "Invalid playlist URL"
     
-    entries = playlist_info['entries']
-    if max_downloads:
-        entries = entries[:max_downloads]
-    
-    results = []
-    start_time = time.time()
+    entries = [entry for entry in playlist_info['entries'] if entry]
+    if preflight and entries:
+        plan = plan_preflight([{'url': entry.get('url') or playlist_entry_url(entry), 'title': entry.get('title'),
+                                'duration': entry.get('duration')} for entry in entries],
+                              quality, audio_choice, output_path)
+        if plan['status'] == 'block':
+            return False, f"Not enough disk space for this playlist: {describe_preflight(plan)}"
+        if progress_container:
+            with progress_container:
+                if plan['status'] == 'warn':
+                    st.warning(f"⚠️ {preflight_warning(plan)}")
+                else:
+                    st.caption(f"💾 {describe_preflight(plan)}")
+    workers = max(1, min(workers or 1, len(entries) or 1))
+    index_width = len(str(len(entries)))
+    results = [None] * len(entries)
+    trackers = {}
+    playlist_start = time.time()
     
     # Create progress elements if container is provided
     if progress_container:
@@ -572,74 +1934,64 @@ def download_playlist(playlist_url, quality, audio_choice="with_audio", max_down
             playlist_status = st.empty()
             playlist_stats = st.empty()
             
-            st.markdown("#### 🎬 Current Video")
-            current_video_info = st.empty()
-            video_progress = st.progress(0)
-            video_status = st.empty()
-            video_speed = st.empty()
-            video_eta = st.empty()
-    
-    for i, entry in enumerate(entries):
-        if entry:
-            video_url = f"https://www.youtube.com/watch?v={entry['id']}"
-            video_title = entry.get('title', 'Unknown')
+            st.markdown("#### 🎬 Current Videos" if workers > 1 else "#### 🎬 Current Video")
+            current_videos = st.empty()
+    
+    def download_entry(index, entry):
+        # Progress tracking for individual video - no direct UI calls from worker threads
+        tracker = PlaylistVideoProgress()
+        trackers[index] = tracker
+        prefix = f"{index + 1:0{index_width}d} - " if workers > 1 else ""
+        try:
+            return download_video(entry.get('url') or playlist_entry_url(entry), quality, audio_choice, output_path, tracker.update_progress,
+                                  None, start_time, end_time, skip_existing, dedupe, filename_prefix=prefix, defer_postprocessing=True,
+                                  audio_format=audio_format)
+        finally:
+            trackers.pop(index, None)
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="playlist") as executor:
+        futures = {executor.submit(download_entry, i, entry): i for i, entry in enumerate(entries)}
+        pending = set(futures)
+        while pending:
+            done, pending = concurrent.futures.wait(pending, timeout=0.5 if progress_container else None,
+                                                    return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                index = futures[future]
+                try:
+                    success, filename = future.result()
+                except Exception as e:
+                    success, filename = False, f"Error downloading video: {e}"
+                if isinstance(filename, concurrent.futures.Future):
+                    # Downloaded, now trimming or transcoding; collect the result when the pool is done
+                    futures[filename] = index
+                    pending.add(filename)
+                    continue
+                results[index] = {'success': success, 'title': entries[index].get('title', 'Unknown'), 'filename': filename, 'index': index + 1}
             
             if progress_container:
-                # Update playlist progress
-                playlist_progress.progress(i / len(entries))
-                playlist_status.markdown(f"**Processing video {i+1}/{len(entries)}**")
-                
-                # Show playlist statistics
-                if i > 0:
-                    elapsed_time = time.time() - start_time
-                    avg_time_per_video = elapsed_time / i
-                    estimated_total_time = avg_time_per_video * len(entries)
-                    remaining_time = estimated_total_time - elapsed_time
-                    remaining_minutes = int(remaining_time // 60)
-                    remaining_seconds = int(remaining_time % 60)
-                    successful_so_far = sum(1 for r in results if r['success'])
-                    playlist_stats.markdown(f"**⏱️ ETA: {remaining_minutes}m {remaining_seconds}s | ✅ Success: {successful_so_far}/{i} | ❌ Failed: {i - successful_so_far}**")
-                
-                # Show current video info
-                current_video_info.markdown(f"**🎬 {video_title}**")
-                current_video_info.caption(f"URL: {video_url}")
-                
-                # Reset video progress elements
-                video_progress.progress(0)
-                video_status.empty()
-                video_speed.empty()
-                video_eta.empty()
+                finished = sum(1 for result in results if result)
+                successful_so_far = sum(1 for result in results if result and result['success'])
+                playlist_progress.progress(finished / len(entries))
+                playlist_status.markdown(f"**Processed {finished}/{len(entries)} videos**")
+                if finished:
+                    elapsed_time = time.time() - playlist_start
+                    remaining_time = elapsed_time / finished * (len(entries) - finished)
+                    playlist_stats.markdown(f"**⏱️ ETA: {int(remaining_time // 60)}m {int(remaining_time % 60)}s | ✅ Success: {successful_so_far}/{finished} | ❌ Failed: {finished - successful_so_far}**")
                 
-                # Progress tracking for individual video - no direct UI calls
-                video_progress_tracker = PlaylistVideoProgress()
-                
-                def update_video_progress(d):
-                    # Only update the tracker, no direct UI calls
-                    video_progress_tracker.update_progress(d)
-                
-                success, filename = download_video(video_url, quality, audio_choice, "downloads", update_video_progress, None, start_time, end_time)
-                
-                # Update UI with final progress after download completes
-                if success:
-                    video_progress.progress(100)
-                    video_status.markdown("**✅ Video completed!**")
-                else:
-                    video_status.markdown("**❌ Video failed!**")
-                video_speed.empty()
-                video_eta.empty()
-            else:
-                # Fallback without progress display
-                success, filename = download_video(video_url, quality, audio_choice, "downloads", None, None, start_time, end_time)
-            
-            results.append({'success': success, 'title': video_title, 'filename': filename})
+                active = sorted(trackers.items())
+                current_videos.markdown("\n\n".join(
+                    f"**🎬 {index + 1}. {entries[index].get('title', 'Unknown')}**  \n{tracker.status or '🔄 Starting download...'} {tracker.speed} {tracker.eta}"
+                    for index, tracker in active
+                ))
     
     # Final progress update
     if progress_container:
         playlist_progress.progress(1.0)
         playlist_status.markdown("**✅ PLAYLIST DOWNLOAD COMPLETED - PROCESS STOPPED**")
+        current_videos.empty()
         
         # Final statistics
-        total_time = time.time() - start_time
+        total_time = time.time() - playlist_start
         total_minutes = int(total_time // 60)
         total_seconds = int(total_time % 60)
         successful_count = sum(1 for r in results if r['success'])
@@ -647,6 +1999,673 @@ def download_playlist(playlist_url, quality, audio_choice="with_audio", max_down
     
     return True, results
 
+FINISHED_ITEM_STATUSES = ('completed', 'failed', 'skipped', 'stopped')
+
+class BackgroundDownloadManager:
+    """Runs Playlist Manager downloads in background threads that outlive reruns and page reloads.
+    
+    Each batch has its own worker pool. Every video gets a DownloadController
+    for pause/stop and a PlaylistVideoProgress for live progress. The manager
+    is process-wide, so a reloaded page finds its batches again.
+    """
+    def __init__(self, max_batches=20):
+        self.lock = threading.Lock()
+        self.batches = {}  # batch_id -> batch, oldest first
+        self.max_batches = max_batches
+    
+    def submit(self, title, videos, quality, audio_choice="with_audio", output_path="downloads", skip_existing=False, dedupe=False, workers=2,
+               audio_format=None):
+        """Start downloading videos (dicts with url, title, index, start_time, end_time); returns the batch ID"""
+        batch_id = f"batch_{uuid.uuid4().hex[:8]}"
+        batch = {
+            'id': batch_id,
+            'title': title,
+            'created_time': datetime.now().isoformat(),
+            'paused': False,
+            'options': {'quality': quality, 'audio_choice': audio_choice, 'output_path': output_path,
+                        'skip_existing': skip_existing, 'dedupe': dedupe, 'audio_format': audio_format},
+            'items': [dict(video, status='queued', result=None, controller=DownloadController(), progress=PlaylistVideoProgress())
+                      for video in videos],
+        }
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=batch_id)
+        for item in batch['items']:
+            executor.submit(self._run_item, batch, item)
+        # Workers exit once the queue is drained; nothing waits on them
+        executor.shutdown(wait=False)
+        
+        with self.lock:
+            self.batches[batch_id] = batch
+            finished = [old_id for old_id, old in self.batches.items() if not self.is_active(old)]
+            for old_id in finished[:max(0, len(self.batches) - self.max_batches)]:
+                del self.batches[old_id]
+        return batch_id
+    
+    def _run_item(self, batch, item):
+        while batch['paused'] and item['status'] == 'queued':
+            time.sleep(0.2)
+        with self.lock:
+            # Skipped or stopped before it started
+            if item['status'] != 'queued':
+                return
+            item['status'] = 'downloading'
+        
+        options = batch['options']
+        try:
+            success, result = download_video(item['url'], options['quality'], options['audio_choice'], options['output_path'],
+                                             item['progress'].update_progress, item['controller'], item.get('start_time'),
+                                             item.get('end_time'), options['skip_existing'], options['dedupe'],
+                                             defer_postprocessing=True, audio_format=options.get('audio_format'))
+        except Exception as e:
+            success, result = False, f"Error downloading video: {e}"
+        
+        if isinstance(result, concurrent.futures.Future):
+            # The worker moves on to the next video while this one is trimmed or transcoded
+            with self.lock:
+                item['status'] = 'processing'
+            result.add_done_callback(lambda future: self._finish_item(item, *future.result()))
+            return
+        self._finish_item(item, success, result)
+    
+    def _finish_item(self, item, success, result):
+        with self.lock:
+            # A file finished before Stop or Skip was pressed still counts as downloaded
+            if success and isinstance(result, str) and os.path.exists(result):
+                item['status'] = 'completed'
+            elif item['controller'].should_stop:
+                item['status'] = 'skipped' if item.get('skip_requested') else 'stopped'
+            else:
+                item['status'] = 'completed' if success else 'failed'
+            item['result'] = result
+    
+    def get_batches(self):
+        with self.lock:
+            return list(self.batches.values())
+    
+    def get_batch(self, batch_id):
+        with self.lock:
+            return self.batches.get(batch_id)
+    
+    @staticmethod
+    def is_active(batch):
+        return any(item['status'] not in FINISHED_ITEM_STATUSES for item in batch['items'])
+    
+    def pause(self, batch_id):
+        batch = self.get_batch(batch_id)
+        if batch:
+            batch['paused'] = True
+            for item in batch['items']:
+                item['controller'].pause()
+    
+    def resume(self, batch_id):
+        batch = self.get_batch(batch_id)
+        if batch:
+            batch['paused'] = False
+            for item in batch['items']:
+                item['controller'].resume()
+    
+    def skip(self, batch_id, position):
+        """Skip one video: drop it if still queued, or stop it if downloading"""
+        batch = self.get_batch(batch_id)
+        if not batch or not 0 <= position < len(batch['items']):
+            return
+        item = batch['items'][position]
+        with self.lock:
+            item['skip_requested'] = True
+            if item['status'] == 'queued':
+                item['status'] = 'skipped'
+            elif item['status'] == 'downloading':
+                item['controller'].should_stop = True
+    
+    def stop(self, batch_id):
+        """Stop the running videos and drop the queued ones"""
+        batch = self.get_batch(batch_id)
+        if not batch:
+            return
+        with self.lock:
+            batch['paused'] = False
+            for item in batch['items']:
+                if item['status'] == 'queued':
+                    item['status'] = 'stopped'
+                elif item['status'] == 'downloading':
+                    item['controller'].should_stop = True
+                    item['controller'].resume()
+    
+    def remove(self, batch_id):
+        """Forget a finished batch"""
+        with self.lock:
+            batch = self.batches.get(batch_id)
+            if batch and not self.is_active(batch):
+                del self.batches[batch_id]
+
+@st.cache_resource
+def get_background_download_manager():
+    """Shared manager for background Playlist Manager downloads, kept across reruns and sessions"""
+    return BackgroundDownloadManager()
+
+# File inventory index
+MEDIA_SORT_FIELDS = {'duration': 'duration', 'resolution': 'pixels'}  # FileInventory sort key -> media field
+
+class FileInventory:
+    """Persistent index of the downloads tree.
+    
+    Change notifications from watchdog mark directories dirty when available,
+    otherwise directory mtimes are compared, so a refresh only rescans
+    directories that actually changed. Totals are maintained incrementally.
+    Probed durations and resolutions are kept alongside, so the media sorts
+    run on the index instead of probing every file.
+    """
+    def __init__(self, base_path="downloads", index_file="file_inventory.json", use_watcher=True):
+        self.base_path = os.path.abspath(base_path)
+        self.index_file = index_file
+        self.lock = threading.RLock()
+        self.files = {}       # rel_path -> {'size', 'mtime', 'inode'}
+        self.dir_files = {}   # rel_dir -> set of file names
+        self.dir_mtimes = {}  # rel_dir -> mtime_ns
+        self.inode_refs = {}  # inode -> link count inside the tree
+        self.media = {}       # rel_path -> {'duration', 'pixels'} from ffprobe, dropped when the file changes
+        self.media_dirty = False
+        self.total_size = 0
+        self.version = 0
+        self.dirty_dirs = set()
+        self.observer = None
+        self.validated = False
+        self._sorted_cache = {}
+        self._load()
+        if use_watcher:
+            self._start_watcher()
+    
+    @property
+    def file_count(self):
+        return len(self.files)
+    
+    def _load(self):
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except:
+            return
+        if data.get('base_path') != self.base_path:
+            return
+        for rel_path, entry in data.get('files', {}).items():
+            self._add_file(rel_path, entry)
+        self.dir_files = {rel_dir: set(names) for rel_dir, names in data.get('dir_files', {}).items()}
+        self.dir_mtimes = data.get('dir_mtimes', {})
+        self.media = {rel_path: media for rel_path, media in data.get('media', {}).items() if rel_path in self.files}
+    
+    def save(self):
+        """Write the index to disk"""
+        with self.lock:
+            data = {
+                'base_path': self.base_path,
+                'files': self.files,
+                'dir_files': {rel_dir: sorted(names) for rel_dir, names in self.dir_files.items()},
+                'dir_mtimes': self.dir_mtimes,
+                'media': self.media
+            }
+            self.media_dirty = False
+            with open(self.index_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+    
+    def _start_watcher(self):
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            return
+        if not os.path.isdir(self.base_path):
+            return
+        
+        inventory = self
+        
+        class InventoryEventHandler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                paths = [getattr(event, 'src_path', None), getattr(event, 'dest_path', None)]
+                with inventory.lock:
+                    for path in paths:
+                        if not path:
+                            continue
+                        inventory.dirty_dirs.add(os.path.dirname(path))
+                        if event.is_directory:
+                            inventory.dirty_dirs.add(path)
+        
+        try:
+            self.observer = Observer()
+            self.observer.schedule(InventoryEventHandler(), self.base_path, recursive=True)
+            self.observer.daemon = True
+            self.observer.start()
+        except Exception as e:
+            print(f"DEBUG: File watcher unavailable, using directory mtimes: {e}")
+            self.observer = None
+    
+    def stop(self):
+        """Stop the file watcher"""
+        if self.observer:
+            self.observer.stop()
+            self.observer = None
+    
+    def _rel(self, path):
+        rel_path = os.path.relpath(path, self.base_path)
+        return '' if rel_path == '.' else rel_path
+    
+    def _abs(self, rel_path):
+        return os.path.join(self.base_path, rel_path) if rel_path else self.base_path
+    
+    def _add_file(self, rel_path, entry):
+        self.files[rel_path] = entry
+        inode = entry.get('inode')
+        if inode is None or self.inode_refs.get(inode, 0) == 0:
+            self.total_size += entry['size']
+        if inode is not None:
+            self.inode_refs[inode] = self.inode_refs.get(inode, 0) + 1
+    
+    def _remove_file(self, rel_path):
+        self.media.pop(rel_path, None)
+        entry = self.files.pop(rel_path, None)
+        if not entry:
+            return
+        inode = entry.get('inode')
+        if inode is not None:
+            self.inode_refs[inode] -= 1
+            if self.inode_refs[inode] > 0:
+                return
+            del self.inode_refs[inode]
+        self.total_size -= entry['size']
+    
+    def _drop_dir(self, rel_dir):
+        for name in self.dir_files.pop(rel_dir, set()):
+            self._remove_file(os.path.join(rel_dir, name) if rel_dir else name)
+        self.dir_mtimes.pop(rel_dir, None)
+        prefix = rel_dir + os.sep
+        for child in [d for d in self.dir_mtimes if d.startswith(prefix)]:
+            self._drop_dir(child)
+    
+    def _scan_dir(self, rel_dir):
+        """Rescan one directory, recursing only into directories not yet indexed"""
+        dir_path = self._abs(rel_dir)
+        try:
+            dir_mtime = os.stat(dir_path).st_mtime_ns
+            entries = list(os.scandir(dir_path))
+        except OSError:
+            self._drop_dir(rel_dir)
+            return True
+        
+        changed = False
+        names = set()
+        subdirs = set()
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    # The blob store is internal, its files are reached through hardlinks
+                    if not (rel_dir == '' and entry.name == '.blobs'):
+                        subdirs.add(entry.name)
+                    continue
+                file_stats = entry.stat()
+            except OSError:
+                continue
+            names.add(entry.name)
+            rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+            new_entry = {'size': file_stats.st_size, 'mtime': file_stats.st_mtime, 'inode': f"{file_stats.st_dev}:{file_stats.st_ino}"}
+            if self.files.get(rel_path) != new_entry:
+                self._remove_file(rel_path)
+                self._add_file(rel_path, new_entry)
+                changed = True
+        
+        for name in self.dir_files.get(rel_dir, set()) - names:
+            self._remove_file(os.path.join(rel_dir, name) if rel_dir else name)
+            changed = True
+        self.dir_files[rel_dir] = names
+        self.dir_mtimes[rel_dir] = dir_mtime
+        
+        known_subdirs = {d for d in self.dir_mtimes if d and os.path.dirname(d) == rel_dir}
+        for name in subdirs:
+            child = os.path.join(rel_dir, name) if rel_dir else name
+            if child not in known_subdirs:
+                self._scan_dir(child)
+                changed = True
+        for child in known_subdirs - {os.path.join(rel_dir, name) if rel_dir else name for name in subdirs}:
+            self._drop_dir(child)
+            changed = True
+        return changed
+    
+    def refresh(self):
+        """Bring the index up to date, return True if anything changed"""
+        with self.lock:
+            if not os.path.isdir(self.base_path):
+                changed = bool(self.files)
+                self.files, self.dir_files, self.dir_mtimes, self.inode_refs = {}, {}, {}, {}
+                self.total_size = 0
+            else:
+                if self.observer and self.validated:
+                    # Only directories reported by the watcher need a rescan
+                    dirty_dirs, self.dirty_dirs = self.dirty_dirs, set()
+                    dirs_to_scan = []
+                    for dir_path in sorted(dirty_dirs):
+                        rel_dir = self._rel(dir_path)
+                        if not rel_dir.startswith('..') and rel_dir.split(os.sep)[0] != '.blobs':
+                            dirs_to_scan.append(rel_dir)
+                elif self.dir_mtimes:
+                    # Adding, removing or renaming a file bumps its directory mtime
+                    self.dirty_dirs = set()
+                    dirs_to_scan = []
+                    for rel_dir, mtime in list(self.dir_mtimes.items()):
+                        try:
+                            if os.stat(self._abs(rel_dir)).st_mtime_ns != mtime:
+                                dirs_to_scan.append(rel_dir)
+                        except OSError:
+                            dirs_to_scan.append(rel_dir)
+                else:
+                    self.dirty_dirs = set()
+                    dirs_to_scan = ['']
+                self.validated = True
+                
+                changed = False
+                for rel_dir in dirs_to_scan:
+                    if not self.observer and rel_dir and rel_dir not in self.dir_mtimes:
+                        continue  # Dropped together with a parent earlier in this pass
+                    changed = self._scan_dir(rel_dir) or changed
+            
+            if changed:
+                self.version += 1
+                self._sorted_cache = {}
+            if changed or self.media_dirty:
+                try:
+                    self.save()
+                except OSError as e:
+                    print(f"DEBUG: Could not save file inventory: {e}")
+            return changed
+    
+    def set_media(self, rel_path, media_info):
+        """Record a file's probe result for the 'duration' and 'resolution' sorts"""
+        if not media_info:
+            return
+        media = {'duration': media_info.get('duration'),
+                 'pixels': (media_info.get('width') or 0) * (media_info.get('height') or 0) or None}
+        with self.lock:
+            if rel_path not in self.files or self.media.get(rel_path) == media:
+                return
+            self.media[rel_path] = media
+            self.media_dirty = True
+            for key in [key for key in self._sorted_cache if isinstance(key, tuple)
+                        and MEDIA_SORT_FIELDS.get(key[1] if key[0] == 'query' else key[0])]:
+                del self._sorted_cache[key]
+    
+    def media_count(self):
+        """Number of indexed files with a recorded probe"""
+        with self.lock:
+            return len(self.media)
+    
+    def unprobed_files(self):
+        """Return [(rel_path, entry)] of indexed files without a recorded probe"""
+        with self.lock:
+            return [(rel_path, entry) for rel_path, entry in self.files.items() if rel_path not in self.media]
+    
+    def sorted_files(self, sort_key="modified", reverse=True):
+        """Return [(rel_path, entry)] sorted by 'modified', 'size', 'name', 'duration' or 'resolution'
+        
+        The listing is cached until the tree changes. For the media sorts files
+        without a recorded probe come last in either direction.
+        """
+        with self.lock:
+            cache_key = (sort_key, reverse)
+            if cache_key not in self._sorted_cache:
+                if sort_key in MEDIA_SORT_FIELDS:
+                    field = MEDIA_SORT_FIELDS[sort_key]
+                    known, unknown = [], []
+                    for item in self.files.items():
+                        (known if (self.media.get(item[0]) or {}).get(field) else unknown).append(item)
+                    known.sort(key=lambda item: self.media[item[0]][field], reverse=reverse)
+                    unknown.sort(key=lambda item: item[1]['mtime'], reverse=True)
+                    self._sorted_cache[cache_key] = known + unknown
+                    return self._sorted_cache[cache_key]
+                if sort_key == "size":
+                    key_func = lambda item: item[1]['size']
+                elif sort_key == "name":
+                    key_func = lambda item: os.path.basename(item[0]).lower()
+                else:
+                    key_func = lambda item: item[1]['mtime']
+                self._sorted_cache[cache_key] = sorted(self.files.items(), key=key_func, reverse=reverse)
+            return self._sorted_cache[cache_key]
+    
+    def facets(self):
+        """Return (extensions, subfolders) present in the tree, cached until it changes"""
+        with self.lock:
+            if 'facets' not in self._sorted_cache:
+                extensions = sorted({os.path.splitext(rel_path)[1].lower() for rel_path in self.files} - {''})
+                subfolders = sorted(rel_dir for rel_dir, names in self.dir_files.items() if names)
+                self._sorted_cache['facets'] = (extensions, subfolders)
+            return self._sorted_cache['facets']
+    
+    def query(self, sort_key="modified", reverse=True, name_filter="", extensions=None, subfolder=None,
+              min_size=None, max_size=None, modified_from=None, modified_to=None, page=0, page_size=50):
+        """Return (page_items, match_count) for a filtered, sorted page of the listing.
+        
+        Sizes are in bytes and modified_from/modified_to are timestamps. Without
+        filters the page is a slice of the cached sorted listing.
+        """
+        sorted_items = self.sorted_files(sort_key, reverse)
+        name_filter = (name_filter or "").lower()
+        extensions = set(extensions or [])
+        
+        if not (name_filter or extensions or subfolder is not None or min_size is not None or max_size is not None
+                or modified_from is not None or modified_to is not None):
+            start = page * page_size
+            return sorted_items[start:start + page_size], len(sorted_items)
+        
+        cache_key = ('query', sort_key, reverse, name_filter, frozenset(extensions), subfolder, min_size, max_size, modified_from, modified_to)
+        with self.lock:
+            filtered_items = self._sorted_cache.get(cache_key)
+        if filtered_items is not None:
+            start = page * page_size
+            return filtered_items[start:start + page_size], len(filtered_items)
+        
+        def matches(rel_path, entry):
+            if name_filter and name_filter not in os.path.basename(rel_path).lower():
+                return False
+            if extensions and os.path.splitext(rel_path)[1].lower() not in extensions:
+                return False
+            if subfolder is not None and os.path.dirname(rel_path) != subfolder:
+                return False
+            if min_size is not None and entry['size'] < min_size:
+                return False
+            if max_size is not None and entry['size'] > max_size:
+                return False
+            if modified_from is not None and entry['mtime'] < modified_from:
+                return False
+            if modified_to is not None and entry['mtime'] > modified_to:
+                return False
+            return True
+        
+        filtered_items = [(rel_path, entry) for rel_path, entry in sorted_items if matches(rel_path, entry)]
+        with self.lock:
+            # Keep only the latest filtered listing so paging does not filter again, unless a probe re-sorted meanwhile
+            if self._sorted_cache.get((sort_key, reverse)) is sorted_items:
+                for key in [key for key in self._sorted_cache if isinstance(key, tuple) and key[0] == 'query']:
+                    del self._sorted_cache[key]
+                self._sorted_cache[cache_key] = filtered_items
+        start = page * page_size
+        return filtered_items[start:start + page_size], len(filtered_items)
+
+@st.cache_resource
+def get_file_inventory(base_path):
+    """Shared file inventory for the downloads folder, kept across reruns and sessions"""
+    return FileInventory(base_path)
+
+# Media probe cache
+class MediaProbeCache:
+    """Background ffprobe results cached by (path, size, mtime).
+    
+    Lookups never block: a miss schedules a probe on a bounded worker pool
+    and returns None until the result arrives. Waiting probes run lowest
+    priority value first, so files on screen go ahead of a background
+    backfill. A changed size or mtime is a different key, so modified files
+    are re-probed automatically.
+    """
+    def __init__(self, cache_file="media_probe_cache.json", max_workers=2):
+        self.cache_file = cache_file
+        self.lock = threading.Lock()
+        self.entries = {}   # key -> probe result
+        self.path_keys = {}  # path -> current key
+        self.pending = {}   # key -> (priority, callbacks) of probes not run yet
+        self.queue = []     # heap of (priority, sequence, path, key); raised priorities leave stale entries
+        self.sequence = 0
+        self.available = True
+        self.dirty = False
+        self.last_save = 0
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="media-probe")
+        self._load()
+    
+    @staticmethod
+    def make_key(path, size, mtime):
+        return f"{path}|{size}|{mtime}"
+    
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except:
+            return
+        for key, result in data.items():
+            self.entries[key] = result
+            self.path_keys[key.rsplit('|', 2)[0]] = key
+    
+    def save(self):
+        """Write the cache to disk"""
+        with self.lock:
+            data = dict(self.entries)
+            self.dirty = False
+            self.last_save = time.time()
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+    
+    def get(self, path, size, mtime, priority=0, callback=None):
+        """Return the cached probe for a file, scheduling a background probe on a miss
+        
+        callback(result) is called from the worker once a scheduled probe is
+        done; a probe that is already waiting keeps the callback it has.
+        """
+        key = self.make_key(path, size, mtime)
+        with self.lock:
+            if key in self.entries:
+                return self.entries[key]
+            if not self.available:
+                return None
+            current = self.pending.get(key)
+            if current:
+                if callback and not current[1]:
+                    current[1].append(callback)
+                if current[0] <= priority:
+                    return None
+            self.pending[key] = (priority, current[1] if current else [callback] if callback else [])
+            self.sequence += 1
+            heapq.heappush(self.queue, (priority, self.sequence, path, key))
+        self.executor.submit(self._probe_next)
+        return None
+    
+    def pending_count(self):
+        with self.lock:
+            return len(self.pending)
+    
+    def _probe_next(self):
+        """Probe the most urgent waiting file; one call is submitted per queue entry"""
+        with self.lock:
+            while self.queue:
+                priority, _, path, key = heapq.heappop(self.queue)
+                if key in self.pending and self.pending[key][0] == priority:
+                    # Running now, so a later raise in priority doesn't queue it again
+                    self.pending[key] = (float('-inf'), self.pending[key][1])
+                    break
+            else:
+                return
+        self._probe(path, key)
+    
+    def _probe(self, path, key):
+        try:
+            result = probe_media_file(path)
+        except FileNotFoundError:
+            # ffprobe is not installed, stop scheduling probes
+            with self.lock:
+                self.available = False
+                self.pending.clear()
+                self.queue = []
+            return
+        
+        with self.lock:
+            _, callbacks = self.pending.pop(key, (None, []))
+            old_key = self.path_keys.get(path)
+            if old_key and old_key != key:
+                self.entries.pop(old_key, None)
+            self.entries[key] = result
+            self.path_keys[path] = key
+            self.dirty = True
+            should_save = not self.pending or time.time() - self.last_save > 5
+        for callback in callbacks:
+            callback(result)
+        if should_save:
+            try:
+                self.save()
+            except OSError as e:
+                print(f"DEBUG: Could not save media probe cache: {e}")
+
+def probe_media_file(file_path):
+    """Run ffprobe on a file and return duration, resolution and codecs"""
+    cmd = ['ffprobe', '-v', 'error', '-print_format', 'json', '-show_format', '-show_streams', file_path]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    except subprocess.TimeoutExpired:
+        return {'error': 'ffprobe timed out'}
+    if result.returncode != 0:
+        return {'error': result.stderr.strip()[:200] or f"ffprobe exited with {result.returncode}"}
+    
+    try:
+        probe = json.loads(result.stdout or '{}')
+    except ValueError:
+        return {'error': 'Invalid ffprobe output'}
+    
+    media_info = {'duration': None, 'width': None, 'height': None, 'video_codec': None, 'audio_codec': None, 'bit_rate': None}
+    format_info = probe.get('format', {})
+    try:
+        media_info['duration'] = float(format_info['duration'])
+    except (KeyError, TypeError, ValueError):
+        pass
+    try:
+        media_info['bit_rate'] = int(format_info['bit_rate'])
+    except (KeyError, TypeError, ValueError):
+        pass
+    
+    for stream in probe.get('streams', []):
+        if stream.get('codec_type') == 'video' and not media_info['video_codec']:
+            media_info['video_codec'] = stream.get('codec_name')
+            media_info['width'] = stream.get('width')
+            media_info['height'] = stream.get('height')
+        elif stream.get('codec_type') == 'audio' and not media_info['audio_codec']:
+            media_info['audio_codec'] = stream.get('codec_name')
+    return media_info
+
+def format_media_info(media_info):
+    """Return (duration, resolution, codecs) display strings for a probe result"""
+    if media_info is None:
+        return "⏳", "⏳", "⏳"
+    if 'error' in media_info:
+        return "—", "—", "—"
+    
+    duration = "—"
+    if media_info.get('duration'):
+        minutes, seconds = divmod(int(media_info['duration']), 60)
+        hours, minutes = divmod(minutes, 60)
+        duration = f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+    resolution = f"{media_info['width']}x{media_info['height']}" if media_info.get('height') else "—"
+    codecs = " + ".join(codec for codec in [media_info.get('video_codec'), media_info.get('audio_codec')] if codec) or "—"
+    return duration, resolution, codecs
+
+@st.cache_resource
+def get_media_probe_cache():
+    """Shared media probe cache, kept across reruns and sessions"""
+    return MediaProbeCache()
+
 # Set up the Streamlit app
 st.set_page_config(page_title="Advanced YouTube Downloader", page_icon="🎬", layout="wide")
 
@@ -1256,14 +3275,26 @@ with st.sidebar:
     st.markdown('<div class="settings-section">', unsafe_allow_html=True)
     audio_choice = st.radio("Select audio option:", list(audio_options.keys()), 
                            format_func=lambda x: audio_options[x])
+    audio_codec = st.selectbox("🎧 Audio Only format:", list(AUDIO_FORMATS.keys()), index=list(AUDIO_FORMATS).index('mp3'),
+                               format_func=lambda x: AUDIO_FORMATS[x], disabled=audio_choice != "audio_only",
+                               help="Original keeps the downloaded opus or m4a stream and only changes the container. The others re-encode after the download, several files at once")
+    audio_bitrate = st.select_slider("🎚️ Audio bitrate (kbps):", AUDIO_BITRATES, value=DEFAULT_AUDIO_FORMAT['bitrate'],
+                                     disabled=audio_choice != "audio_only" or audio_codec == 'original')
+    audio_format = {'codec': audio_codec, 'bitrate': audio_bitrate}
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Advanced settings
     st.markdown("#### 🔧 Advanced Settings")
     st.markdown('<div class="settings-section">', unsafe_allow_html=True)
     create_subfolder = st.checkbox("📅 Organize by date", value=True)
+    skip_existing = st.checkbox("⏭️ Skip already downloaded", value=True,
+                                help="Check the download archive before fetching and skip videos already downloaded with the same quality and time range")
+    dedupe = st.checkbox("🔗 Deduplicate identical files", value=False,
+                         help="Store downloads in a content-addressed blob store and hardlink them into date folders, so repeated downloads use no extra disk space")
     max_playlist_downloads = st.number_input("📊 Max playlist downloads (0 = all)", 
                                            min_value=0, max_value=100, value=10)
+    playlist_workers = st.number_input("⚡ Parallel playlist downloads", min_value=1, max_value=8, value=1,
+                                       help="Download this many playlist videos at once. With more than one, file names start with the playlist index")
     st.markdown('</div>', unsafe_allow_html=True)
     
     # YouTube download issues info
@@ -1304,15 +3335,74 @@ with st.sidebar:
     st.markdown("Made with ❤️ using Streamlit")
 
 # Scheduler Functions
+SCHEDULER_FILE = "scheduled_downloads.json"
+LEASE_SECONDS = 60  # A claimed job is taken over by another scheduler if not renewed within this time
+LEASED_STATUSES = ('queued', 'downloading')
+_schedule_lock = threading.RLock()
+_schedule_lock_depth = 0
+
+@contextmanager
+def scheduled_downloads_lock(scheduler_file=SCHEDULER_FILE):
+    """Hold an exclusive lock on the schedule across threads and processes
+    
+    Every read-modify-write of the schedule runs under this lock so claims,
+    heartbeats and progress updates from different scheduler processes never
+    overwrite each other. The lock is re-entrant within a process.
+    """
+    global _schedule_lock_depth
+    with _schedule_lock:
+        if _schedule_lock_depth:
+            _schedule_lock_depth += 1
+            try:
+                yield
+            finally:
+                _schedule_lock_depth -= 1
+            return
+        
+        with open(scheduler_file + ".lock", 'a+') as lock_file:
+            try:
+                import fcntl
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            except ImportError:
+                import msvcrt
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            _schedule_lock_depth = 1
+            try:
+                yield
+            finally:
+                _schedule_lock_depth = 0
+                try:
+                    import fcntl
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                except ImportError:
+                    import msvcrt
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+_schedule_listeners = []
+
+def add_schedule_listener(callback):
+    """Call callback(scheduled_downloads) after every save made by this process"""
+    _schedule_listeners.append(callback)
+
 def save_scheduled_downloads(scheduled_downloads):
     """Save scheduled downloads to file"""
-    scheduler_file = "scheduled_downloads.json"
-    with open(scheduler_file, 'w', encoding='utf-8') as f:
+    # Write to a temporary file and swap it in so readers never see a partial file
+    temp_file = f"{SCHEDULER_FILE}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
         json.dump(scheduled_downloads, f, indent=2, ensure_ascii=False)
+    os.replace(temp_file, SCHEDULER_FILE)
+    
+    for callback in _schedule_listeners:
+        try:
+            callback(scheduled_downloads)
+        except Exception as e:
+            print(f"Schedule listener error: {e}")
 
 def get_scheduled_downloads():
     """Get scheduled downloads"""
-    scheduler_file = "scheduled_downloads.json"
+    scheduler_file = SCHEDULER_FILE
     if os.path.exists(scheduler_file):
         try:
             with open(scheduler_file, 'r', encoding='utf-8') as f:
@@ -1321,26 +3411,660 @@ def get_scheduled_downloads():
             return []
     return []
 
-def update_scheduled_download_status(download_id, status, result=None):
+def update_scheduled_downloads(updates_by_id, statuses=None, owner=None):
+    """Merge field updates into scheduled downloads with a single locked write
+    
+    Fields set to None are removed. With statuses, only downloads currently in
+    one of those statuses are updated; with owner, only downloads whose lease
+    is held by that owner. Returns the IDs that were updated.
+    """
+    updated = set()
+    with scheduled_downloads_lock():
+        scheduled_downloads = get_scheduled_downloads()
+        for download in scheduled_downloads:
+            updates = updates_by_id.get(download.get('id'))
+            if not updates:
+                continue
+            if statuses is not None and download.get('status') not in statuses:
+                continue
+            if owner is not None and download.get('lease_owner') != owner:
+                continue  # Lease was lost to another scheduler, don't overwrite its state
+            for key, value in updates.items():
+                if value is None:
+                    download.pop(key, None)
+                else:
+                    download[key] = value
+            updated.add(download.get('id'))
+        if updated:
+            save_scheduled_downloads(scheduled_downloads)
+    return updated
+
+def update_scheduled_download_status(download_id, status, result=None, owner=None):
     """Update the status of a scheduled download"""
-    scheduled_downloads = get_scheduled_downloads()
-    for download in scheduled_downloads:
-        if download.get('id') == download_id:
-            download['status'] = status
-            download['last_updated'] = datetime.now().isoformat()
-            if result:
-                download['result'] = result
+    updates = {'status': status, 'last_updated': datetime.now().isoformat()}
+    if result:
+        updates['result'] = result
+    if status in ('completed', 'failed'):
+        # Finished jobs release their lease
+        updates.update({'lease_owner': None, 'lease_expires': None, 'queue_position': None})
+    update_scheduled_downloads({download_id: updates}, owner=owner)
+
+def make_scheduler_node_id():
+    """Unique ID for this scheduler process, used as the lease owner"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def is_claimable(download, owner=None, now=None):
+    """Whether a scheduler may claim this download (new, or its lease has expired)"""
+    now = time.time() if now is None else now
+    status = download.get('status')
+    lease_owner = download.get('lease_owner')
+    if status == 'scheduled':
+        return not lease_owner or lease_owner == owner or download.get('lease_expires', 0) < now
+    if status in LEASED_STATUSES:
+        if not lease_owner:
+            return status == 'queued'  # Queued before leases existed
+        return lease_owner != owner and download.get('lease_expires', 0) < now
+    return False
+
+def claim_scheduled_download(download_id, owner, lease_seconds=LEASE_SECONDS, now=None, fields=None):
+    """Atomically claim a due download with a lease
+    
+    Returns the claimed download, or None when it was cancelled, finished or
+    is held by another scheduler whose lease has not expired.
+    """
+    now = time.time() if now is None else now
+    with scheduled_downloads_lock():
+        scheduled_downloads = get_scheduled_downloads()
+        for download in scheduled_downloads:
+            if download.get('id') != download_id:
+                continue
+            if not is_claimable(download, owner, now):
+                return None
+            previous_owner = download.get('lease_owner')
+            if previous_owner and previous_owner != owner:
+                download['lease_takeovers'] = download.get('lease_takeovers', 0) + 1
+                print(f"🔁 Taking over {download_id} from expired lease of {previous_owner}")
+            download.pop('progress', None)
+            download.update(fields or {})
+            download['lease_owner'] = owner
+            download['lease_expires'] = now + lease_seconds
+            save_scheduled_downloads(scheduled_downloads)
+            return download
+    return None
+
+def renew_scheduled_download_leases(download_ids, owner, lease_seconds=LEASE_SECONDS):
+    """Heartbeat: extend the leases this owner still holds, returning their IDs"""
+    if not download_ids:
+        return set()
+    expires = time.time() + lease_seconds
+    return update_scheduled_downloads({download_id: {'lease_expires': expires} for download_id in download_ids},
+                                      statuses=LEASED_STATUSES, owner=owner)
+
+SUBSCRIPTION_CURSOR_SIZE = 50  # Newest IDs remembered on a first sync that skips existing videos
+SUBSCRIPTION_SEEN_LIMIT = 5000  # Cap on remembered video IDs per subscription
+SUBSCRIPTION_CURSOR_MARGIN = 50  # Entries before an oldest-first cursor checked again, in case earlier videos were removed
+
+def _parse_cron_field(field, low, high):
+    values = set()
+    for part in field.split(','):
+        step = 1
+        if '/' in part:
+            part, step = part.split('/', 1)
+            step = int(step)
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (int(value) for value in part.split('-', 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Cron field '{field}' is out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+def next_cron_time(expression, after):
+    """Return the first time after `after` matching a 5-field cron expression (minute hour day month weekday)"""
+    fields = expression.split()
+    if len(fields) != 5:
+        raise ValueError("Cron expression needs 5 fields: minute hour day month weekday")
+    minutes = _parse_cron_field(fields[0], 0, 59)
+    hours = _parse_cron_field(fields[1], 0, 23)
+    days = _parse_cron_field(fields[2], 1, 31)
+    months = _parse_cron_field(fields[3], 1, 12)
+    weekdays = {day % 7 for day in _parse_cron_field(fields[4], 0, 7)}  # 0 and 7 are Sunday
+    # Like cron, a restricted day and weekday match when either one does
+    day_restricted, weekday_restricted = fields[2] != '*', fields[4] != '*'
+    
+    candidate = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    limit = candidate + timedelta(days=366 * 5)
+    while candidate < limit:
+        day_match = candidate.day in days
+        weekday_match = (candidate.weekday() + 1) % 7 in weekdays
+        if day_restricted and weekday_restricted:
+            date_match = day_match or weekday_match
+        else:
+            date_match = day_match and weekday_match
+        if candidate.month not in months or not date_match:
+            candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+        elif candidate.hour not in hours:
+            candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+        elif candidate.minute not in minutes:
+            candidate += timedelta(minutes=1)
+        else:
+            return candidate
+    raise ValueError(f"Cron expression '{expression}' never matches")
+
+def compute_next_run(recurrence, previous_run, now=None):
+    """Next run time of a recurring job, skipping runs that were missed while nothing was running"""
+    now = now or datetime.now()
+    if recurrence.get('type') == 'cron':
+        return next_cron_time(recurrence['expression'], now)
+    interval = timedelta(minutes=max(1, int(recurrence.get('minutes', 60))))
+    next_run = previous_run + interval
+    if next_run <= now:
+        next_run = previous_run + interval * ((now - previous_run) // interval + 1)
+    return next_run
+
+def describe_recurrence(recurrence):
+    """Human readable recurrence for the scheduler list"""
+    if recurrence.get('type') == 'cron':
+        return f"cron `{recurrence['expression']}`"
+    minutes = int(recurrence.get('minutes', 60))
+    if minutes % 1440 == 0:
+        return f"every {minutes // 1440} day(s)"
+    if minutes % 60 == 0:
+        return f"every {minutes // 60} hour(s)"
+    return f"every {minutes} minutes"
+
+def sync_subscription(download_data, owner=None, now=None):
+    """Run one sync of a recurring subscription and reschedule it
+    
+    Entries newer than the last-seen cursor are queued as a one-shot
+    playlist job due immediately, then the subscription goes back to
+    'scheduled' at its next run time. Returns the sync result message.
+    """
+    now = now or datetime.now()
+    subscription_id = download_data['id']
+    seen_ids = download_data.get('seen_ids', [])
+    newest_first = download_data.get('newest_first', True)
+    first_run = not download_data.get('last_synced')
+    # Oldest-first lists only grow at the end, so entries before the cursor were all seen
+    seen_count = download_data.get('seen_count', 0)
+    skip = 0 if newest_first else max(0, seen_count - SUBSCRIPTION_CURSOR_MARGIN)
+    
+    if first_run and not download_data.get('download_existing', False):
+        # Only record the cursor; oldest-first lists must be read in full to learn every existing ID
+        new_entries, playlist_title = list_new_playlist_entries(
+            download_data['url'], seen_ids, newest_first, SUBSCRIPTION_CURSOR_SIZE if newest_first else None, skip)
+        to_download = []
+    else:
+        new_entries, playlist_title = list_new_playlist_entries(
+            download_data['url'], seen_ids, newest_first, download_data.get('max_items') or None, skip)
+        to_download = new_entries or []
+    
+    updates = {
+        'status': 'scheduled',
+        'last_synced': now.isoformat(),
+        'last_updated': now.isoformat(),
+        'lease_owner': None,
+        'lease_expires': None,
+        'queue_position': None,
+        'progress': None
+    }
+    child_job = None
+    
+    if new_entries is None:
+        result = "Could not list the playlist or channel, will retry at the next run"
+        updates.pop('last_synced')
+    else:
+        new_ids = [entry['id'] for entry in new_entries]
+        if newest_first:
+            updates['seen_ids'] = (new_ids + seen_ids)[:SUBSCRIPTION_SEEN_LIMIT]
+        else:
+            updates['seen_ids'] = (seen_ids + new_ids)[-SUBSCRIPTION_SEEN_LIMIT:]
+            if new_entries:
+                updates['seen_count'] = max(seen_count, new_entries[-1]['position'] + 1)
+        
+        if to_download:
+            # Download in upload order
+            ordered = list(reversed(to_download)) if newest_first else to_download
+            child_job = {
+                'id': f"{subscription_id}_run_{int(now.timestamp())}",
+                'type': 'playlist',
+                'title': f"{playlist_title} - {len(ordered)} new videos",
+                'videos': [{'url': entry['url'], 'title': entry['title'], 'start_time': None, 'end_time': None} for entry in ordered],
+                'quality': download_data['quality'],
+                'audio_choice': download_data['audio_choice'],
+                'scheduled_time': now.isoformat(),
+                'status': 'scheduled',
+                'priority': download_data.get('priority', 0),
+                'created_time': now.isoformat(),
+                'create_subfolder': download_data.get('create_subfolder', True),
+                'skip_existing': download_data.get('skip_existing', False),
+                'dedupe': download_data.get('dedupe', False),
+                'audio_format': download_data.get('audio_format'),
+                'subscription_id': subscription_id
+            }
+            result = f"{len(ordered)} new videos queued"
+        elif first_run and not download_data.get('download_existing', False):
+            result = f"Started tracking {len(new_ids)} existing videos"
+        else:
+            result = "No new videos"
+    
+    updates['result'] = result
+    updates['scheduled_time'] = compute_next_run(
+        download_data['recurrence'], datetime.fromisoformat(download_data['scheduled_time']), now).isoformat()
+    
+    with scheduled_downloads_lock():
+        scheduled_downloads = get_scheduled_downloads()
+        for download in scheduled_downloads:
+            if download.get('id') != subscription_id:
+                continue
+            if owner is not None and download.get('lease_owner') != owner:
+                return result  # Another scheduler took the subscription over
+            for key, value in updates.items():
+                if value is None:
+                    download.pop(key, None)
+                else:
+                    download[key] = value
+            if child_job:
+                scheduled_downloads.append(child_job)
+            save_scheduled_downloads(scheduled_downloads)
+            break
+    return result
+
+MIRROR_DIR = "channel_mirrors"
+MIRROR_TABS = ('videos', 'shorts', 'streams')
+MIRROR_SAVE_EVERY = 100  # Listed entries between cursor saves
+
+MIRROR_SAVE_INTERVAL = 5  # Seconds between state saves while downloading
+
+def channel_base_url(url):
+    """Channel URL without a tab, or None if the URL is not a channel"""
+    url = re.sub(r'/(?:videos|shorts|streams|featured)/?(?=$|[?#])', '', url.strip())
+    match = CHANNEL_URL_PATTERN.match(url)
+    return match.group(1) if match else None
+
+def get_mirror_state_file(mirror_id):
+    return os.path.join(MIRROR_DIR, f"{mirror_id}.json")
+
+def load_mirror_state(mirror_id):
+    """Enumeration cursor, listed videos and per-video results of a channel mirror, or None"""
+    state_file = get_mirror_state_file(mirror_id)
+    if not os.path.exists(state_file):
+        return None
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"DEBUG: Could not read mirror state {state_file}: {e}")
+        return None
+
+def save_mirror_state(state):
+    """Write a mirror's state; kept out of the schedule file because it grows with the channel"""
+    os.makedirs(MIRROR_DIR, exist_ok=True)
+    state_file = get_mirror_state_file(state['id'])
+    temp_file = f"{state_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(temp_file, state_file)
+
+def new_mirror_state(download_data):
+    return {
+        'id': download_data['mirror_id'],
+        'url': download_data['url'],
+        'tabs': download_data.get('tabs') or ['videos'],
+        'cursor': {},   # tab -> {'offset': entries read, 'complete': bool}
+        'videos': [],   # {'id', 'title', 'url', 'tab'} in listing order
+        'items': {}     # video id -> make_item_result(...)
+    }
+
+def enumerate_channel_mirror(state, should_stop=None, on_progress=None):
+    """Continue listing a mirrored channel's tabs from the saved cursor
+    
+    Entries are read flat, so listing costs one request per page and no
+    per-video extraction. The cursor is saved every MIRROR_SAVE_EVERY
+    entries, so a restart continues from there. yt-dlp can't start a tab at
+    a saved page token, so a resumed tab re-reads the flat pages before the
+    cursor; entries already listed are skipped. Once a tab is complete,
+    resumed runs only list uploads newer than the newest known video.
+    Returns the number of newly listed videos.
+    """
+    known_ids = {video['id'] for video in state['videos']}
+    added = 0
+    
+    def add(entry, tab):
+        nonlocal added
+        if not entry or not entry.get('id') or entry['id'] in known_ids:
+            return
+        known_ids.add(entry['id'])
+        state['videos'].append({'id': entry['id'], 'title': entry.get('title') or 'Unknown',
+                                'url': entry.get('url') or playlist_entry_url(entry), 'tab': tab})
+        added += 1
+    
+    for tab in state['tabs']:
+        cursor = state['cursor'].setdefault(tab, {'offset': 0, 'complete': False})
+        tab_url = f"{state['url']}/{tab}"
+        if should_stop and should_stop():
             break
-    save_scheduled_downloads(scheduled_downloads)
+        
+        if cursor['complete']:
+            # Newest first: stop at the first video listed before
+            new_entries, _ = list_new_playlist_entries(tab_url, known_ids, newest_first=True)
+            for entry in reversed(new_entries or []):
+                add(entry, tab)
+            save_mirror_state(state)
+            continue
+        
+        throttle = get_throttle_controller()
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'skip_download': True,
+            'extract_flat': 'in_playlist',
+            'lazy_playlist': True,
+            'extractor_retries': 3,
+            'retry_sleep_functions': {'http': throttle.retry_sleep, 'extractor': throttle.retry_sleep},
+        }
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            try:
+                info = ydl.extract_info(tab_url, download=False, process=False)
+            except Exception as e:
+                if cursor['offset'] == 0 and classify_download_error(str(e)) == 'permanent':
+                    # The channel has no such tab (e.g. no shorts)
+                    cursor.update({'complete': True, 'error': str(e)[:200]})
+                    save_mirror_state(state)
+                    continue
+                raise
+            
+            entries = iter((info or {}).get('entries') or [])
+            for _ in range(cursor['offset']):
+                if next(entries, None) is None:
+                    break
+            for entry in entries:
+                add(entry, tab)
+                cursor['offset'] += 1
+                if cursor['offset'] % MIRROR_SAVE_EVERY == 0:
+                    save_mirror_state(state)
+                    if on_progress:
+                        on_progress(len(state['videos']))
+                    if should_stop and should_stop():
+                        return added
+            cursor['complete'] = True
+            cursor['listed_at'] = datetime.now().isoformat()
+            save_mirror_state(state)
+    return added
 
-def execute_scheduled_download(download_data):
+def run_channel_mirror(download_data, output_path, controller=None, save_progress=None):
+    """List and download a channel mirror from its saved state
+    
+    Up to download_data['workers'] videos download at once. Videos already
+    in the download archive are skipped without a network request, so files
+    downloaded by any job are not fetched again. Returns (success, summary),
+    or (None, summary) if it was stopped and should continue later.
+    """
+    state = load_mirror_state(download_data['mirror_id']) or new_mirror_state(download_data)
+    should_stop = lambda: bool(controller and controller.should_stop)
+    report = save_progress or (lambda progress_info: None)
+    
+    report({'status': 'listing', 'listed': len(state['videos']), 'timestamp': datetime.now().isoformat()})
+    enumerate_channel_mirror(state, should_stop, on_progress=lambda listed: report(
+        {'status': 'listing', 'listed': listed, 'timestamp': datetime.now().isoformat()}))
+    if should_stop():
+        return None, f"Stopped while listing ({len(state['videos'])} videos listed)"
+    
+    items = state['items']
+    quality, audio_choice = download_data['quality'], download_data['audio_choice']
+    pending = [video for video in state['videos']
+               if items.get(video['id'], {}).get('status') not in ('completed', 'skipped')
+               and items.get(video['id'], {}).get('error_class') in (None, *RETRYABLE_ERROR_CLASSES)]
+    for i in precheck_archived_urls(pending, quality, audio_choice, audio_format=download_data.get('audio_format')):
+        items[pending[i]['id']] = make_item_result(True, 'Already downloaded', status='skipped')
+    pending = [video for video in pending if video['id'] not in items or not items[video['id']]['success']]
+    save_mirror_state(state)
+    
+    total = len(state['videos'])
+    lock = threading.Lock()
+    last_save = [time.time()]
+    postprocessing = []
+    
+    def mirror_video(video):
+        if should_stop():
+            return
+        success, result = download_video(video['url'], quality, audio_choice, output_path, None, controller,
+                                         None, None, True, download_data.get('dedupe', False), defer_postprocessing=True,
+                                         audio_format=download_data.get('audio_format'))
+        if isinstance(result, concurrent.futures.Future):
+            # Record the video once it is converted; the worker takes the next one meanwhile
+            recorded = threading.Event()
+            
+            def finish(future):
+                try:
+                    record(video, *future.result())
+                finally:
+                    recorded.set()
+            
+            with lock:
+                postprocessing.append(recorded)
+            result.add_done_callback(finish)
+            return
+        if not success and should_stop():
+            return  # Interrupted, the video stays pending
+        record(video, success, result)
+    
+    def record(video, success, result):
+        with lock:
+            items[video['id']] = make_item_result(success, result)
+            done = sum(1 for item_result in items.values() if item_result['success'])
+            report({
+                'status': 'downloading',
+                'current_video': done,
+                'total_videos': total,
+                'playlist_progress': done / total * 100,
+                'current_title': video['title'],
+                'timestamp': datetime.now().isoformat()
+            })
+            # A 20k-video state file is large, so results are saved every few seconds rather than per video
+            if time.time() - last_save[0] >= MIRROR_SAVE_INTERVAL:
+                save_mirror_state(state)
+                last_save[0] = time.time()
+    
+    workers = max(1, int(download_data.get('workers', 2)))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mirror") as executor:
+        for future in [executor.submit(mirror_video, video) for video in pending]:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"DEBUG: Mirror download error: {e}")
+    for recorded in postprocessing:
+        recorded.wait()
+    save_mirror_state(state)
+    
+    done = sum(1 for result in items.values() if result['success'])
+    failed = sum(1 for result in items.values() if not result['success'])
+    summary = f"{done}/{total} videos mirrored" + (f", {failed} failed" if failed else "")
+    if should_stop():
+        return None, summary
+    return failed == 0 or done > failed, summary
+
+DEFAULT_ITEM_ESTIMATE_BYTES = 100 * 1024 * 1024  # Used when a video's size can't be estimated
+
+def get_download_window(window, at):
+    """Return (start, end) of the daily window in progress at `at`, or of the next one
+    
+    A window is {'start': 'HH:MM', 'end': 'HH:MM'}; an end before the start
+    crosses midnight and an end equal to the start spans the whole day.
+    """
+    start_clock = datetime.strptime(window['start'], '%H:%M').time()
+    end_clock = datetime.strptime(window['end'], '%H:%M').time()
+    for day_offset in (-1, 0, 1):
+        day = at.date() + timedelta(days=day_offset)
+        start = datetime.combine(day, start_clock)
+        end = datetime.combine(day + timedelta(days=1) if end_clock <= start_clock else day, end_clock)
+        if at < end:
+            return start, end
+    raise ValueError(f"Invalid download window {window}")
+
+def bandwidth_budget_bytes(download_data):
+    """Bandwidth budget of a windowed job in bytes per second, or None when unlimited"""
+    mbps = download_data.get('bandwidth_mbps')
+    return mbps * 1000 * 1000 / 8 if mbps else None
+
+def plan_download_windows(item_sizes, window, bytes_per_second, start):
+    """Pack queued items into download windows by estimated size
+    
+    item_sizes is a list of (index, bytes) in queue order. Each window is
+    filled first-fit up to its bandwidth budget; an item larger than a whole
+    window is started on its own and resumed in the following windows.
+    Returns (windows, projected_completion), where each window is a dict
+    with start, end, items and bytes.
+    """
+    remaining = list(item_sizes)
+    windows = []
+    projected_completion = start
+    window_start, window_end = get_download_window(window, start)
+    full_capacity = (window_end - window_start).total_seconds() * bytes_per_second
+    window_start = max(window_start, start)
+    carry_index, carry_bytes = None, 0
+    
+    while remaining or carry_bytes:
+        capacity = (window_end - window_start).total_seconds() * bytes_per_second
+        chosen, used = [], 0
+        if carry_bytes:
+            # Finish an oversized item left over from the previous window
+            chosen.append(carry_index)
+            used = min(carry_bytes, capacity)
+            carry_bytes -= used
+        for index, size in list(remaining):
+            if used + size <= capacity:
+                chosen.append(index)
+                used += size
+                remaining.remove((index, size))
+        if not chosen and remaining and remaining[0][1] > full_capacity:
+            carry_index, size = remaining.pop(0)
+            chosen.append(carry_index)
+            used = min(size, capacity)
+            carry_bytes = size - used
+        if chosen:
+            windows.append({'start': window_start.isoformat(), 'end': window_end.isoformat(),
+                            'items': chosen, 'bytes': int(used)})
+            projected_completion = window_start + timedelta(seconds=used / bytes_per_second)
+        window_start, window_end = get_download_window(window, window_end)
+    
+    return windows, projected_completion
+
+def make_item_result(success, result, status=None):
+    """Per-item state of a batch or playlist job: status, error class and output path"""
+    item_result = {
+        'status': status or ('completed' if success else 'failed'),
+        'success': success,
+        'result': result,
+        'finished_at': datetime.now().isoformat()
+    }
+    if success and status is None:
+        item_result['output_path'] = result
+    if not success:
+        item_result['error_class'] = classify_download_error(result)
+    return item_result
+
+def get_failed_items(download_data):
+    """Indices (as stored keys) of batch or playlist items that finished with an error"""
+    return sorted((key for key, item_result in download_data.get('item_results', {}).items() if not item_result['success']), key=int)
+
+def retry_failed_items(download_id, now=None):
+    """Re-run only the failed items of a finished batch or playlist job
+    
+    Successful items keep their results, so the job downloads just the
+    failed ones. Returns how many items were queued again.
+    """
+    now = now or datetime.now()
+    with scheduled_downloads_lock():
+        scheduled_downloads = get_scheduled_downloads()
+        for download in scheduled_downloads:
+            if download.get('id') != download_id or download.get('status') not in ('completed', 'failed'):
+                continue
+            failed = get_failed_items(download)
+            if not failed:
+                return 0
+            for key in failed:
+                del download['item_results'][key]
+            download.update({
+                'status': 'scheduled',
+                'scheduled_time': now.isoformat(),
+                'retry_count': 0,
+                'result': f"Retrying {len(failed)} failed videos",
+                'last_updated': now.isoformat()
+            })
+            save_scheduled_downloads(scheduled_downloads)
+            return len(failed)
+    return 0
+
+MAX_SCHEDULED_RETRIES = 5
+RETRY_BASE_DELAY = 60  # Seconds before the first retry of a transiently failed job
+RETRY_MAX_DELAY = 3600
+RETRYABLE_ERROR_CLASSES = ('throttled', 'transient')
+
+def requeue_scheduled_download(download_data, error, owner=None, updates=None, now=None):
+    """Reschedule a transiently failed job with jittered exponential delay
+    
+    Returns False without changing anything once the job has used up its
+    retries, so the caller marks it failed.
+    """
+    retry_count = download_data.get('retry_count', 0)
+    if retry_count >= MAX_SCHEDULED_RETRIES:
+        return False
+    now = now or datetime.now()
+    delay = backoff_delay(retry_count, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+    retry_updates = {
+        'status': 'scheduled',
+        'scheduled_time': (now + timedelta(seconds=delay)).isoformat(),
+        'retry_count': retry_count + 1,
+        'result': f"Retry {retry_count + 1}/{MAX_SCHEDULED_RETRIES} in {int(delay)}s after: {error}",
+        'progress': None,
+        'queue_position': None,
+        'lease_owner': None,
+        'lease_expires': None,
+        'last_updated': now.isoformat()
+    }
+    retry_updates.update(updates or {})
+    update_scheduled_downloads({download_data['id']: retry_updates}, owner=owner)
+    return True
+
+def execute_scheduled_download(download_data, controller=None):
     """Execute a scheduled download with progress tracking"""
+    download_id = download_data['id']
+    # Writes are fenced by the lease so a scheduler that lost its claim can't overwrite the new owner's state
+    owner = download_data.get('lease_owner')
+    
+    def save_progress(progress_info):
+        update_scheduled_downloads({download_id: {'progress': progress_info}}, owner=owner)
+    
     try:
-        download_id = download_data['id']
         download_type = download_data['type']
         
         # Update status to downloading
-        update_scheduled_download_status(download_id, 'downloading')
+        update_scheduled_download_status(download_id, 'downloading', owner=owner)
+        
+        if download_type == 'subscription':
+            # Recurring jobs queue their new videos as a separate job and reschedule themselves
+            sync_subscription(download_data, owner=owner)
+            return
+        
+        if download_type == 'mirror':
+            # Mirrors keep one folder per channel and their own state file, so reruns continue where they stopped
+            output_path = os.path.join(os.getcwd(), "downloads", yt_dlp.utils.sanitize_filename(download_data.get('title') or download_data['mirror_id']))
+            success, result = run_channel_mirror(download_data, output_path, controller, save_progress)
+            if success is None:
+                return  # Lease lost or stopped; whoever runs the job next continues from the saved state
+            state = load_mirror_state(download_data['mirror_id']) or {'items': {}}
+            retry_count = sum(1 for item_result in state['items'].values()
+                              if not item_result['success'] and item_result.get('error_class') in RETRYABLE_ERROR_CLASSES)
+            if retry_count and requeue_scheduled_download(download_data, f"{retry_count} videos failed, {result}", owner):
+                return
+            save_progress(None)
+            update_scheduled_download_status(download_id, 'completed' if success else 'failed', result, owner=owner)
+            return
         
         # Create download path
         output_path = os.path.join(os.getcwd(), "downloads")
@@ -1379,12 +4103,7 @@ def execute_scheduled_download(download_data):
                     progress_info['filename'] = d.get('filename', '')
                 
                 # Update the scheduled download with progress info
-                scheduled_downloads = get_scheduled_downloads()
-                for download in scheduled_downloads:
-                    if download.get('id') == download_id:
-                        download['progress'] = progress_info
-                        break
-                save_scheduled_downloads(scheduled_downloads)
+                save_progress(progress_info)
                 
             except Exception as e:
                 print(f"Progress update error: {e}")
@@ -1397,185 +4116,424 @@ def execute_scheduled_download(download_data):
                 download_data['audio_choice'],
                 output_path,
                 update_scheduled_progress,  # Add progress callback
-                None,  # No controller for scheduled downloads
+                controller,  # Stops the download if the lease is lost
                 download_data.get('start_time'),
-                download_data.get('end_time')
+                download_data.get('end_time'),
+                download_data.get('skip_existing', False),
+                download_data.get('dedupe', False),
+                audio_format=download_data.get('audio_format')
             )
             
-        elif download_type == 'batch':
-            # Batch download with progress tracking
-            results = []
-            total_videos = len(download_data['urls'])
-            
-            for i, url_data in enumerate(download_data['urls']):
-                # Update batch progress
-                batch_progress_info = {
-                    'status': 'downloading',
-                    'current_video': i + 1,
-                    'total_videos': total_videos,
-                    'batch_progress': ((i / total_videos) * 100),
-                    'current_url': url_data['url'],
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                # Update scheduled download with batch progress
-                scheduled_downloads = get_scheduled_downloads()
-                for download in scheduled_downloads:
-                    if download.get('id') == download_id:
-                        download['progress'] = batch_progress_info
-                        break
-                save_scheduled_downloads(scheduled_downloads)
-                
-                # Download individual video with progress
-                def batch_video_progress(d):
-                    # Update individual video progress within batch
-                    batch_progress_info['video_progress'] = {
-                        'status': d['status'],
-                        'progress': 0
-                    }
-                    
-                    if d['status'] == 'downloading':
-                        if 'total_bytes' in d and d['total_bytes']:
-                            batch_progress_info['video_progress']['progress'] = (d['downloaded_bytes'] / d['total_bytes']) * 100
-                        elif 'total_bytes_estimate' in d and d['total_bytes_estimate']:
-                            batch_progress_info['video_progress']['progress'] = (d['downloaded_bytes'] / d['total_bytes_estimate']) * 100
-                        
-                        batch_progress_info['video_progress']['downloaded_mb'] = d['downloaded_bytes'] / (1024 * 1024)
-                        batch_progress_info['video_progress']['speed'] = d.get('speed', 0) or 0
-                        batch_progress_info['video_progress']['eta'] = d.get('eta', 0) or 0
-                    
-                    # Update the scheduled download
-                    scheduled_downloads = get_scheduled_downloads()
-                    for download in scheduled_downloads:
-                        if download.get('id') == download_id:
-                            download['progress'] = batch_progress_info
-                            break
-                    save_scheduled_downloads(scheduled_downloads)
-                
-                success, result = download_video(
-                    url_data['url'],
-                    download_data['quality'],
-                    download_data['audio_choice'],
-                    output_path,
-                    batch_video_progress,
-                    None,
-                    url_data.get('start_time'),
-                    url_data.get('end_time')
-                )
-                results.append({'url': url_data['url'], 'success': success, 'result': result})
+        elif download_type in ('batch', 'playlist'):
+            # Batch and playlist selections share one loop; only their item lists and progress fields differ
+            is_batch = download_type == 'batch'
+            items = download_data['urls'] if is_batch else download_data['videos']
+            progress_key = 'batch_progress' if is_batch else 'playlist_progress'
+            total_videos = len(items)
+            # Results by item index, kept across download windows so a resumed job skips finished items
+            item_results = dict(download_data.get('item_results', {}))
             
-            # Overall success if more than 50% succeeded
-            success_count = sum(1 for r in results if r['success'])
-            success = success_count > len(results) / 2
-            result = f"{success_count}/{len(results)} videos downloaded successfully"
+            # Bulk pre-check against the archive so known videos never hit the network
+            archived_indices = set()
+            if is_batch and download_data.get('skip_existing', False):
+                archived_indices = precheck_archived_urls(items, download_data['quality'], download_data['audio_choice'],
+                                                          audio_format=download_data.get('audio_format'))
+            for i in archived_indices:
+                item_results.setdefault(str(i), make_item_result(True, 'Already downloaded', status='skipped'))
             
-        elif download_type == 'playlist':
-            # Playlist download with progress tracking
-            results = []
-            total_videos = len(download_data['videos'])
-            
-            for i, video_data in enumerate(download_data['videos']):
-                # Update playlist progress
-                playlist_progress_info = {
-                    'status': 'downloading',
-                    'current_video': i + 1,
-                    'total_videos': total_videos,
-                    'playlist_progress': ((i / total_videos) * 100),
-                    'current_title': video_data['title'],
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                # Update scheduled download with playlist progress
-                scheduled_downloads = get_scheduled_downloads()
-                for download in scheduled_downloads:
-                    if download.get('id') == download_id:
-                        download['progress'] = playlist_progress_info
+            # Fail early when the sizes estimated while scheduling show the videos left won't fit on disk
+            known_remaining = sum(item.get('filesize_estimate') or 0 for i, item in enumerate(items) if str(i) not in item_results)
+            free_bytes = free_disk_bytes(output_path)
+            if free_bytes is not None and known_remaining > free_bytes:
+                save_progress(None)
+                update_scheduled_download_status(download_id, 'failed', f"Not enough disk space: about {known_remaining / (1024**3):.2f} GB needed, {free_bytes / (1024**3):.2f} GB free", owner=owner)
+                return
+            
+            window = download_data.get('window')
+            rate_limit = bandwidth_budget_bytes(download_data)
+            item_estimates = dict(download_data.get('item_estimates', {}))
+            if window:
+                # Off-peak jobs are packed into windows by estimated size and paused when a window ends
+                for i, item in enumerate(items):
+                    if str(i) not in item_estimates and str(i) not in item_results:
+                        # Playlist selections carry the estimate made while scheduling, so no video is extracted twice
+                        item_estimates[str(i)] = item.get('filesize_estimate') or estimate_download_size(item['url'], download_data['quality'], download_data['audio_choice']) or DEFAULT_ITEM_ESTIMATE_BYTES
+                pending_sizes = [(i, item_estimates[str(i)]) for i in range(total_videos) if str(i) not in item_results]
+                plan, projected_completion = plan_download_windows(pending_sizes, window, rate_limit or float('inf'), datetime.now())
+                update_scheduled_downloads({download_id: {
+                    'item_estimates': item_estimates,
+                    'window_plan': plan,
+                    'projected_completion': projected_completion.isoformat()
+                }}, owner=owner)
+                if controller is None:
+                    controller = DownloadController()
+            
+            # Bytes transferred so far and pre-flight sizes give the whole-job ETA
+            job_started = time.time()
+            transferred = {'bytes': 0}
+            estimate_of = lambda i: items[i].get('filesize_estimate') or item_estimates.get(str(i)) or DEFAULT_ITEM_ESTIMATE_BYTES
+            
+            # Videos handed to the post-processing pool, by item index; the loop downloads the next one meanwhile
+            postprocessing = {}
+            
+            def collect_postprocessed(wait=False):
+                for i, future in list(postprocessing.items()):
+                    if wait or future.done():
+                        item_results[str(i)] = make_item_result(*future.result())
+                        del postprocessing[i]
+                        update_scheduled_downloads({download_id: {'item_results': item_results}}, owner=owner)
+            
+            window_stopper = None
+            while True:
+                pending = [i for i in range(total_videos) if str(i) not in item_results]
+                if not pending or (controller and controller.should_stop):
+                    break
+                if window:
+                    now = datetime.now()
+                    window_start, window_end = get_download_window(window, now)
+                    if window_start > now:
+                        break  # Outside the window, wait for the next one
+                    plan, _ = plan_download_windows([(i, item_estimates[str(i)]) for i in pending], window, rate_limit or float('inf'), now)
+                    # Only the items packed into the current window run now
+                    run_now = plan[0]['items'] if plan and datetime.fromisoformat(plan[0]['start']) < window_end else []
+                    if not run_now:
                         break
-                save_scheduled_downloads(scheduled_downloads)
+                    if window_stopper is None:
+                        # Stop the running item at the window end; yt-dlp resumes the .part file next window
+                        window_stopper = threading.Timer((window_end - now).total_seconds(), controller.stop)
+                        window_stopper.daemon = True
+                        window_stopper.start()
+                else:
+                    run_now = pending
                 
-                # Download individual video with progress
-                def playlist_video_progress(d):
-                    # Update individual video progress within playlist
-                    playlist_progress_info['video_progress'] = {
-                        'status': d['status'],
-                        'progress': 0
+                for i in run_now:
+                    if controller and controller.should_stop:
+                        break
+                    item = items[i]
+                    
+                    # Update batch or playlist progress
+                    item_progress_info = {
+                        'status': 'downloading',
+                        'current_video': i + 1,
+                        'total_videos': total_videos,
+                        progress_key: ((len(item_results) / total_videos) * 100),
+                        'timestamp': datetime.now().isoformat()
                     }
+                    if is_batch:
+                        item_progress_info['current_url'] = item['url']
+                    else:
+                        item_progress_info['current_title'] = item['title']
+                    
+                    # Update scheduled download with batch or playlist progress
+                    save_progress(item_progress_info)
                     
-                    if d['status'] == 'downloading':
-                        if 'total_bytes' in d and d['total_bytes']:
-                            playlist_progress_info['video_progress']['progress'] = (d['downloaded_bytes'] / d['total_bytes']) * 100
-                        elif 'total_bytes_estimate' in d and d['total_bytes_estimate']:
-                            playlist_progress_info['video_progress']['progress'] = (d['downloaded_bytes'] / d['total_bytes_estimate']) * 100
+                    later_bytes = sum(estimate_of(j) for j in range(i + 1, total_videos) if str(j) not in item_results)
+                    
+                    # Download individual video with progress
+                    def item_video_progress(d, item_progress_info=item_progress_info, i=i, later_bytes=later_bytes):
+                        # Update individual video progress within the batch or playlist
+                        item_progress_info['video_progress'] = {
+                            'status': d['status'],
+                            'progress': 0
+                        }
+                        
+                        if d['status'] == 'downloading':
+                            if 'total_bytes' in d and d['total_bytes']:
+                                item_progress_info['video_progress']['progress'] = (d['downloaded_bytes'] / d['total_bytes']) * 100
+                            elif 'total_bytes_estimate' in d and d['total_bytes_estimate']:
+                                item_progress_info['video_progress']['progress'] = (d['downloaded_bytes'] / d['total_bytes_estimate']) * 100
+                            
+                            item_progress_info['video_progress']['downloaded_mb'] = d['downloaded_bytes'] / (1024 * 1024)
+                            item_progress_info['video_progress']['speed'] = d.get('speed', 0) or 0
+                            item_progress_info['video_progress']['eta'] = d.get('eta', 0) or 0
+                            
+                            current_total = d.get('total_bytes') or d.get('total_bytes_estimate') or estimate_of(i)
+                            item_progress_info['job_eta'] = batch_eta_seconds(max(0, current_total - d['downloaded_bytes']) + later_bytes,
+                                                                              transferred['bytes'] + d['downloaded_bytes'],
+                                                                              time.time() - job_started, d.get('speed') or 0)
+                        elif d['status'] == 'finished':
+                            transferred['bytes'] += d.get('downloaded_bytes') or d.get('total_bytes') or 0
                         
-                        playlist_progress_info['video_progress']['downloaded_mb'] = d['downloaded_bytes'] / (1024 * 1024)
-                        playlist_progress_info['video_progress']['speed'] = d.get('speed', 0) or 0
-                        playlist_progress_info['video_progress']['eta'] = d.get('eta', 0) or 0
+                        # Update the scheduled download
+                        save_progress(item_progress_info)
                     
-                    # Update the scheduled download
-                    scheduled_downloads = get_scheduled_downloads()
-                    for download in scheduled_downloads:
-                        if download.get('id') == download_id:
-                            download['progress'] = playlist_progress_info
-                            break
-                    save_scheduled_downloads(scheduled_downloads)
+                    success, result = download_video(
+                        item['url'],
+                        download_data['quality'],
+                        download_data['audio_choice'],
+                        output_path,
+                        item_video_progress,
+                        controller,
+                        item.get('start_time'),
+                        item.get('end_time'),
+                        download_data.get('skip_existing', False),
+                        download_data.get('dedupe', False),
+                        rate_limit,
+                        defer_postprocessing=True,
+                        audio_format=download_data.get('audio_format')
+                    )
+                    if isinstance(result, concurrent.futures.Future):
+                        postprocessing[i] = result
+                        collect_postprocessed()
+                        continue
+                    if not success and controller and controller.should_stop:
+                        break  # Interrupted by the window end or a lost lease, the item stays pending
+                    item_results[str(i)] = make_item_result(success, result)
+                    update_scheduled_downloads({download_id: {'item_results': item_results}}, owner=owner)
+                    collect_postprocessed()
                 
-                success, result = download_video(
-                    video_data['url'],
-                    download_data['quality'],
-                    download_data['audio_choice'],
-                    output_path,
-                    playlist_video_progress,
-                    None,
-                    video_data.get('start_time'),
-                    video_data.get('end_time')
-                )
-                results.append({'title': video_data['title'], 'success': success, 'result': result})
+                collect_postprocessed(wait=True)
+                if not window:
+                    break
+            
+            if window_stopper:
+                window_stopper.cancel()
+            
+            pending = [i for i in range(total_videos) if str(i) not in item_results]
+            if window and pending:
+                # Pause until the next window and report when the remaining items should be done
+                now = datetime.now()
+                resume_at, current_end = get_download_window(window, now)
+                if resume_at <= now:
+                    resume_at, _ = get_download_window(window, current_end)
+                plan, projected_completion = plan_download_windows([(i, item_estimates[str(i)]) for i in pending], window, rate_limit or float('inf'), resume_at)
+                update_scheduled_downloads({download_id: {
+                    'status': 'scheduled',
+                    'scheduled_time': resume_at.isoformat(),
+                    'item_results': item_results,
+                    'window_plan': plan,
+                    'projected_completion': projected_completion.isoformat(),
+                    'result': f"Paused with {len(item_results)}/{total_videos} videos done, resumes {resume_at.strftime('%Y-%m-%d %H:%M')}",
+                    'progress': None,
+                    'lease_owner': None,
+                    'lease_expires': None,
+                    'last_updated': datetime.now().isoformat()
+                }}, owner=owner)
+                return
+            
+            # Items that failed transiently run again later; finished items are kept
+            retry_items = [key for key, item_result in item_results.items()
+                           if not item_result['success'] and item_result.get('error_class') in RETRYABLE_ERROR_CLASSES]
+            if retry_items:
+                kept_results = {key: value for key, value in item_results.items() if key not in retry_items}
+                error = item_results[retry_items[0]]['result']
+                if requeue_scheduled_download(download_data, f"{len(retry_items)} videos failed: {error}", owner,
+                                              {'item_results': kept_results}):
+                    return
+            
+            results = [item_results[str(i)] for i in range(total_videos) if str(i) in item_results]
             
             # Overall success if more than 50% succeeded
             success_count = sum(1 for r in results if r['success'])
             success = success_count > len(results) / 2
             result = f"{success_count}/{len(results)} videos downloaded successfully"
         
+        if download_type == 'single' and not success and classify_download_error(result) in RETRYABLE_ERROR_CLASSES:
+            if requeue_scheduled_download(download_data, result, owner):
+                return
+        
         # Clear progress info and update final status
-        scheduled_downloads = get_scheduled_downloads()
-        for download in scheduled_downloads:
-            if download.get('id') == download_id:
-                if 'progress' in download:
-                    del download['progress']  # Clear progress info
-                break
-        save_scheduled_downloads(scheduled_downloads)
+        save_progress(None)
         
         if success:
-            update_scheduled_download_status(download_id, 'completed', result)
+            update_scheduled_download_status(download_id, 'completed', result, owner=owner)
         else:
-            update_scheduled_download_status(download_id, 'failed', result)
+            update_scheduled_download_status(download_id, 'failed', result, owner=owner)
             
     except Exception as e:
+        if classify_download_error(str(e)) in RETRYABLE_ERROR_CLASSES and requeue_scheduled_download(download_data, str(e), owner):
+            return
         # Clear progress info on error
-        scheduled_downloads = get_scheduled_downloads()
-        for download in scheduled_downloads:
-            if download.get('id') == download_id:
-                if 'progress' in download:
-                    del download['progress']
-                break
-        save_scheduled_downloads(scheduled_downloads)
-        update_scheduled_download_status(download_id, 'failed', str(e))
+        save_progress(None)
+        update_scheduled_download_status(download_id, 'failed', str(e), owner=owner)
+
+class ScheduledJobQueue:
+    """Run due scheduled downloads on a bounded pool of worker threads.
+    
+    Due jobs wait in a queue ordered by priority (higher first) and then by
+    scheduled time, which is FIFO when all priorities are equal. Queue
+    position and queued_at are written to the schedule so the UI can show
+    how long each job has been waiting.
+    
+    Several schedulers (the Streamlit app, one or more scheduler services)
+    may share one schedule file. A job is claimed with a lease before it is
+    queued, a heartbeat renews the leases of every queued and running job,
+    and a job whose lease expires is taken over by another scheduler. A
+    scheduler that finds it lost a lease stops that download.
+    """
+    def __init__(self, max_concurrent_jobs=2, execute=None, persist_status=True,
+                 node_id=None, lease_seconds=LEASE_SECONDS):
+        self.max_concurrent_jobs = max(1, int(max_concurrent_jobs))
+        self.execute = execute or execute_scheduled_download
+        self.persist_status = persist_status
+        self.node_id = node_id or make_scheduler_node_id()
+        self.lease_seconds = lease_seconds
+        self.condition = threading.Condition()
+        self.queue = []  # heap of (-priority, scheduled_time, sequence, job)
+        self.queued_at = {}  # job_id -> timestamp
+        self.active = {}  # job_id -> start timestamp
+        self.controllers = {}  # job_id -> DownloadController used to stop a job whose lease was lost
+        self.sequence = 0
+        self.workers = []
+        self.heartbeat_thread = None
+        self._ensure_workers()
+    
+    def _ensure_workers(self):
+        self.workers = [worker for worker in self.workers if worker.is_alive()]
+        while len(self.workers) < self.max_concurrent_jobs:
+            worker = threading.Thread(target=self._worker, daemon=True)
+            self.workers.append(worker)
+            worker.start()
+        if self.persist_status and not (self.heartbeat_thread and self.heartbeat_thread.is_alive()):
+            self.heartbeat_thread = threading.Thread(target=self._heartbeat, daemon=True)
+            self.heartbeat_thread.start()
+    
+    def set_max_concurrent_jobs(self, max_concurrent_jobs):
+        """Change how many scheduled jobs may run at the same time"""
+        with self.condition:
+            self.max_concurrent_jobs = max(1, int(max_concurrent_jobs))
+            self._ensure_workers()
+            self.condition.notify_all()
+    
+    def submit(self, download):
+        """Claim and queue a due job, return False if it is already queued, running or claimed elsewhere"""
+        job_id = download['id']
+        with self.condition:
+            if job_id in self.queued_at or job_id in self.active:
+                return False
+        
+        queued_at = time.time()
+        if self.persist_status:
+            # The claim is atomic across processes, so only one scheduler queues each job
+            download = claim_scheduled_download(job_id, self.node_id, self.lease_seconds, fields={
+                'status': 'queued',
+                'queued_at': datetime.fromtimestamp(queued_at).isoformat(),
+                'last_updated': datetime.now().isoformat()
+            })
+            if download is None:
+                return False
+        
+        with self.condition:
+            if job_id in self.queued_at or job_id in self.active:
+                return False
+            self.sequence += 1
+            priority = int(download.get('priority', 0) or 0)
+            heapq.heappush(self.queue, (-priority, download.get('scheduled_time', ''), self.sequence, download))
+            self.queued_at[job_id] = queued_at
+            positions = self._positions()
+            self.condition.notify()
+        
+        self._save_positions(positions)
+        return True
+    
+    def _positions(self):
+        return {entry[3]['id']: position for position, entry in enumerate(sorted(self.queue), 1)}
+    
+    def _save_positions(self, positions, extra=None):
+        if self.persist_status:
+            updates = {queued_id: {'queue_position': position} for queued_id, position in positions.items()}
+            updates.update(extra or {})
+            if updates:
+                update_scheduled_downloads(updates, owner=self.node_id)
+    
+    def held_job_ids(self):
+        """IDs of the queued and running jobs whose leases this scheduler holds"""
+        with self.condition:
+            return set(self.queued_at) | set(self.active)
+    
+    def renew_leases(self):
+        """Renew the leases of held jobs and drop or stop the ones that were lost"""
+        held = self.held_job_ids()
+        if not held:
+            return set()
+        lost = held - renew_scheduled_download_leases(held, self.node_id, self.lease_seconds)
+        if lost:
+            with self.condition:
+                self.queue = [entry for entry in self.queue if entry[3]['id'] not in lost]
+                heapq.heapify(self.queue)
+                for job_id in lost:
+                    self.queued_at.pop(job_id, None)
+                    if job_id in self.controllers:
+                        print(f"⚠️ Lease lost for scheduled download {job_id}, stopping it")
+                        self.controllers[job_id].stop()
+                self.condition.notify_all()
+        return lost
+    
+    def _heartbeat(self):
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            try:
+                self.renew_leases()
+            except Exception as e:
+                print(f"❌ Lease heartbeat error: {e}")
+    
+    def snapshot(self):
+        """Return queued jobs with position and wait time, and the running job IDs"""
+        now = time.time()
+        with self.condition:
+            queued = [
+                {'id': entry[3]['id'], 'title': entry[3].get('title', ''), 'position': position,
+                 'wait_seconds': now - self.queued_at.get(entry[3]['id'], now)}
+                for position, entry in enumerate(sorted(self.queue), 1)
+            ]
+            return {'queued': queued, 'active': list(self.active), 'max_concurrent_jobs': self.max_concurrent_jobs}
+    
+    def _worker(self):
+        while True:
+            with self.condition:
+                while not self.queue or len(self.active) >= self.max_concurrent_jobs:
+                    if len(self.workers) > self.max_concurrent_jobs and threading.current_thread() in self.workers:
+                        # The pool was shrunk, retire this worker
+                        self.workers.remove(threading.current_thread())
+                        return
+                    self.condition.wait()
+                _, _, _, download = heapq.heappop(self.queue)
+                job_id = download['id']
+                self.queued_at.pop(job_id, None)
+                self.active[job_id] = time.time()
+                controller = DownloadController()
+                self.controllers[job_id] = controller
+                positions = self._positions()
+            
+            try:
+                if self.persist_status:
+                    # Cancelled jobs and jobs whose lease was lost while waiting are skipped
+                    started = update_scheduled_downloads({job_id: {
+                        'status': 'downloading',
+                        'queue_position': None,
+                        'lease_expires': time.time() + self.lease_seconds,
+                        'last_updated': datetime.now().isoformat()
+                    }}, statuses=('queued',), owner=self.node_id)
+                    self._save_positions(positions)
+                    if job_id not in started:
+                        continue
+                self.execute(download, controller)
+            except Exception as e:
+                print(f"❌ Scheduled download {job_id} failed: {e}")
+            finally:
+                with self.condition:
+                    self.active.pop(job_id, None)
+                    self.controllers.pop(job_id, None)
+                    self.condition.notify_all()
+
+@st.cache_resource
+def get_scheduled_job_queue():
+    """Shared queue for scheduled downloads started from the Streamlit app"""
+    return ScheduledJobQueue()
 
 def check_and_run_scheduled_downloads():
-    """Check for scheduled downloads that are ready to run"""
+    """Check for scheduled downloads that are ready to run and queue them"""
     scheduled_downloads = get_scheduled_downloads()
     current_time = datetime.now()
+    job_queue = get_scheduled_job_queue()
     
     for download in scheduled_downloads:
-        if download['status'] == 'scheduled':
+        # New jobs, and jobs whose scheduler stopped renewing its lease
+        if is_claimable(download, job_queue.node_id):
             scheduled_time = datetime.fromisoformat(download['scheduled_time'])
             if current_time >= scheduled_time:
-                # Run the download in a separate thread
-                threading.Thread(
-                    target=execute_scheduled_download,
-                    args=(download,),
-                    daemon=True
-                ).start()
+                # Claim and run the download on the bounded job pool
+                job_queue.submit(download)
 
 def create_calendar_events(scheduled_downloads):
     """Create calendar events from scheduled downloads"""
@@ -1586,6 +4544,7 @@ def create_calendar_events(scheduled_downloads):
         # Determine color based on status
         color_map = {
             'scheduled': '#3b82f6',  # Blue
+            'queued': '#8b5cf6',  # Purple
             'downloading': '#f59e0b',  # Orange
             'completed': '#10b981',  # Green
             'failed': '#ef4444'  # Red
@@ -1593,6 +4552,7 @@ def create_calendar_events(scheduled_downloads):
         
         status_icon = {
             'scheduled': '📅',
+            'queued': '⏳',
             'downloading': '⬇️',
             'completed': '✅',
             'failed': '❌'
@@ -1616,7 +4576,41 @@ def create_calendar_events(scheduled_downloads):
     
     return events
 
+def flash_preflight_warning(key, plan):
+    """Keep a pre-flight warning so it is still shown after the rerun that follows starting a download"""
+    warning = preflight_warning(plan)
+    if warning:
+        st.session_state.setdefault('preflight_warnings', {})[key] = warning
+
+def show_preflight_warning(key):
+    """Show and clear the pre-flight warning kept under key"""
+    warning = st.session_state.get('preflight_warnings', {}).pop(key, None)
+    if warning:
+        st.warning(f"⚠️ {warning}")
+
+LIVE_PANEL_REFRESH_SECONDS = 1
+
+def live_panel(name, render):
+    """Show a panel that reruns on its own every second while render() returns True
+    
+    The panel is a fragment, so only it reruns on the timer, not the whole
+    app. When render() starts or stops reporting work in progress the app
+    reruns once to switch the timer on or off.
+    """
+    refreshing = st.session_state.setdefault('live_panels', {}).get(name, False)
+    
+    def panel():
+        pending = bool(render())
+        if pending != refreshing:
+            st.session_state.live_panels[name] = pending
+            st.rerun()
+    
+    # Each panel gets its own container, so fragments in the same tab stay apart
+    with st.container():
+        st.fragment(panel, run_every=LIVE_PANEL_REFRESH_SECONDS if refreshing else None)()
+
 # Main content tabs
+
 tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📥 Download", "📋 Batch Download", "📋 Playlist Manager", "⏰ Scheduler", "📊 History", "📁 File Manager"])
 
 with tab1:
@@ -1698,20 +4692,28 @@ with tab1:
         if url and st.button("🔍 Get Video Info", use_container_width=True, type="secondary"):
             with st.spinner("🔄 Fetching video information..."):
                 if is_playlist_url(url):
-                    playlist_info = get_playlist_info(url)
+                    playlist_info = get_playlist_info(url, flat=True, max_entries=PLAYLIST_PREVIEW_LIMIT + 1)
                     if playlist_info:
+                        entries = playlist_info.get('entries', [])
+                        total = playlist_info.get('playlist_count')
                         st.markdown('<div class="info-card">', unsafe_allow_html=True)
                         st.success(f"🎵 Playlist detected: **{playlist_info.get('title', 'Unknown Playlist')}**")
-                        st.info(f"📊 Contains **{len(playlist_info.get('entries', []))}** videos")
+                        if total:
+                            st.info(f"📊 Contains **{total}** videos")
+                        elif playlist_info.get('complete'):
+                            st.info(f"📊 Contains **{len(entries)}** videos")
+                        else:
+                            st.info(f"📊 Contains more than **{PLAYLIST_PREVIEW_LIMIT}** videos")
                         
                         # Show first few videos
-                        st.markdown("#### 📋 Preview (First 5 videos):")
-                        entries = playlist_info.get('entries', [])[:5]
-                        for i, entry in enumerate(entries):
-                            if entry:
-                                st.markdown(f"**{i+1}.** {entry.get('title', 'Unknown')}")
-                        if len(playlist_info.get('entries', [])) > 5:
-                            st.markdown(f"*... and {len(playlist_info.get('entries', [])) - 5} more videos*")
+                        st.markdown(f"#### 📋 Preview (First {PLAYLIST_PREVIEW_LIMIT} videos):")
+                        for i, entry in enumerate(entries[:PLAYLIST_PREVIEW_LIMIT]):
+                            duration = entry.get('duration')
+                            st.markdown(f"**{i+1}.** {entry.get('title', 'Unknown')}" + (f" ({duration//60}:{duration%60:02d})" if duration else ""))
+                        if total and total > PLAYLIST_PREVIEW_LIMIT:
+                            st.markdown(f"*... and {total - PLAYLIST_PREVIEW_LIMIT} more videos*")
+                        elif len(entries) > PLAYLIST_PREVIEW_LIMIT:
+                            st.markdown("*... and more videos*")
                         st.markdown('</div>', unsafe_allow_html=True)
                     else:
                         st.error("❌ Failed to retrieve playlist information. Please check the URL and try again.")
@@ -1805,7 +4807,8 @@ if st.session_state.download_state['is_downloading']:
         # Get time range from session state for playlist downloads
         playlist_start_time = st.session_state.download_state.get('start_time')
         playlist_end_time = st.session_state.download_state.get('end_time')
-        success, results = download_playlist(url, quality, audio_choice, max_downloads, playlist_progress_container, playlist_start_time, playlist_end_time)
+        success, results = download_playlist(url, quality, audio_choice, max_downloads, playlist_progress_container, playlist_start_time, playlist_end_time, skip_existing, dedupe,
+                                             workers=playlist_workers, output_path=download_path, audio_format=audio_format, preflight=True)
         
         if success:
             # Celebration and prominent success message
@@ -1856,7 +4859,7 @@ if st.session_state.download_state['is_downloading']:
                 st.session_state.download_state['is_downloading'] = False
                 st.rerun()
         else:
-            st.error("❌ **Playlist Download Failed**")
+            st.error(f"❌ **Playlist Download Failed:** {results}")
             st.info("💡 **Tip:** Check the playlist URL and try again")
             
             # Option to try again
@@ -1963,7 +4966,8 @@ if st.session_state.download_state['is_downloading']:
                 def download_thread():
                     try:
                         # Use the pre-captured time range values (no session state access in thread)
-                        success, filename = download_video(url, quality, audio_choice, download_path, update_progress, controller, download_start_time, download_end_time)
+                        success, filename = download_video(url, quality, audio_choice, download_path, update_progress, controller, download_start_time, download_end_time, skip_existing, dedupe,
+                                                           audio_format=audio_format)
                         controller.download_result = (success, filename)
                     except Exception as e:
                         controller.download_result = (False, str(e))
@@ -2176,40 +5180,76 @@ with tab2:
     if batch_urls:
         urls = [url.strip() for url in batch_urls.split('\n') if url.strip()]
         
+        # Bulk pre-check against the download archive (no network calls)
+        archived_indices = set()
+        if skip_existing:
+            url_items = []
+            for idx, batch_url in enumerate(urls):
+                time_range = per_video_time_ranges[idx] if idx < len(per_video_time_ranges) else {}
+                url_items.append({'url': batch_url, 'start_time': time_range.get('start'), 'end_time': time_range.get('end')})
+            archived_indices = precheck_archived_urls(url_items, quality, audio_choice, audio_format=audio_format)
+        
         # Show URL count
-        col1, col2, col3 = st.columns(3)
+        col1, col2, col3, col4 = st.columns(4)
         with col1:
             st.metric("📊 URLs Found", len(urls))
         with col2:
-            st.metric("🎯 Selected Quality", quality)
+            st.metric("⏭️ Already Downloaded", len(archived_indices))
         with col3:
+            st.metric("🎯 Selected Quality", quality)
+        with col4:
             st.metric("🎵 Audio Mode", audio_options[audio_choice])
         
+        preflight_check = st.checkbox("🧮 Check size and disk space before starting", value=True,
+                                      help="Estimates each video's size for the chosen quality and stops the batch from starting if it won't fit on disk")
+        
         if st.button("📥 Download All", use_container_width=True, type="primary") and not st.session_state.download_state['batch_state']['is_downloading']:
-            # Store batch information in session state
-            st.session_state.download_state['batch_state']['urls'] = urls
-            st.session_state.download_state['batch_state']['current_index'] = 0
-            st.session_state.download_state['batch_state']['results'] = []
-            st.session_state.download_state['batch_state']['is_downloading'] = True
-            st.session_state.download_state['batch_state']['is_paused'] = False
-            st.session_state.download_state['batch_state']['should_stop'] = False
-            # Store time range settings for batch download
-            if batch_download_full_video == "✂️ Same Time Range for All":
-                st.session_state.download_state['batch_state']['start_time'] = batch_start_time if batch_start_time else None
-                st.session_state.download_state['batch_state']['end_time'] = batch_end_time if batch_end_time else None
-                st.session_state.download_state['batch_state']['per_video_time_ranges'] = None
-            elif batch_download_full_video == "✂️ Custom Range per Video":
-                st.session_state.download_state['batch_state']['start_time'] = None
-                st.session_state.download_state['batch_state']['end_time'] = None
-                st.session_state.download_state['batch_state']['per_video_time_ranges'] = per_video_time_ranges
+            # Drop videos that are already in the archive
+            if archived_indices:
+                urls = [u for idx, u in enumerate(urls) if idx not in archived_indices]
+                per_video_time_ranges = [r for idx, r in enumerate(per_video_time_ranges) if idx not in archived_indices]
+                st.info(f"⏭️ Skipping {len(archived_indices)} already downloaded videos")
+            # Pre-flight: total size for the chosen format against free disk space
+            preflight = None
+            if preflight_check and urls:
+                preflight_path = os.path.join(os.getcwd(), "downloads")
+                if create_subfolder:
+                    preflight_path = os.path.join(preflight_path, datetime.now().strftime("%Y-%m-%d"))
+                with st.spinner(f"🧮 Estimating size of {len(urls)} videos..."):
+                    preflight = plan_preflight([{'url': u} for u in urls], quality, audio_choice, preflight_path)
+            if preflight and preflight['status'] == 'block':
+                st.error(f"💾 Not enough disk space for this batch: {describe_preflight(preflight)}")
             else:
-                st.session_state.download_state['batch_state']['start_time'] = None
-                st.session_state.download_state['batch_state']['end_time'] = None
-                st.session_state.download_state['batch_state']['per_video_time_ranges'] = None
-            # Initialize batch controller
-            if 'batch_controller' not in st.session_state:
-                st.session_state.batch_controller = DownloadController()
-            st.rerun()
+                # Store batch information in session state
+                st.session_state.download_state['batch_state']['urls'] = urls
+                st.session_state.download_state['batch_state']['current_index'] = 0
+                st.session_state.download_state['batch_state']['results'] = []
+                st.session_state.download_state['batch_state']['is_downloading'] = True
+                st.session_state.download_state['batch_state']['is_paused'] = False
+                st.session_state.download_state['batch_state']['should_stop'] = False
+                # Store time range settings for batch download
+                if batch_download_full_video == "✂️ Same Time Range for All":
+                    st.session_state.download_state['batch_state']['start_time'] = batch_start_time if batch_start_time else None
+                    st.session_state.download_state['batch_state']['end_time'] = batch_end_time if batch_end_time else None
+                    st.session_state.download_state['batch_state']['per_video_time_ranges'] = None
+                elif batch_download_full_video == "✂️ Custom Range per Video":
+                    st.session_state.download_state['batch_state']['start_time'] = None
+                    st.session_state.download_state['batch_state']['end_time'] = None
+                    st.session_state.download_state['batch_state']['per_video_time_ranges'] = per_video_time_ranges
+                else:
+                    st.session_state.download_state['batch_state']['start_time'] = None
+                    st.session_state.download_state['batch_state']['end_time'] = None
+                    st.session_state.download_state['batch_state']['per_video_time_ranges'] = None
+                st.session_state.download_state['batch_state']['preflight'] = describe_preflight(preflight) if preflight else None
+                st.session_state.download_state['batch_state']['preflight_warning'] = preflight_warning(preflight) if preflight else None
+                # Sizes from the pre-flight plan seed the whole-batch ETA
+                st.session_state.batch_progress = BatchProgress()
+                if preflight:
+                    st.session_state.batch_progress.set_estimates([plan_item['bytes'] for plan_item in preflight['items']])
+                # Initialize batch controller
+                if 'batch_controller' not in st.session_state:
+                    st.session_state.batch_controller = DownloadController()
+                st.rerun()
         
         # Batch download in progress
         if st.session_state.download_state['batch_state']['is_downloading']:
@@ -2265,6 +5305,10 @@ with tab2:
                 overall_progress = st.progress(current_index / total_urls if total_urls > 0 else 0)
                 overall_status = st.empty()
                 batch_stats = st.empty()
+                if batch_state.get('preflight_warning'):
+                    st.warning(f"⚠️ {batch_state['preflight_warning']}")
+                elif batch_state.get('preflight'):
+                    st.caption(f"🧮 Pre-flight: {batch_state['preflight']}")
                 
                 overall_status.markdown(f"**Processing video {current_index + 1}/{total_urls}**")
                 
@@ -2328,7 +5372,9 @@ with tab2:
                             if batch_progress.current_eta > 0:
                                 eta_minutes = int(batch_progress.current_eta // 60)
                                 eta_seconds = int(batch_progress.current_eta % 60)
-                                video_eta.markdown(f"**⏱️ ETA:** {eta_minutes}m {eta_seconds}s")
+                                overall_eta = batch_progress.overall_eta()
+                                batch_eta = f" | **Batch:** {int(overall_eta // 3600)}h {int(overall_eta % 3600 // 60)}m" if overall_eta else ""
+                                video_eta.markdown(f"**⏱️ ETA:** {eta_minutes}m {eta_seconds}s{batch_eta}")
                         
                         elif d['status'] == 'finished':
                             video_progress.progress(1.0)
@@ -2361,7 +5407,10 @@ with tab2:
                             update_batch_progress, 
                             batch_controller, 
                             this_start, 
-                            this_end
+                            this_end,
+                            skip_existing,
+                            dedupe,
+                            audio_format=audio_format
                         )
                         
                         # Update UI with final status
@@ -2510,19 +5559,24 @@ with tab3:
     if 'playlist_manager' not in st.session_state:
         st.session_state.playlist_manager = {
             'playlist_info': None,
-            'selected_videos': {},
-            'video_time_ranges': {},
-            'is_downloading': False,
-            'download_progress': {}
+            'pager': None,
+            'table': None
         }
     
     if playlist_url and st.button("🔍 Load Playlist", use_container_width=True, type="secondary"):
         with st.spinner("🔄 Loading playlist information..."):
-            playlist_info = get_playlist_info(playlist_url)
-            if playlist_info:
+            pager = PlaylistPager(playlist_url)
+            if pager.open():
+                # Only the first page is listed now; later pages are fetched as the user pages through
+                pager.load_until(PLAYLIST_PAGE_SIZE)
+                pager.prefetch(2 * PLAYLIST_PAGE_SIZE)
+                if st.session_state.playlist_manager.get('pager'):
+                    st.session_state.playlist_manager['pager'].close()
+                    get_entry_enrichment_pool().cancel(st.session_state.playlist_manager['pager'])
+                playlist_info = pager.playlist_info
+                st.session_state.playlist_manager['pager'] = pager
                 st.session_state.playlist_manager['playlist_info'] = playlist_info
-                st.session_state.playlist_manager['selected_videos'] = {}
-                st.session_state.playlist_manager['video_time_ranges'] = {}
+                st.session_state.playlist_manager['table'] = PlaylistTable()
                 st.success(f"✅ Loaded playlist: **{playlist_info.get('title', 'Unknown Playlist')}**")
                 st.rerun()
             else:
@@ -2531,305 +5585,336 @@ with tab3:
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Display playlist contents if loaded
-    if st.session_state.playlist_manager['playlist_info']:
-        playlist_info = st.session_state.playlist_manager['playlist_info']
-        entries = playlist_info.get('entries', [])
-
-        # Selection controls
-        st.markdown("#### 🎛️ Selection Controls")
-        selection_col1, selection_col2, selection_col3 = st.columns(3)
-
-        with selection_col1:
-            if st.button("✅ Select All", use_container_width=True, type="secondary"):
-                for i, entry in enumerate(entries):
-                    if entry:
-                        st.session_state.playlist_manager['selected_videos'][i] = True
-                st.rerun()
+    def playlist_manager_panel():
+        """Playlist table and download controls; returns True while listing or details are in progress"""
+        refresh_needed = False
+        if st.session_state.playlist_manager['playlist_info']:
+            playlist_info = st.session_state.playlist_manager['playlist_info']
+            pager = st.session_state.playlist_manager.get('pager')
+            entries = playlist_info.get('entries', [])
 
-        with selection_col2:
-            if st.button("❌ Deselect All", use_container_width=True, type="secondary"):
-                st.session_state.playlist_manager['selected_videos'] = {}
-                st.rerun()
+            table = st.session_state.playlist_manager.get('table')
+            if table is None:
+                table = st.session_state.playlist_manager['table'] = PlaylistTable()
+            table.sync(entries)
 
-        with selection_col3:
-            if st.button("🔄 Reset Time Ranges", use_container_width=True, type="secondary"):
-                st.session_state.playlist_manager['video_time_ranges'] = {}
-                st.rerun()
+            # Filters work on whole columns at once, so they stay fast with thousands of entries
+            st.markdown("#### 🔎 Filter & Sort")
+            filter_col1, filter_col2, filter_col3, filter_col4 = st.columns(4)
+            with filter_col1:
+                title_pattern = st.text_input("🔤 Title (regex)", key="playlist_title_filter", placeholder="e.g. live|remix")
+            with filter_col2:
+                known_durations = table.frame['duration'].dropna()
+                longest_minutes = int(known_durations.max() // 60) + 1 if len(known_durations) else 1
+                duration_range = st.slider("⏱️ Duration (minutes)", 0, max(longest_minutes, 1), (0, max(longest_minutes, 1)), key="playlist_duration_filter")
+            with filter_col3:
+                date_range = st.date_input("📅 Uploaded between", value=(), key="playlist_date_filter",
+                                           help="Upload dates are known once a video's details have been fetched")
+            with filter_col4:
+                sort_option = st.selectbox("🔃 Sort", list(PLAYLIST_SORT_OPTIONS), key="playlist_sort")
 
-        # Video list with selection and time range options
-        st.markdown("#### 🎬 Video Selection & Time Ranges")
+            full_duration_range = duration_range == (0, max(longest_minutes, 1))
+            filters = {
+                'min_duration': None if full_duration_range else duration_range[0] * 60,
+                'max_duration': None if full_duration_range else duration_range[1] * 60,
+                'title_pattern': title_pattern,
+                'date_from': date_range[0] if len(date_range) > 0 else None,
+                'date_to': date_range[1] if len(date_range) > 1 else None
+            }
+            try:
+                table.mask(**filters)
+            except re.error as e:
+                st.warning(f"⚠️ Invalid title pattern: {e}")
+                filters['title_pattern'] = None
+            filtering = any(value is not None and value != "" for value in filters.values())
+            view = table.view(table.mask(**filters), sort_option)
+            if table.sort_is_stale(sort_option):
+                # The order is kept while details fill in, so the grid doesn't reshuffle during edits
+                if st.button("🔃 Re-sort with the latest details", type="secondary"):
+                    table.resort(sort_option)
+                    st.rerun()
 
-        # Show videos in batches to avoid overwhelming the UI
-        videos_per_page = 10
-        total_pages = (len(entries) + videos_per_page - 1) // videos_per_page
+            # Selection controls
+            st.markdown("#### 🎛️ Selection Controls")
+            selection_col1, selection_col2, selection_col3 = st.columns(3)
 
-        if total_pages > 1:
-            page = st.selectbox("📄 Page", range(1, total_pages + 1), key="playlist_page") - 1
-        else:
-            page = 0
-
-        start_idx = page * videos_per_page
-        end_idx = min(start_idx + videos_per_page, len(entries))
-
-        for i in range(start_idx, end_idx):
-            entry = entries[i]
-            if entry:
-                video_id = entry.get('id', f'video_{i}')
-                video_title = entry.get('title', 'Unknown Title')
-                video_url = f"https://www.youtube.com/watch?v={video_id}"
-                duration = entry.get('duration')
-
-                with st.expander(f"🎬 {i+1}. {video_title}" + (f" ({duration//60}:{duration%60:02d})" if duration else ""), expanded=False):
-                    video_col1, video_col2 = st.columns([2, 3])
-
-                    with video_col1:
-                        # Video selection checkbox
-                        is_selected = st.checkbox(
-                            "✅ Select this video",
-                            value=st.session_state.playlist_manager['selected_videos'].get(i, False),
-                            key=f"select_video_{i}"
-                        )
+            with selection_col1:
+                if st.button(f"✅ Select All {len(view)} Matching" if filtering else "✅ Select All", use_container_width=True, type="secondary"):
+                    if pager and not pager.done and not filtering:
+                        with st.spinner("🔄 Listing the rest of the playlist..."):
+                            pager.load_until(None)
+                        table.sync(entries)
+                        view = table.view(table.mask(**filters), sort_option)
+                    table.set_selected(view.index, True)
+                    st.rerun()
 
-                        # Update session state and clean up dictionary
-                        if is_selected:
-                            st.session_state.playlist_manager['selected_videos'][i] = True
-                        else:
-                            # Remove from dictionary when deselected to keep it clean
-                            if i in st.session_state.playlist_manager['selected_videos']:
-                                del st.session_state.playlist_manager['selected_videos'][i]
+            with selection_col2:
+                if st.button(f"❌ Deselect {len(view)} Matching" if filtering else "❌ Deselect All", use_container_width=True, type="secondary"):
+                    table.set_selected(view.index, False)
+                    st.rerun()
 
-                        if is_selected:
-                            st.success("🎯 Selected for download")
-                        else:
-                            st.info("⏹️ Not selected")
-
-                        # Show video info
-                        st.markdown(f"**🔗 URL:** [{video_url[:40]}...]({video_url})")
-                        if duration:
-                            st.markdown(f"**⏱️ Duration:** {duration//60}:{duration%60:02d}")
-
-                    with video_col2:
-                        if is_selected:
-                            # Time range options for selected videos
-                            st.markdown("**⏱️ Download Options**")
-
-                            time_option = st.radio(
-                                "Choose download option:",
-                                ["📺 Complete Video", "✂️ Custom Time Range"],
-                                key=f"time_option_{i}",
-                                help=f"Select whether to download the complete video or a specific segment for video {i+1}"
-                            )
+            with selection_col3:
+                if st.button("🔄 Reset Time Ranges", use_container_width=True, type="secondary"):
+                    table.clear_time_ranges()
+                    st.rerun()
 
-                            if time_option == "✂️ Custom Time Range":
-                                time_col1, time_col2 = st.columns(2)
-
-                                with time_col1:
-                                    start_time = st.text_input(
-                                        "⏮️ Start Time",
-                                        value="00:00:00",
-                                        placeholder="00:01:30",
-                                        help="Format: HH:MM:SS or MM:SS",
-                                        key=f"start_time_{i}"
-                                    )
-
-                                with time_col2:
-                                    end_time = st.text_input(
-                                        "⏭️ End Time",
-                                        placeholder="00:05:00",
-                                        help="Format: HH:MM:SS or MM:SS. Leave empty for end of video.",
-                                        key=f"end_time_{i}"
-                                    )
-
-                                # Store time range in session state
-                                st.session_state.playlist_manager['video_time_ranges'][i] = {
-                                    'start': start_time if start_time != "00:00:00" else None,
-                                    'end': end_time if end_time else None
-                                }
-
-                                # Show duration calculation
-                                if start_time and end_time:
-                                    try:
-                                        def parse_time(time_str):
-                                            parts = time_str.split(':')
-                                            if len(parts) == 2:  # MM:SS
-                                                return int(parts[0]) * 60 + int(parts[1])
-                                            elif len(parts) == 3:  # HH:MM:SS
-                                                return int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
-                                            return 0
-
-                                        start_seconds = parse_time(start_time)
-                                        end_seconds = parse_time(end_time)
-
-                                        if end_seconds > start_seconds:
-                                            duration_seconds = end_seconds - start_seconds
-                                            duration_minutes = duration_seconds // 60
-                                            duration_secs = duration_seconds % 60
-                                            st.info(f"📊 **Segment Duration:** {duration_minutes}m {duration_secs}s")
-                                        else:
-                                            st.warning("⚠️ End time must be after start time")
-                                    except:
-                                        st.warning("⚠️ Please use valid time format (HH:MM:SS or MM:SS)")
-                            else:
-                                # Remove time range if complete video is selected
-                                if i in st.session_state.playlist_manager['video_time_ranges']:
-                                    del st.session_state.playlist_manager['video_time_ranges'][i]
-                        else:
-                            st.info("⏹️ Select this video to configure download options")
+            # One editable grid for selection and time ranges instead of widgets per video
+            st.markdown("#### 🎬 Video Selection & Time Ranges")
 
-        # Playlist overview (moved here to reflect latest state)
-        st.markdown("#### 📊 Playlist Overview")
-        overview_col1, overview_col2, overview_col3, overview_col4 = st.columns(4)
+            videos_per_page = PLAYLIST_PAGE_SIZE
+            total_known = pager.total if pager else len(entries)
+            if filtering or total_known is None:
+                listed_count = len(view)
+            else:
+                listed_count = total_known
+            total_pages = max(1, (listed_count + videos_per_page - 1) // videos_per_page)
+            if total_known is None and not filtering:
+                # Offer one page past what has been listed so far while the end isn't known yet
+                total_pages += 1
 
-        with overview_col1:
-            st.metric("🎬 Total Videos", len(entries))
-        with overview_col2:
-            selected_count = len([v for v in st.session_state.playlist_manager['selected_videos'].values() if v])
-            st.metric("✅ Selected", selected_count)
-        with overview_col3:
-            st.metric("🎯 Quality", quality)
-        with overview_col4:
-            st.metric("🎵 Audio Mode", audio_options[audio_choice])
+            if total_pages > 1:
+                page = st.selectbox("📄 Page", range(1, total_pages + 1), key="playlist_page") - 1
+            else:
+                page = 0
 
-        # Show pagination info
-        if total_pages > 1:
-            st.info(f"📄 Showing videos {start_idx + 1}-{end_idx} of {len(entries)} (Page {page + 1} of {total_pages})")
-        
-        # Download controls
-        selected_videos = [i for i, selected in st.session_state.playlist_manager['selected_videos'].items() if selected]
-        
-        if selected_videos:
-            st.markdown("---")
-            st.markdown("#### 🚀 Download Selected Videos")
+            if pager and not pager.done and not filtering:
+                with st.spinner("🔄 Loading page..."):
+                    pager.load_until((page + 1) * videos_per_page)
+                # Have the following page ready by the time the user gets there
+                pager.prefetch((page + 2) * videos_per_page)
+                table.sync(entries)
+                view = table.view(table.mask(**filters), sort_option)
+
+            page_view = view.iloc[page * videos_per_page:(page + 1) * videos_per_page]
+            start_idx = page * videos_per_page
+            end_idx = start_idx + len(page_view)
+
+            # Details for the rows being shown are fetched concurrently and fill in as they arrive
+            enrichment_pool = get_entry_enrichment_pool()
+            enrich_owner = pager or id(playlist_info)
+            shown_rows = hash(tuple(page_view.index))
+            if st.session_state.playlist_manager.get('enrich_page') != shown_rows:
+                enrichment_pool.cancel(enrich_owner)
+                st.session_state.playlist_manager['enrich_page'] = shown_rows
+            details_pending = enrichment_pool.enrich([entries[position] for position in page_view.index], enrich_owner, get_format_option(quality, audio_choice))
+
+            def format_duration(seconds):
+                if pd.isna(seconds):
+                    return "⏳"
+                minutes, seconds = divmod(int(seconds), 60)
+                hours, minutes = divmod(minutes, 60)
+                return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+            available = page_view['availability'].isna() | page_view['availability'].isin(['public', 'unlisted'])
+            grid = pd.DataFrame({
+                'Select': page_view['selected'],
+                '#': page_view.index + 1,
+                'Title': page_view['title'].where(available, '🚫 ' + page_view['title']),
+                'Duration': page_view['duration'].map(format_duration),
+                'Uploaded': page_view['upload_date'].dt.strftime('%Y-%m-%d').fillna('—'),
+                'Size (MB)': (page_view['filesize_estimate'] / (1024 * 1024)).round(1),
+                'Start': page_view['start_time'],
+                'End': page_view['end_time'],
+            }, index=page_view.index)
+            edited_grid = st.data_editor(
+                grid,
+                # Bulk actions and a different set of rows start a fresh grid, so stale edits aren't replayed
+                key=f"playlist_grid_{id(table)}_{table.version}_{shown_rows}",
+                use_container_width=True,
+                hide_index=True,
+                disabled=['#', 'Title', 'Duration', 'Uploaded', 'Size (MB)'],
+                column_config={
+                    'Start': st.column_config.TextColumn("⏮️ Start", help="HH:MM:SS or MM:SS, empty for the beginning"),
+                    'End': st.column_config.TextColumn("⏭️ End", help="HH:MM:SS or MM:SS, empty for the end of the video"),
+                }
+            )
+            table.apply_edits(edited_grid)
+            invalid_ranges = table.invalid_time_ranges()
+            if invalid_ranges:
+                st.warning(f"⚠️ Invalid time range for video {', '.join(str(position + 1) for position in invalid_ranges[:10])}"
+                           + (" ..." if len(invalid_ranges) > 10 else "") + " - use HH:MM:SS or MM:SS with the end after the start")
+
+            # Playlist overview (moved here to reflect latest state)
+            st.markdown("#### 📊 Playlist Overview")
+            overview_col1, overview_col2, overview_col3, overview_col4 = st.columns(4)
+
+            with overview_col1:
+                if pager and pager.total is None:
+                    st.metric("🎬 Total Videos", f"{len(entries)}+", help="Listed so far; the rest of the playlist is fetched as you page through")
+                else:
+                    st.metric("🎬 Total Videos", pager.total if pager else len(entries))
+            with overview_col2:
+                st.metric("✅ Selected", int(table.frame['selected'].sum()))
+            with overview_col3:
+                st.metric("🎯 Quality", quality)
+            with overview_col4:
+                st.metric("🎵 Audio Mode", audio_options[audio_choice])
+
+            # Show pagination info
+            if filtering:
+                st.info(f"🔎 {len(view)} of {len(table)} listed videos match" + (" - list all videos to filter the whole playlist" if pager and not pager.done else ""))
+            if total_pages > 1 and len(page_view):
+                st.info(f"📄 Showing videos {start_idx + 1}-{end_idx} of {len(view) if filtering else total_known or f'{len(entries)}+'} (Page {page + 1} of {total_pages})")
+            if pager and pager.error:
+                st.warning(f"⚠️ Listing stopped after {len(entries)} videos: {pager.error}")
+            elif pager and not pager.done:
+                if st.button("📥 List all videos in background", type="secondary"):
+                    pager.prefetch(None)
+                    st.rerun()
+                if pager.is_loading():
+                    st.caption(f"⏳ Listing playlist... {len(entries)} videos found so far")
+                    refresh_needed = True
+            if details_pending:
+                st.caption(f"⏳ Fetching details for {details_pending} videos...")
+                refresh_needed = True
             
-            download_col1, download_col2 = st.columns(2)
+            # Download controls
+            selected_videos = table.selected_positions()
             
-            with download_col1:
-                st.success(f"✅ **{len(selected_videos)} videos selected** for download")
+            if selected_videos:
+                st.markdown("---")
+                st.markdown("#### 🚀 Download Selected Videos")
                 
-                # Show summary of time ranges
-                segment_count = len([i for i in selected_videos if i in st.session_state.playlist_manager['video_time_ranges']])
-                if segment_count > 0:
-                    st.info(f"✂️ **{segment_count} videos** have custom time ranges")
-            
-            with download_col2:
-                if st.button("🚀 Download Selected Videos", use_container_width=True, type="primary"):
-                    # Prepare download list
-                    download_list = []
-                    for i in selected_videos:
-                        entry = entries[i]
-                        if entry:
-                            video_id = entry.get('id')
-                            video_url = f"https://www.youtube.com/watch?v={video_id}"
-                            video_title = entry.get('title', 'Unknown Title')
-                            
-                            # Get time range if set
-                            time_range = st.session_state.playlist_manager['video_time_ranges'].get(i, {})
-                            start_time = time_range.get('start')
-                            end_time = time_range.get('end')
-                            
-                            download_list.append({
-                                'url': video_url,
-                                'title': video_title,
-                                'index': i + 1,
-                                'start_time': start_time,
-                                'end_time': end_time
-                            })
+                download_col1, download_col2 = st.columns(2)
+                
+                with download_col1:
+                    st.success(f"✅ **{len(selected_videos)} videos selected** for download")
                     
-                    # Store in session state for download processing
-                    st.session_state.playlist_manager['download_list'] = download_list
-                    st.session_state.playlist_manager['is_downloading'] = True
-                    st.session_state.playlist_manager['current_download_index'] = 0
-                    st.session_state.playlist_manager['download_results'] = []
+                    # Show summary of time ranges
+                    segment_count = sum(1 for i in selected_videos if any(table.time_range(i).values()))
+                    if segment_count > 0:
+                        st.info(f"✂️ **{segment_count} videos** have custom time ranges")
                     
-                    st.success("🚀 Starting download of selected videos...")
-                    st.rerun()
-        else:
-            st.info("💡 Select videos above to enable download options")
-        
-        # Download progress section
-        if st.session_state.playlist_manager['is_downloading']:
+                    # Sizes already fetched for the table; the rest are estimated when the download starts
+                    selected_sizes = table.frame.loc[selected_videos, 'filesize_estimate']
+                    if selected_sizes.notna().any():
+                        st.caption(f"💾 ≈ {selected_sizes.sum() / (1024**3):.2f} GB for {int(selected_sizes.notna().sum())} sized videos, "
+                                   f"{(free_disk_bytes('downloads') or 0) / (1024**3):.2f} GB free")
+                
+                with download_col2:
+                    show_preflight_warning('playlist_manager')
+                    if st.button("🚀 Download Selected Videos", use_container_width=True, type="primary"):
+                        # Prepare download list
+                        download_list = []
+                        preflight_items = []
+                        format_option = get_format_option(quality, audio_choice)
+                        for i in selected_videos:
+                            entry = entries[i]
+                            if entry:
+                                video_id = entry.get('id')
+                                video_url = f"https://www.youtube.com/watch?v={video_id}"
+                                video_title = entry.get('title', 'Unknown Title')
+                                
+                                # Get time range if set
+                                time_range = table.time_range(i)
+                                start_time = time_range.get('start')
+                                end_time = time_range.get('end')
+                                
+                                download_list.append({
+                                    'url': video_url,
+                                    'title': video_title,
+                                    'index': i + 1,
+                                    'start_time': start_time,
+                                    'end_time': end_time
+                                })
+                                # Sizes fetched for the table are reused when they are for this format
+                                preflight_items.append({
+                                    'url': video_url,
+                                    'duration': entry.get('duration'),
+                                    'filesize_estimate': entry.get('filesize_estimate') if entry.get('estimate_format') == format_option else None
+                                })
+                        
+                        # Create download path
+                        download_path = os.path.join(os.getcwd(), "downloads")
+                        if create_subfolder:
+                            date_folder = datetime.now().strftime("%Y-%m-%d")
+                            download_path = os.path.join(download_path, date_folder)
+                        
+                        # Pre-flight check against free disk space
+                        with st.spinner(f"🧮 Estimating size of {len(download_list)} videos..."):
+                            preflight = plan_preflight(preflight_items, quality, audio_choice, download_path)
+                        if preflight['status'] == 'block':
+                            st.error(f"💾 Not enough disk space for these videos: {describe_preflight(preflight)}")
+                        else:
+                            flash_preflight_warning('playlist_manager', preflight)
+                            # Downloads run in the background and keep going across reruns and page reloads
+                            get_background_download_manager().submit(
+                                f"{playlist_info.get('title', 'Playlist')} - {len(download_list)} videos",
+                                download_list, quality, audio_choice, download_path, skip_existing, dedupe,
+                                workers=st.session_state.get('playlist_manager_workers', 2), audio_format=audio_format
+                            )
+                            st.success("🚀 Started downloading selected videos in the background")
+                            st.rerun()
+                    
+                    st.number_input("⚡ Parallel downloads", min_value=1, max_value=8, value=2, key="playlist_manager_workers",
+                                    help="How many of the selected videos download at once")
+            else:
+                st.info("💡 Select videos above to enable download options")
+        return refresh_needed
+    
+    live_panel("playlist_manager", playlist_manager_panel)
+    
+    # Background downloads from this and earlier sessions
+    def background_downloads_panel():
+        """Background downloads from this and earlier sessions; returns True while any batch is running"""
+        refresh_needed = False
+        download_manager = get_background_download_manager()
+        batches = download_manager.get_batches()
+        if batches:
             st.markdown("---")
-            st.markdown("### 🔄 Downloading Selected Videos")
-            
-            download_list = st.session_state.playlist_manager['download_list']
-            current_index = st.session_state.playlist_manager['current_download_index']
-            results = st.session_state.playlist_manager['download_results']
-            
-            # Overall progress
-            overall_progress = st.progress(current_index / len(download_list) if download_list else 0)
-            overall_status = st.empty()
-            
-            overall_status.markdown(f"**Downloading video {current_index + 1} of {len(download_list)}**")
+            st.markdown("### 🔄 Background Downloads")
             
-            # Current video info
-            if current_index < len(download_list):
-                current_video = download_list[current_index]
-                st.markdown(f"#### 🎬 Current: {current_video['title']}")
-                
-                # Create download path
-                download_path = os.path.join(os.getcwd(), "downloads")
-                if create_subfolder:
-                    date_folder = datetime.now().strftime("%Y-%m-%d")
-                    download_path = os.path.join(download_path, date_folder)
-                
-                # Download current video
-                with st.spinner(f"Downloading video {current_index + 1}..."):
-                    success, result = download_video(
-                        current_video['url'],
-                        quality,
-                        audio_choice,
-                        download_path,
-                        None,  # No progress callback for now
-                        None,  # No controller
-                        current_video['start_time'],
-                        current_video['end_time']
-                    )
-                
-                # Store result
-                results.append({
-                    'success': success,
-                    'title': current_video['title'],
-                    'result': result,
-                    'index': current_video['index']
-                })
-                
-                # Show result
-                if success:
-                    st.success(f"✅ Downloaded: {current_video['title']}")
-                else:
-                    st.error(f"❌ Failed: {current_video['title']} - {result}")
+            for batch in reversed(batches):
+                items = batch['items']
+                finished = sum(1 for item in items if item['status'] in FINISHED_ITEM_STATUSES)
+                success_count = sum(1 for item in items if item['status'] == 'completed')
+                active = download_manager.is_active(batch)
+                if active:
+                    refresh_needed = True
                 
-                # Move to next video
-                st.session_state.playlist_manager['current_download_index'] += 1
-                
-                # Check if all downloads complete
-                if st.session_state.playlist_manager['current_download_index'] >= len(download_list):
-                    # All downloads complete
-                    overall_progress.progress(1.0)
-                    overall_status.markdown("**✅ All downloads completed!**")
+                with st.expander(f"{'⏸️' if batch['paused'] and active else '🔄' if active else '✅'} {batch['title']} ({finished}/{len(items)})", expanded=active):
+                    st.progress(finished / len(items) if items else 1.0)
                     
-                    # Show final results
-                    success_count = sum(1 for r in results if r['success'])
-                    st.balloons()
-                    st.success(f"🎉 **Playlist download completed!** ✅ {success_count}/{len(results)} videos downloaded successfully")
+                    control_col1, control_col2, control_col3 = st.columns(3)
+                    with control_col1:
+                        if active and not batch['paused'] and st.button("⏸️ Pause", key=f"pause_{batch['id']}", use_container_width=True):
+                            download_manager.pause(batch['id'])
+                            st.rerun()
+                        if active and batch['paused'] and st.button("▶️ Resume", key=f"resume_{batch['id']}", use_container_width=True):
+                            download_manager.resume(batch['id'])
+                            st.rerun()
+                    with control_col2:
+                        if active and st.button("⏹️ Stop", key=f"stop_{batch['id']}", use_container_width=True):
+                            download_manager.stop(batch['id'])
+                            st.rerun()
+                    with control_col3:
+                        if not active and st.button("🗑️ Clear", key=f"clear_{batch['id']}", use_container_width=True):
+                            download_manager.remove(batch['id'])
+                            st.rerun()
                     
-                    # Reset download state
-                    st.session_state.playlist_manager['is_downloading'] = False
+                    if not active:
+                        st.success(f"🎉 **Completed!** ✅ {success_count}/{len(items)} videos downloaded successfully")
                     
-                    if st.button("📋 Download More Videos", use_container_width=True, type="secondary"):
-                        st.rerun()
-                else:
-                    # Continue with next video
-                    st.rerun()
-            
-            # Show completed downloads
-            if results:
-                st.markdown("#### 📊 Download Results")
-                for result in results:
-                    if result['success']:
-                        st.success(f"✅ Video {result['index']}: {result['title']}")
-                    else:
-                        st.error(f"❌ Video {result['index']}: {result['title']} - {result['result']}")
+                    status_icons = {'queued': '⏳', 'downloading': '🔄', 'processing': '⚙️', 'completed': '✅', 'failed': '❌', 'skipped': '⏭️', 'stopped': '⏹️'}
+                    for position, item in enumerate(items):
+                        item_col1, item_col2 = st.columns([5, 1])
+                        with item_col1:
+                            st.markdown(f"{status_icons.get(item['status'], '❓')} **Video {item['index']}:** {item['title']}")
+                            if item['status'] == 'downloading':
+                                progress = item['progress']
+                                st.progress(max(0, min(100, int(progress.progress))))
+                                st.caption("⏸️ Paused" if batch['paused'] else f"{progress.status or '🔄 Starting download...'} {progress.speed} {progress.eta}")
+                            elif item['status'] == 'processing':
+                                st.caption("⚙️ Trimming / converting...")
+                            elif item['status'] == 'failed':
+                                st.caption(f"❌ {item['result']}")
+                        with item_col2:
+                            if item['status'] in ('queued', 'downloading') and st.button("⏭️ Skip", key=f"skip_{batch['id']}_{position}"):
+                                download_manager.skip(batch['id'], position)
+                                st.rerun()
+        return refresh_needed
+    
+    live_panel("background_downloads", background_downloads_panel)
 
 with tab4:
     st.markdown("### ⏰ Download Scheduler")
@@ -2871,7 +5956,7 @@ with tab4:
     # Scheduler options
     scheduler_mode = st.radio(
         "What would you like to schedule?",
-        ["📹 Single Video", "📋 Batch Videos", "🎬 Playlist Selection"],
+        ["📹 Single Video", "📋 Batch Videos", "🎬 Playlist Selection", "🔁 Subscription", "🗄️ Channel Mirror"],
         help="Choose the type of download to schedule"
     )
     
@@ -2897,6 +5982,54 @@ with tab4:
     
     scheduled_datetime = datetime.combine(schedule_date, schedule_time)
     
+    queue_col1, queue_col2 = st.columns(2)
+    
+    with queue_col1:
+        priority_label = st.selectbox(
+            "🚦 Priority",
+            ["Normal", "High", "Low"],
+            help="When more jobs are due than can run at once, higher priority jobs start first; equal priorities run in due order"
+        )
+        schedule_priority = {"Low": -1, "Normal": 0, "High": 1}[priority_label]
+    
+    with queue_col2:
+        job_queue = get_scheduled_job_queue()
+        max_concurrent_jobs = st.number_input(
+            "🧵 Max concurrent jobs",
+            min_value=1,
+            max_value=8,
+            value=job_queue.max_concurrent_jobs,
+            help="Scheduled jobs beyond this limit wait in the queue"
+        )
+        if max_concurrent_jobs != job_queue.max_concurrent_jobs:
+            job_queue.set_max_concurrent_jobs(max_concurrent_jobs)
+    
+    throttle_status = get_throttle_controller().status()
+    if throttle_status['backoff_seconds'] > 0 or throttle_status['rate']:
+        rate_text = f", {throttle_status['rate'] / 1024:.0f} KB/s per download" if throttle_status['rate'] else ""
+        pause_text = f", pausing for {throttle_status['backoff_seconds']:.0f}s" if throttle_status['backoff_seconds'] > 0 else ""
+        st.warning(f"🚦 Throttling detected - downloads backed off to {throttle_status['limit']} at a time{rate_text}{pause_text}")
+    
+    # Off-peak window for batch and playlist jobs
+    window_settings = {}
+    if scheduler_mode in ["📋 Batch Videos", "🎬 Playlist Selection"]:
+        use_window = st.checkbox("🌙 Only download inside a daily off-peak window",
+                                 help="Videos are packed into windows by estimated size; the job pauses when a window ends and resumes in the next one")
+        if use_window:
+            window_col1, window_col2, window_col3 = st.columns(3)
+            with window_col1:
+                window_start_time = st.time_input("Window start", value=datetime.strptime("01:00", "%H:%M").time(), key="window_start")
+            with window_col2:
+                window_end_time = st.time_input("Window end", value=datetime.strptime("07:00", "%H:%M").time(), key="window_end")
+            with window_col3:
+                bandwidth_mbps = st.number_input("Bandwidth budget (Mbit/s, 0 = unlimited)", min_value=0.0, value=20.0, step=5.0)
+            window_settings = {
+                'window': {'start': window_start_time.strftime('%H:%M'), 'end': window_end_time.strftime('%H:%M')},
+                'bandwidth_mbps': bandwidth_mbps or None
+            }
+            window_start_at, window_end_at = get_download_window(window_settings['window'], scheduled_datetime)
+            st.caption(f"🌙 First window: {max(window_start_at, scheduled_datetime).strftime('%Y-%m-%d %H:%M')} - {window_end_at.strftime('%H:%M')}. Projected completion is shown once the job has estimated video sizes.")
+    
     if scheduled_datetime <= datetime.now():
         st.warning("⚠️ Please select a future date and time")
     else:
@@ -2940,14 +6073,19 @@ with tab4:
                     'end_time': end_time if end_time else None,
                     'scheduled_time': scheduled_datetime.isoformat(),
                     'status': 'scheduled',
+                    'priority': schedule_priority,
                     'created_time': datetime.now().isoformat(),
-                    'create_subfolder': create_subfolder
+                    'create_subfolder': create_subfolder,
+                    'skip_existing': skip_existing,
+                    'dedupe': dedupe,
+                    'audio_format': audio_format
                 }
                 
                 # Save to file
-                scheduled_downloads = get_scheduled_downloads()
-                scheduled_downloads.append(scheduled_download)
-                save_scheduled_downloads(scheduled_downloads)
+                with scheduled_downloads_lock():
+                    scheduled_downloads = get_scheduled_downloads()
+                    scheduled_downloads.append(scheduled_download)
+                    save_scheduled_downloads(scheduled_downloads)
                 
                 st.success(f"✅ Video scheduled for {scheduled_datetime.strftime('%Y-%m-%d %H:%M')}")
                 st.rerun()
@@ -2973,6 +6111,7 @@ with tab4:
             with time_col2:
                 batch_end_time = st.text_input("⏭️ End Time", key="batch_end")
         
+        show_preflight_warning('scheduled_batch')
         if st.button("⏰ Schedule Batch Videos", use_container_width=True, type="primary") and batch_urls:
             if scheduled_datetime > datetime.now():
                 urls = [url.strip() for url in batch_urls.split('\n') if url.strip()]
@@ -2986,42 +6125,65 @@ with tab4:
                         'end_time': batch_end_time if batch_end_time else None
                     })
                 
-                download_id = f"batch_{int(datetime.now().timestamp())}"
-                scheduled_download = {
-                    'id': download_id,
-                    'type': 'batch',
-                    'title': f"Batch Download - {len(urls)} videos",
-                    'urls': url_data,
-                    'quality': quality,
-                    'audio_choice': audio_choice,
-                    'scheduled_time': scheduled_datetime.isoformat(),
-                    'status': 'scheduled',
-                    'created_time': datetime.now().isoformat(),
-                    'create_subfolder': create_subfolder
-                }
-                
-                scheduled_downloads = get_scheduled_downloads()
-                scheduled_downloads.append(scheduled_download)
-                save_scheduled_downloads(scheduled_downloads)
+                # Pre-flight sizes are kept on each item for the disk check, window packing and ETA at run time
+                with st.spinner(f"🧮 Estimating size of {len(urls)} videos..."):
+                    preflight = plan_preflight(url_data, quality, audio_choice, os.path.join(os.getcwd(), "downloads"))
+                for item, plan_item in zip(url_data, preflight['items']):
+                    item['filesize_estimate'] = plan_item['bytes'] if plan_item['known'] else None
+                    item['duration'] = plan_item['duration']
                 
-                st.success(f"✅ Batch of {len(urls)} videos scheduled for {scheduled_datetime.strftime('%Y-%m-%d %H:%M')}")
-                st.rerun()
+                if preflight['status'] == 'block':
+                    st.error(f"💾 Not enough disk space for this batch: {describe_preflight(preflight)}")
+                else:
+                    flash_preflight_warning('scheduled_batch', preflight)
+                    download_id = f"batch_{int(datetime.now().timestamp())}"
+                    scheduled_download = {
+                        'id': download_id,
+                        'type': 'batch',
+                        'title': f"Batch Download - {len(urls)} videos",
+                        'urls': url_data,
+                        'quality': quality,
+                        'audio_choice': audio_choice,
+                        'scheduled_time': scheduled_datetime.isoformat(),
+                        'status': 'scheduled',
+                        'priority': schedule_priority,
+                        'created_time': datetime.now().isoformat(),
+                        'create_subfolder': create_subfolder,
+                        'skip_existing': skip_existing,
+                        'dedupe': dedupe,
+                        'audio_format': audio_format,
+                        'estimated_bytes': preflight['total_bytes'],
+                        'estimated_duration': preflight['total_duration'],
+                        **window_settings
+                    }
+                    
+                    with scheduled_downloads_lock():
+                        scheduled_downloads = get_scheduled_downloads()
+                        scheduled_downloads.append(scheduled_download)
+                        save_scheduled_downloads(scheduled_downloads)
+                    
+                    st.success(f"✅ Batch of {len(urls)} videos scheduled for {scheduled_datetime.strftime('%Y-%m-%d %H:%M')}")
+                    st.rerun()
     
     elif scheduler_mode == "🎬 Playlist Selection":
         # Playlist selection scheduling
         st.info("🔄 To schedule playlist selections, first load a playlist in the Playlist Manager tab, select your videos, then return here to schedule them.")
         
         # Check if there are selected videos in playlist manager
-        if 'playlist_manager' in st.session_state and st.session_state.playlist_manager.get('selected_videos'):
-            selected_videos = [i for i, selected in st.session_state.playlist_manager['selected_videos'].items() if selected]
+        if 'playlist_manager' in st.session_state and st.session_state.playlist_manager.get('table') is not None:
+            playlist_table = st.session_state.playlist_manager['table']
+            selected_videos = playlist_table.selected_positions()
             playlist_info = st.session_state.playlist_manager.get('playlist_info')
             
             if selected_videos and playlist_info:
                 entries = playlist_info.get('entries', [])
                 st.success(f"✅ Found {len(selected_videos)} selected videos from playlist: {playlist_info.get('title', 'Unknown')}")
                 
+                show_preflight_warning('scheduled_playlist')
                 if st.button("⏰ Schedule Selected Playlist Videos", use_container_width=True, type="primary"):
                     if scheduled_datetime > datetime.now():
+                        format_option = get_format_option(quality, audio_choice)
+                        
                         # Create video data
                         video_data = []
                         for i in selected_videos:
@@ -3031,38 +6193,174 @@ with tab4:
                                 video_url = f"https://www.youtube.com/watch?v={video_id}"
                                 
                                 # Get time range if set
-                                time_range = st.session_state.playlist_manager['video_time_ranges'].get(i, {})
+                                time_range = playlist_table.time_range(i)
                                 
                                 video_data.append({
                                     'url': video_url,
                                     'title': entry.get('title', 'Unknown'),
                                     'start_time': time_range.get('start'),
-                                    'end_time': time_range.get('end')
+                                    'end_time': time_range.get('end'),
+                                    'duration': entry.get('duration'),
+                                    'filesize_estimate': entry.get('filesize_estimate') if entry.get('estimate_format') == format_option else None
                                 })
                         
-                        download_id = f"playlist_{int(datetime.now().timestamp())}"
-                        scheduled_download = {
-                            'id': download_id,
-                            'type': 'playlist',
-                            'title': f"Playlist Selection - {len(video_data)} videos",
-                            'videos': video_data,
-                            'quality': quality,
-                            'audio_choice': audio_choice,
-                            'scheduled_time': scheduled_datetime.isoformat(),
-                            'status': 'scheduled',
-                            'created_time': datetime.now().isoformat(),
-                            'create_subfolder': create_subfolder
-                        }
-                        
-                        scheduled_downloads = get_scheduled_downloads()
-                        scheduled_downloads.append(scheduled_download)
-                        save_scheduled_downloads(scheduled_downloads)
+                        # Sizes for all selected videos are resolved at once, reusing any the Playlist Manager fetched
+                        with st.spinner(f"🧮 Estimating size of {len(video_data)} videos..."):
+                            preflight = plan_preflight(video_data, quality, audio_choice, os.path.join(os.getcwd(), "downloads"))
+                        for video, plan_item in zip(video_data, preflight['items']):
+                            video['filesize_estimate'] = plan_item['bytes'] if plan_item['known'] else None
+                            video['duration'] = plan_item['duration']
                         
-                        st.success(f"✅ {len(video_data)} playlist videos scheduled for {scheduled_datetime.strftime('%Y-%m-%d %H:%M')}")
-                        st.rerun()
+                        if preflight['status'] == 'block':
+                            st.error(f"💾 Not enough disk space for these videos: {describe_preflight(preflight)}")
+                        else:
+                            flash_preflight_warning('scheduled_playlist', preflight)
+                            download_id = f"playlist_{int(datetime.now().timestamp())}"
+                            scheduled_download = {
+                                'id': download_id,
+                                'type': 'playlist',
+                                'title': f"Playlist Selection - {len(video_data)} videos",
+                                'videos': video_data,
+                                'quality': quality,
+                                'audio_choice': audio_choice,
+                                'scheduled_time': scheduled_datetime.isoformat(),
+                                'status': 'scheduled',
+                                'priority': schedule_priority,
+                                'created_time': datetime.now().isoformat(),
+                                'create_subfolder': create_subfolder,
+                                'skip_existing': skip_existing,
+                                'dedupe': dedupe,
+                                'audio_format': audio_format,
+                                'estimated_bytes': preflight['total_bytes'],
+                                'estimated_duration': preflight['total_duration'],
+                                **window_settings
+                            }
+                            
+                            with scheduled_downloads_lock():
+                                scheduled_downloads = get_scheduled_downloads()
+                                scheduled_downloads.append(scheduled_download)
+                                save_scheduled_downloads(scheduled_downloads)
+                            
+                            st.success(f"✅ {len(video_data)} playlist videos scheduled for {scheduled_datetime.strftime('%Y-%m-%d %H:%M')}")
+                            st.rerun()
         else:
             st.info("💡 No videos selected in Playlist Manager. Please go to the Playlist Manager tab first.")
     
+    elif scheduler_mode == "🔁 Subscription":
+        # Recurring playlist/channel sync
+        st.info("🔁 A subscription checks a playlist or channel on a schedule and downloads only videos it has not seen before. The first run starts at the date and time above.")
+        
+        subscription_url = st.text_input("🔗 Playlist or Channel URL", placeholder="https://www.youtube.com/@channel or https://www.youtube.com/playlist?list=...")
+        
+        recurrence_col1, recurrence_col2 = st.columns(2)
+        with recurrence_col1:
+            recurrence_type = st.radio("Repeat:", ["⏱️ Interval", "📆 Cron Expression"], key="subscription_recurrence")
+        with recurrence_col2:
+            if recurrence_type == "⏱️ Interval":
+                interval_hours = st.number_input("Every (hours)", min_value=0.25, value=24.0, step=0.25)
+                recurrence = {'type': 'interval', 'minutes': int(interval_hours * 60)}
+            else:
+                cron_expression = st.text_input("Cron (minute hour day month weekday)", value="0 3 * * *",
+                                                help="For example `0 3 * * *` runs daily at 03:00, `30 */6 * * 1-5` every 6 hours on weekdays")
+                recurrence = {'type': 'cron', 'expression': cron_expression}
+        
+        option_col1, option_col2, option_col3 = st.columns(3)
+        with option_col1:
+            is_channel = bool(CHANNEL_URL_PATTERN.match(subscription_url.strip())) or '/videos' in subscription_url
+            newest_first = st.checkbox("🆕 Newest videos listed first", value=is_channel or 'list=UU' in subscription_url,
+                                       help="Channels and uploads playlists list newest first, so each run stops at the first known video. Most other playlists add new videos at the end and are listed in full")
+        with option_col2:
+            download_existing = st.checkbox("📥 Download existing videos on first run", value=False)
+        with option_col3:
+            max_items = st.number_input("Max new videos per run (0 = all)", min_value=0, value=0,
+                                        help="For newest-first sources, older new videos beyond this limit are skipped")
+        
+        recurrence_error = None
+        try:
+            first_run_preview = compute_next_run(recurrence, scheduled_datetime, scheduled_datetime)
+            st.caption(f"🔁 Repeats {describe_recurrence(recurrence)}, next after the first run: {first_run_preview.strftime('%Y-%m-%d %H:%M')}")
+        except ValueError as e:
+            recurrence_error = str(e)
+            st.error(f"❌ {recurrence_error}")
+        
+        if st.button("⏰ Create Subscription", use_container_width=True, type="primary") and subscription_url and not recurrence_error:
+            if scheduled_datetime > datetime.now():
+                scheduled_download = {
+                    'id': f"subscription_{int(datetime.now().timestamp())}",
+                    'type': 'subscription',
+                    'title': f"Subscription - {subscription_url[:50]}",
+                    'url': normalize_subscription_url(subscription_url),
+                    'recurrence': recurrence,
+                    'newest_first': newest_first,
+                    'download_existing': download_existing,
+                    'max_items': max_items,
+                    'seen_ids': [],
+                    'quality': quality,
+                    'audio_choice': audio_choice,
+                    'scheduled_time': scheduled_datetime.isoformat(),
+                    'status': 'scheduled',
+                    'priority': schedule_priority,
+                    'created_time': datetime.now().isoformat(),
+                    'create_subfolder': create_subfolder,
+                    'skip_existing': skip_existing,
+                    'dedupe': dedupe,
+                    'audio_format': audio_format
+                }
+                
+                with scheduled_downloads_lock():
+                    scheduled_downloads = get_scheduled_downloads()
+                    scheduled_downloads.append(scheduled_download)
+                    save_scheduled_downloads(scheduled_downloads)
+                
+                st.success(f"✅ Subscription created, first sync at {scheduled_datetime.strftime('%Y-%m-%d %H:%M')}")
+                st.rerun()
+    
+    elif scheduler_mode == "🗄️ Channel Mirror":
+        # Whole-channel archive that survives restarts
+        st.info("🗄️ A channel mirror lists every upload of a channel and downloads all of them. Listing and per-video results are saved as it goes, so a large channel can be mirrored over several runs and restarts without listing it again from the start.")
+        
+        mirror_url = st.text_input("🔗 Channel URL", placeholder="https://www.youtube.com/@channel")
+        mirror_base_url = channel_base_url(mirror_url) if mirror_url else None
+        if mirror_url and not mirror_base_url:
+            st.error("❌ Please enter a channel URL (e.g. https://www.youtube.com/@channel)")
+        
+        mirror_col1, mirror_col2, mirror_col3 = st.columns(3)
+        with mirror_col1:
+            include_shorts = st.checkbox("📱 Include Shorts", value=False)
+        with mirror_col2:
+            include_streams = st.checkbox("🔴 Include live streams", value=False)
+        with mirror_col3:
+            mirror_workers = st.number_input("⚡ Parallel downloads", min_value=1, max_value=8, value=2, key="mirror_workers")
+        
+        if st.button("⏰ Create Channel Mirror", use_container_width=True, type="primary") and mirror_base_url:
+            if scheduled_datetime > datetime.now():
+                mirror_id = f"mirror_{int(datetime.now().timestamp())}"
+                scheduled_download = {
+                    'id': mirror_id,
+                    'type': 'mirror',
+                    'mirror_id': mirror_id,
+                    'title': mirror_base_url.rsplit('/', 1)[-1],
+                    'url': mirror_base_url,
+                    'tabs': [tab for tab, included in zip(MIRROR_TABS, (True, include_shorts, include_streams)) if included],
+                    'workers': mirror_workers,
+                    'quality': quality,
+                    'audio_choice': audio_choice,
+                    'scheduled_time': scheduled_datetime.isoformat(),
+                    'status': 'scheduled',
+                    'priority': schedule_priority,
+                    'created_time': datetime.now().isoformat(),
+                    'dedupe': dedupe,
+                    'audio_format': audio_format
+                }
+                
+                with scheduled_downloads_lock():
+                    scheduled_downloads = get_scheduled_downloads()
+                    scheduled_downloads.append(scheduled_download)
+                    save_scheduled_downloads(scheduled_downloads)
+                
+                st.success(f"✅ Channel mirror scheduled for {scheduled_datetime.strftime('%Y-%m-%d %H:%M')}")
+                st.rerun()
+    
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Calendar and Scheduled Downloads Section
@@ -3089,6 +6387,7 @@ with tab4:
                 with status_col:
                     status_colors = {
                         'scheduled': '🟦',
+                        'queued': '🟪',
                         'downloading': '🟡',
                         'completed': '🟢',
                         'failed': '🔴'
@@ -3096,6 +6395,14 @@ with tab4:
                     status_icon = status_colors.get(download['status'], '⚪')
                     st.markdown(f"**Status:** {status_icon} {download['status'].title()}")
                     
+                    # Show queue position and how long the job has been waiting for a free slot
+                    if download['status'] == 'queued':
+                        if download.get('queue_position'):
+                            st.caption(f"🔢 Position {download['queue_position']} in queue")
+                        if download.get('queued_at'):
+                            waited = (datetime.now() - datetime.fromisoformat(download['queued_at'])).total_seconds()
+                            st.caption(f"⏳ Waiting {int(waited // 60)}m {int(waited % 60)}s")
+                    
                     # Show real-time progress for downloading items
                     if download['status'] == 'downloading' and 'progress' in download:
                         progress_info = download['progress']
@@ -3118,13 +6425,17 @@ with tab4:
                                     eta_sec = int(progress_info['eta'] % 60)
                                     st.caption(f"⏱️ ETA: {eta_min}m {eta_sec}s")
                         
-                        elif download['type'] in ['batch', 'playlist']:
+                        elif download['type'] in ['batch', 'playlist', 'mirror']:
                             # Batch/Playlist progress
+                            if progress_info.get('status') == 'listing':
+                                st.caption(f"📜 Listing channel, {progress_info.get('listed', 0)} videos so far")
                             if 'current_video' in progress_info and 'total_videos' in progress_info:
                                 overall_progress = progress_info.get('batch_progress', progress_info.get('playlist_progress', 0))
                                 st.progress(overall_progress / 100)
                                 st.caption(f"📊 Video {progress_info['current_video']}/{progress_info['total_videos']}")
                                 st.caption(f"📈 {overall_progress:.1f}% overall")
+                                if progress_info.get('job_eta'):
+                                    st.caption(f"⏱️ Job ETA: {int(progress_info['job_eta'] // 3600)}h {int(progress_info['job_eta'] % 3600 // 60)}m")
                                 
                                 # Current video progress
                                 if 'video_progress' in progress_info:
@@ -3140,6 +6451,39 @@ with tab4:
                     st.markdown(f"**Type:** {download['type'].title()}")
                     st.markdown(f"**Quality:** {download.get('quality', 'N/A')}")
                     st.markdown(f"**Audio:** {download.get('audio_choice', 'N/A')}")
+                    if is_audio_only(download.get('quality'), download.get('audio_choice')):
+                        st.markdown(f"**Audio format:** {audio_format_label(download.get('audio_format'))}")
+                    if download.get('priority'):
+                        st.markdown(f"**Priority:** {download['priority']}")
+                    if download.get('retry_count'):
+                        st.markdown(f"**Retries:** {download['retry_count']}/{MAX_SCHEDULED_RETRIES}")
+                    if download.get('window'):
+                        budget = f", {download['bandwidth_mbps']:g} Mbit/s" if download.get('bandwidth_mbps') else ""
+                        st.markdown(f"**Window:** {download['window']['start']}-{download['window']['end']}{budget}")
+                        items_total = len(download.get('urls') or download.get('videos') or [])
+                        st.markdown(f"**Done:** {len(download.get('item_results', {}))}/{items_total} videos")
+                        if download.get('projected_completion') and download['status'] != 'completed':
+                            windows_left = len(download.get('window_plan', []))
+                            st.markdown(f"**Projected completion:** {datetime.fromisoformat(download['projected_completion']).strftime('%Y-%m-%d %H:%M')} ({windows_left} window(s) left)")
+                    if download['type'] == 'subscription':
+                        st.markdown(f"**Repeats:** {describe_recurrence(download['recurrence'])}")
+                        st.markdown(f"**Known videos:** {len(download.get('seen_ids', []))}")
+                        if download.get('last_synced'):
+                            st.markdown(f"**Last sync:** {datetime.fromisoformat(download['last_synced']).strftime('%Y-%m-%d %H:%M')}")
+                    if download.get('estimated_bytes'):
+                        st.markdown(f"**Estimated size:** {download['estimated_bytes'] / (1024**3):.2f} GB")
+                    if download['type'] == 'mirror':
+                        st.markdown(f"**Tabs:** {', '.join(download.get('tabs', []))}")
+                        mirror_state = load_mirror_state(download['mirror_id'])
+                        if mirror_state:
+                            listing_done = all(cursor.get('complete') for cursor in mirror_state['cursor'].values())
+                            mirrored = sum(1 for item_result in mirror_state['items'].values() if item_result['success'])
+                            st.markdown(f"**Listed:** {len(mirror_state['videos'])} videos{'' if listing_done else ' (listing)'}")
+                            st.markdown(f"**Mirrored:** {mirrored}/{len(mirror_state['videos'])}")
+                    if download.get('lease_owner') and download['status'] in LEASED_STATUSES:
+                        st.markdown(f"**Claimed by:** `{download['lease_owner']}`")
+                    if download.get('lease_takeovers'):
+                        st.markdown(f"**Taken over:** {download['lease_takeovers']}x after an expired lease")
                     
                     # Show additional details for downloading items
                     if download['status'] == 'downloading' and 'progress' in download:
@@ -3147,7 +6491,7 @@ with tab4:
                         
                         if download['type'] == 'batch' and 'current_url' in progress_info:
                             st.markdown(f"**Current URL:** `{progress_info['current_url'][:40]}...`")
-                        elif download['type'] == 'playlist' and 'current_title' in progress_info:
+                        elif download['type'] in ('playlist', 'mirror') and 'current_title' in progress_info:
                             st.markdown(f"**Current Video:** {progress_info['current_title'][:30]}...")
                         
                         if 'filename' in progress_info and progress_info['filename']:
@@ -3158,11 +6502,12 @@ with tab4:
                         st.markdown(f"**Result:** {download['result']}")
                 
                 with actions_col:
-                    if download['status'] == 'scheduled':
+                    if download['status'] in ('scheduled', 'queued'):
                         if st.button(f"🗑️ Cancel", key=f"cancel_{download['id']}"):
                             # Remove from scheduled downloads
-                            updated_downloads = [d for d in scheduled_downloads if d['id'] != download['id']]
-                            save_scheduled_downloads(updated_downloads)
+                            with scheduled_downloads_lock():
+                                updated_downloads = [d for d in get_scheduled_downloads() if d['id'] != download['id']]
+                                save_scheduled_downloads(updated_downloads)
                             st.success("🗑️ Download cancelled")
                             st.rerun()
                     
@@ -3171,24 +6516,52 @@ with tab4:
                         # Auto-refresh button for real-time updates
                         if st.button("🔄 Refresh Progress", key=f"refresh_{download['id']}"):
                             st.rerun()
+                    
+                    elif download['status'] in ('completed', 'failed') and get_failed_items(download):
+                        failed_count = len(get_failed_items(download))
+                        if st.button(f"🔁 Retry {failed_count} failed", key=f"retry_{download['id']}",
+                                     help="Download only the videos that failed; finished videos are kept"):
+                            retry_failed_items(download['id'])
+                            st.success(f"🔁 {failed_count} videos queued again")
+                            st.rerun()
+                
+                # Per-video state for batch and playlist jobs
+                if download.get('item_results'):
+                    items = download.get('urls') or download.get('videos') or []
+                    item_rows = []
+                    for index, item in enumerate(items):
+                        item_result = download['item_results'].get(str(index), {})
+                        item_rows.append({
+                            '#': index + 1,
+                            'Video': item.get('title') or item.get('url'),
+                            'Status': item_result.get('status', 'pending'),
+                            'Error Class': item_result.get('error_class', ''),
+                            'Output': os.path.basename(item_result['output_path']) if item_result.get('output_path') else '',
+                            'Error': item_result.get('result', '') if item_result.get('success') is False else ''
+                        })
+                    st.dataframe(item_rows, use_container_width=True, hide_index=True)
         
         # Statistics
         st.markdown("#### 📊 Scheduler Statistics")
-        stats_col1, stats_col2, stats_col3, stats_col4 = st.columns(4)
+        stats_col1, stats_col2, stats_col3, stats_col4, stats_col5 = st.columns(5)
         
         with stats_col1:
             scheduled_count = len([d for d in scheduled_downloads if d['status'] == 'scheduled'])
             st.metric("📅 Scheduled", scheduled_count)
         
         with stats_col2:
+            queued_count = len([d for d in scheduled_downloads if d['status'] == 'queued'])
+            st.metric("⏳ Queued", queued_count)
+        
+        with stats_col3:
             downloading_count = len([d for d in scheduled_downloads if d['status'] == 'downloading'])
             st.metric("⬇️ Downloading", downloading_count)
         
-        with stats_col3:
+        with stats_col4:
             completed_count = len([d for d in scheduled_downloads if d['status'] == 'completed'])
             st.metric("✅ Completed", completed_count)
         
-        with stats_col4:
+        with stats_col5:
             failed_count = len([d for d in scheduled_downloads if d['status'] == 'failed'])
             st.metric("❌ Failed", failed_count)
     else:
@@ -3260,6 +6633,10 @@ with tab5:
                             st.markdown(f"**💾 Size:** {size_mb:.2f} MB")
                         
                         if os.path.exists(record['file_path']):
+                            file_stats = os.stat(record['file_path'])
+                            media_info = get_media_probe_cache().get(record['file_path'], file_stats.st_size, file_stats.st_mtime)
+                            duration, resolution, codecs = format_media_info(media_info)
+                            st.markdown(f"**⏱️ Duration:** {duration} • **📺 Resolution:** {resolution} • **🎞️ Codecs:** {codecs}")
                             st.success("✅ File exists")
                         else:
                             st.error("❌ File not found")
@@ -3278,18 +6655,11 @@ with tab6:
     download_base_path = os.path.join(os.getcwd(), "downloads")
     
     if os.path.exists(download_base_path):
-        # Calculate total size and file count
-        total_size = 0
-        file_count = 0
-        
-        for root, dirs, files in os.walk(download_base_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                if os.path.exists(file_path):
-                    total_size += os.path.getsize(file_path)
-                    file_count += 1
-        
-
+        # Totals come from the inventory index, which only rescans changed directories
+        file_inventory = get_file_inventory(download_base_path)
+        file_inventory.refresh()
+        total_size = file_inventory.total_size
+        file_count = file_inventory.file_count
         
         # Storage overview cards
         overview_col1, overview_col2, overview_col3, overview_col4 = st.columns(4)
@@ -3312,94 +6682,174 @@ with tab6:
         
         with management_col1:
             st.markdown("#### 🎛️ Quick Actions")
+            if os.path.exists(os.path.join(download_base_path, ".blobs")):
+                if st.button("🧹 Clean Unused Blobs", type="secondary", help="Remove deduplicated blobs no longer linked from any file"):
+                    removed_count, removed_bytes = prune_blob_store(os.path.join(download_base_path, ".blobs"))
+                    st.success(f"🧹 Removed {removed_count} unused blobs ({removed_bytes / (1024**2):.1f} MB)")
             
         with management_col2:
-            sort_option = st.selectbox("📊 Sort by:", ["Newest First", "Oldest First", "Largest First", "Smallest First", "Name A-Z", "Name Z-A"])
-        
-        st.markdown("#### � Downloaded Files")
-        
-        # Get all files recursively
-        all_files = []
-        for root, dirs, files in os.walk(download_base_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                rel_path = os.path.relpath(file_path, download_base_path)
-                if os.path.exists(file_path):
-                    file_stats = os.stat(file_path)
-                    file_size = file_stats.st_size / (1024 * 1024)  # Convert to MB
-                    mod_time = datetime.fromtimestamp(file_stats.st_mtime)
-                    
-                    all_files.append({
-                        'name': file,
-                        'path': rel_path,
-                        'size': file_size,
-                        'modified': mod_time,
-                        'full_path': file_path
-                    })
+            sort_option = st.selectbox("📊 Sort by:", ["Newest First", "Oldest First", "Largest First", "Smallest First", "Name A-Z", "Name Z-A", "Longest First", "Shortest First", "Highest Resolution"])
         
-        # Sort files based on selection
-        if sort_option == "Newest First":
-            all_files.sort(key=lambda x: x['modified'], reverse=True)
-        elif sort_option == "Oldest First":
-            all_files.sort(key=lambda x: x['modified'])
-        elif sort_option == "Largest First":
-            all_files.sort(key=lambda x: x['size'], reverse=True)
-        elif sort_option == "Smallest First":
-            all_files.sort(key=lambda x: x['size'])
-        elif sort_option == "Name A-Z":
-            all_files.sort(key=lambda x: x['name'].lower())
-        elif sort_option == "Name Z-A":
-            all_files.sort(key=lambda x: x['name'].lower(), reverse=True)
-        
-        # Display files in modern cards
-        if all_files:
-            for file_info in all_files:
-                with st.container():
-                    st.markdown('<div class="file-item">', unsafe_allow_html=True)
-                    
-                    file_col1, file_col2, file_col3, file_col4 = st.columns([4, 1, 1, 1])
-                    
-                    with file_col1:
-                        # File icon based on extension
-                        ext = os.path.splitext(file_info['name'])[1].lower()
-                        if ext in ['.mp4', '.avi', '.mkv', '.mov']:
-                            icon = "🎬"
-                        elif ext in ['.mp3', '.wav', '.flac', '.aac']:
-                            icon = "🎵"
-                        else:
-                            icon = "📄"
-                        
-                        st.markdown(f"**{icon} {file_info['name']}**")
-                        if file_info['path'] != file_info['name']:  # Show subfolder
-                            st.caption(f"📁 {os.path.dirname(file_info['path'])}")
-                    
-                    with file_col2:
-                        st.markdown(f"**{file_info['size']:.1f} MB**")
-                    
-                    with file_col3:
-                        st.markdown(f"**{file_info['modified'].strftime('%Y-%m-%d')}**")
-                        st.caption(file_info['modified'].strftime('%H:%M'))
-                    
-                    with file_col4:
-                        delete_key = f"delete_{hash(file_info['full_path'])}"
-                        if st.button("🗑️", key=delete_key, help="Delete file", type="secondary"):
-                            try:
-                                os.remove(file_info['full_path'])
-                                st.success(f"🗑️ Deleted {file_info['name']}")
-                                st.rerun()
-                            except Exception as e:
-                                st.error(f"❌ Error deleting file: {e}")
-                    
-                    st.markdown('</div>', unsafe_allow_html=True)
+        # Filters are applied to the index, so only the visible page is built
+        extensions, subfolders = file_inventory.facets()
+        filter_col1, filter_col2, filter_col3 = st.columns([2, 1, 1])
+        with filter_col1:
+            name_filter = st.text_input("🔍 Filter by name", placeholder="Part of the file name...", key="file_manager_name_filter")
+        with filter_col2:
+            extension_filter = st.multiselect("🧩 Extensions", extensions, key="file_manager_extensions")
+        with filter_col3:
+            subfolder_choice = st.selectbox("📁 Subfolder", ["All folders"] + [folder if folder else "(downloads root)" for folder in subfolders], key="file_manager_subfolder")
+        
+        filter_col4, filter_col5, filter_col6 = st.columns(3)
+        with filter_col4:
+            min_size_mb = st.number_input("📏 Min size (MB)", min_value=0.0, value=0.0, step=10.0, key="file_manager_min_size")
+        with filter_col5:
+            max_size_mb = st.number_input("📏 Max size (MB, 0 = no limit)", min_value=0.0, value=0.0, step=10.0, key="file_manager_max_size")
+        with filter_col6:
+            date_range = st.date_input("📅 Modified between", value=(), key="file_manager_dates")
+        
+        subfolder_filter = None
+        if subfolder_choice != "All folders":
+            subfolder_filter = "" if subfolder_choice == "(downloads root)" else subfolder_choice
+        modified_from = modified_to = None
+        if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
+            modified_from = datetime.combine(date_range[0], datetime.min.time()).timestamp()
+            modified_to = datetime.combine(date_range[1], datetime.max.time()).timestamp()
+        
+        page_col1, page_col2 = st.columns([1, 3])
+        with page_col1:
+            page_size = st.selectbox("📄 Files per page", [25, 50, 100, 250], index=1, key="file_manager_page_size")
+        
+        sort_options = {
+            "Newest First": ("modified", True),
+            "Oldest First": ("modified", False),
+            "Largest First": ("size", True),
+            "Smallest First": ("size", False),
+            "Name A-Z": ("name", False),
+            "Name Z-A": ("name", True),
+            "Longest First": ("duration", True),
+            "Shortest First": ("duration", False),
+            "Highest Resolution": ("resolution", True)
+        }
+        sort_key, sort_reverse = sort_options[sort_option]
+        media_probe_cache = get_media_probe_cache()
+        query_args = {
+            'sort_key': sort_key,
+            'reverse': sort_reverse,
+            'name_filter': name_filter,
+            'extensions': extension_filter,
+            'subfolder': subfolder_filter,
+            'min_size': min_size_mb * 1024 * 1024 if min_size_mb > 0 else None,
+            'max_size': max_size_mb * 1024 * 1024 if max_size_mb > 0 else None,
+            'modified_from': modified_from,
+            'modified_to': modified_to
+        }
+        _, match_count = file_inventory.query(page=0, page_size=0, **query_args)
+        total_pages = max(1, (match_count + page_size - 1) // page_size)
+        st.session_state.setdefault('file_manager_page', 1)
+        if st.session_state.file_manager_page > total_pages:
+            st.session_state.file_manager_page = total_pages
+        with page_col2:
+            page = st.number_input(f"Page (of {total_pages})", min_value=1, max_value=total_pages, key="file_manager_page") - 1
+        page_items, match_count = file_inventory.query(page=page, page_size=page_size, **query_args)
+        if sort_key in MEDIA_SORT_FIELDS and file_inventory.media_count() < file_inventory.file_count:
+            # Probe the rest of the tree behind the visible page, so the media sorts cover every file
+            for rel_path, entry in file_inventory.unprobed_files():
+                media_info = media_probe_cache.get(os.path.join(download_base_path, rel_path), entry['size'], entry['mtime'],
+                                                   priority=1, callback=lambda info, rel_path=rel_path: file_inventory.set_media(rel_path, info))
+                file_inventory.set_media(rel_path, media_info)
+        
+        st.markdown(f"#### 📂 Downloaded Files ({match_count} matching)")
+        
+        # Selection survives paging and is kept as relative paths
+        if 'file_manager_selected' not in st.session_state:
+            st.session_state.file_manager_selected = set()
+        selected_files = st.session_state.file_manager_selected
+        selected_files.intersection_update(file_inventory.files.keys())
+        
+        if page_items:
+            def file_icon(name):
+                ext = os.path.splitext(name)[1].lower()
+                if ext in ['.mp4', '.avi', '.mkv', '.mov', '.webm']:
+                    return "🎬"
+                elif ext in ['.mp3', '.wav', '.flac', '.aac', '.m4a', '.opus']:
+                    return "🎵"
+                return "📄"
+            
+            page_rows = []
+            for rel_path, entry in page_items:
+                name = os.path.basename(rel_path)
+                # Probe results arrive in the background and feed the media sorts
+                media_info = media_probe_cache.get(os.path.join(download_base_path, rel_path), entry['size'], entry['mtime'])
+                file_inventory.set_media(rel_path, media_info)
+                duration, resolution, codecs = format_media_info(media_info)
+                page_rows.append({
+                    'Select': rel_path in selected_files,
+                    'Name': f"{file_icon(name)} {name}",
+                    'Folder': os.path.dirname(rel_path),
+                    'Size (MB)': round(entry['size'] / (1024 * 1024), 1),
+                    'Duration': duration,
+                    'Resolution': resolution,
+                    'Codecs': codecs,
+                    'Modified': datetime.fromtimestamp(entry['mtime']).strftime('%Y-%m-%d %H:%M')
+                })
+            
+            # One grid widget for the whole page instead of a row of widgets per file
+            edited_rows = st.data_editor(
+                page_rows,
+                key=f"file_manager_grid_{file_inventory.version}_{page}_{page_size}_{sort_option}",
+                use_container_width=True,
+                hide_index=True,
+                disabled=['Name', 'Folder', 'Size (MB)', 'Duration', 'Resolution', 'Codecs', 'Modified']
+            )
+            edited_rows = edited_rows.to_dict('records') if hasattr(edited_rows, 'to_dict') else edited_rows
+            for (rel_path, _), row in zip(page_items, edited_rows):
+                if row.get('Select'):
+                    selected_files.add(rel_path)
+                else:
+                    selected_files.discard(rel_path)
+            
+            if media_probe_cache.pending_count():
+                st.caption(f"⏳ Reading media details for {media_probe_cache.pending_count()} files - refresh to update the details and order")
         else:
-            st.info("📂 No files found in downloads folder")
+            st.info("📂 No files found in downloads folder" if file_inventory.file_count == 0 else "📂 No files match the current filters")
+        
+        # Bulk selection actions
+        bulk_col1, bulk_col2, bulk_col3 = st.columns(3)
+        with bulk_col1:
+            if st.button(f"✅ Select All {match_count} Matching", use_container_width=True, type="secondary", disabled=match_count == 0):
+                matching_items, _ = file_inventory.query(page=0, page_size=match_count, **query_args)
+                selected_files.update(rel_path for rel_path, _ in matching_items)
+                st.rerun()
+        with bulk_col2:
+            if st.button("❌ Clear Selection", use_container_width=True, type="secondary", disabled=not selected_files):
+                selected_files.clear()
+                st.rerun()
+        with bulk_col3:
+            if st.button(f"🗑️ Delete {len(selected_files)} Selected", use_container_width=True, type="primary", disabled=not selected_files):
+                deleted_count = 0
+                errors = []
+                for rel_path in sorted(selected_files):
+                    try:
+                        os.remove(os.path.join(download_base_path, rel_path))
+                        deleted_count += 1
+                    except Exception as e:
+                        errors.append(f"{rel_path}: {e}")
+                selected_files.clear()
+                file_inventory.refresh()
+                # Kept for the next run, the rerun below would clear the messages straight away
+                st.session_state.file_manager_delete_result = {'deleted': deleted_count, 'errors': errors}
+                st.rerun()
+        
+        delete_result = st.session_state.pop('file_manager_delete_result', None)
+        if delete_result:
+            if delete_result['deleted']:
+                st.success(f"🗑️ Deleted {delete_result['deleted']} files")
+            for error in delete_result['errors']:
+                st.error(f"❌ Error deleting file: {error}")
     
     else:
         st.markdown('<div class="info-card">', unsafe_allow_html=True)
         st.info("📁 No downloads folder found. Download a video to create the folder automatically!")
         st.markdown("💡 **Tip:** Your downloaded files will appear here once you start downloading.")
         st.markdown('</div>', unsafe_allow_html=True)
-
-
-
-
@@ -4,9 +4,14 @@ Background Scheduler Service for YouTube Downloader
 This script runs in the background to check and execute scheduled downloads
 """
 
+import argparse
+import json
 import time
+import heapq
 import threading
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
 import sys
 import os
 
@@ -14,32 +19,371 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app import (
-    get_scheduled_downloads, 
-    execute_scheduled_download, 
-    update_scheduled_download_status
+    get_scheduled_downloads,
+    execute_scheduled_download,
+    update_scheduled_download_status,
+    ScheduledJobQueue,
+    LEASED_STATUSES,
+    LEASE_SECONDS,
+    add_schedule_listener
 )
 
+RUNNABLE_STATUSES = ('scheduled',) + LEASED_STATUSES
+SUMMARY_FIELDS = ('id', 'title', 'type', 'status', 'scheduled_time', 'priority', 'queue_position', 'queued_at',
+                  'progress', 'result', 'retry_count', 'lease_owner', 'projected_completion', 'last_updated')
+
+def summarize_job(job):
+    """Compact view of a scheduled job for the status API"""
+    summary = {field: job[field] for field in SUMMARY_FIELDS if field in job}
+    items = job.get('urls') or job.get('videos')
+    if items:
+        item_results = job.get('item_results', {})
+        summary['items_total'] = len(items)
+        summary['items_done'] = len(item_results)
+        summary['items_failed'] = sum(1 for result in item_results.values() if not result.get('success'))
+    return summary
+
+class JobStatusBoard:
+    """Latest known state of all jobs, with a version that waiters can block on"""
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.jobs = {}
+        self.version = 0
+
+    def publish(self, scheduled_downloads):
+        # Copy through JSON so later in-place edits by download threads can't race the API
+        jobs = {job.get('id'): job for job in json.loads(json.dumps(scheduled_downloads))}
+        with self.condition:
+            if jobs != self.jobs:
+                self.jobs = jobs
+                self.version += 1
+                self.condition.notify_all()
+
+    def snapshot(self):
+        with self.condition:
+            return self.version, dict(self.jobs)
+
+    def wait_for_change(self, since, timeout):
+        """Block until the version is newer than `since` or the timeout passes"""
+        deadline = time.time() + timeout
+        with self.condition:
+            while self.version <= since:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            return self.version, dict(self.jobs)
+
+class StatusAPIHandler(BaseHTTPRequestHandler):
+    """Read-only JSON API: /health, /queue, /jobs, /jobs/<id> and /events (server-sent events)"""
+    max_wait = 60
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self._send_cors_header()
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_cors_header(self):
+        # Off unless configured: otherwise any page open in the browser could read job titles and URLs
+        origin = self.server.service.api_cors_origin
+        if origin:
+            self.send_header('Access-Control-Allow-Origin', origin)
+
+    def do_GET(self):
+        service = self.server.service
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        path = parsed.path.rstrip('/') or '/'
+
+        if path == '/health':
+            self._send_json(service.health())
+        elif path == '/queue':
+            self._send_json(service.queue_status())
+        elif path == '/jobs':
+            # Long-poll: ?since=<version>&wait=<seconds> returns as soon as anything changes
+            try:
+                since = int(query.get('since', ['-1'])[0])
+                wait = max(0.0, min(float(query.get('wait', ['0'])[0]), self.max_wait))
+            except ValueError:
+                self._send_json({'error': "'since' must be an integer and 'wait' a number of seconds"}, status=400)
+                return
+            version, jobs = service.status_board.wait_for_change(since, wait)
+            statuses = query.get('status')
+            summaries = [summarize_job(job) for job in jobs.values() if not statuses or job.get('status') in statuses]
+            self._send_json({'version': version, 'jobs': summaries})
+        elif path.startswith('/jobs/'):
+            job_id = path[len('/jobs/'):]
+            version, jobs = service.status_board.snapshot()
+            if job_id in jobs:
+                self._send_json({'version': version, 'job': jobs[job_id]})
+            else:
+                self._send_json({'error': f"Unknown job {job_id}"}, status=404)
+        elif path == '/events':
+            self._stream_events(service, query.get('job'))
+        else:
+            self._send_json({'error': 'Not found', 'endpoints': ['/health', '/queue', '/jobs', '/jobs/<id>', '/events']}, status=404)
+
+    def _stream_events(self, service, job_ids=None):
+        """Server-sent events: one 'job' event per job whose state changed"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self._send_cors_header()
+        self.end_headers()
+
+        sent = {}
+        version = -1
+        try:
+            while service.api_server is not None:
+                version, jobs = service.status_board.wait_for_change(version, 15)
+                messages = []
+                for job_id, job in jobs.items():
+                    if job_ids and job_id not in job_ids:
+                        continue
+                    data = json.dumps(summarize_job(job), ensure_ascii=False)
+                    if sent.get(job_id) != data:
+                        sent[job_id] = data
+                        messages.append(f"id: {version}\nevent: job\ndata: {data}\n\n")
+                for job_id in [job_id for job_id in sent if job_id not in jobs]:
+                    del sent[job_id]
+                    messages.append(f"id: {version}\nevent: removed\ndata: {json.dumps({'id': job_id})}\n\n")
+                # A comment line keeps proxies and clients from timing out while nothing changes
+                self.wfile.write(("".join(messages) or ": keep-alive\n\n").encode('utf-8'))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
 class SchedulerService:
-    def __init__(self, check_interval=60):  # Check every 60 seconds
-        self.check_interval = check_interval
+    """Run scheduled downloads from a min-heap of due times.
+
+    The scheduler thread sleeps until the earliest due job and is woken
+    immediately when jobs are added, edited or cancelled, either through
+    notify_changed() or when scheduled_downloads.json changes on disk.
+    Due jobs are handed to a ScheduledJobQueue that runs at most
+    max_concurrent_jobs of them at once. Jobs leased by another scheduler
+    are kept in the heap at their lease expiry, so they are taken over as
+    soon as that scheduler stops renewing them.
+    """
+    def __init__(self, check_interval=60, reload_interval=0.5, schedule_file="scheduled_downloads.json",
+                 load_jobs=None, execute=None, use_watcher=True, max_concurrent_jobs=2,
+                 lease_seconds=LEASE_SECONDS, api_host="127.0.0.1", api_port=None,
+                 api_cors_origin=None):
+        self.check_interval = check_interval  # Safety rescan even when nothing changed
+        self.reload_interval = reload_interval  # How often to stat the schedule file without a watcher
+        self.schedule_file = schedule_file
+        self.load_jobs = load_jobs or get_scheduled_downloads
+        self.execute = execute or execute_scheduled_download
+        self.use_watcher = use_watcher
+        # Queue status is only written back when jobs come from the real schedule file
+        self.job_queue = ScheduledJobQueue(max_concurrent_jobs, execute=self.execute,
+                                           persist_status=load_jobs is None, lease_seconds=lease_seconds)
         self.running = False
         self.thread = None
-    
+        self.observer = None
+        self.started_at = None
+        # The status API is served from memory: file reloads and this process's own writes both publish here
+        self.status_board = JobStatusBoard()
+        self.api_host = api_host
+        self.api_port = api_port
+        self.api_cors_origin = api_cors_origin
+        self.api_server = None
+        if load_jobs is None:
+            add_schedule_listener(self.status_board.publish)
+        self.condition = threading.Condition()
+        self.heap = []  # (due_timestamp, sequence, job_id)
+        self.jobs = {}  # job_id -> (due_timestamp, job)
+        self.due_times = {}  # job_id -> (scheduled_time string, due_timestamp) to skip re-parsing
+        self.launched = {}  # job_id -> due_timestamp of runs already handed to a worker
+        self.sequence = 0
+        self.changed = True
+        self.file_mtime = None
+        self.last_full_check = 0
+
     def start(self):
         """Start the scheduler service"""
         if not self.running:
             self.running = True
+            self.started_at = time.time()
+            if self.use_watcher:
+                self._start_watcher()
+            if self.api_port is not None:
+                self._start_api()
             self.thread = threading.Thread(target=self._run_scheduler, daemon=True)
             self.thread.start()
-            print("📅 Scheduler service started - checking every 60 seconds")
-    
+            print("📅 Scheduler service started - waiting for the next scheduled download")
+
     def stop(self):
         """Stop the scheduler service"""
-        self.running = False
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.observer:
+            self.observer.stop()
+            self.observer = None
+        if self.api_server:
+            api_server, self.api_server = self.api_server, None
+            api_server.shutdown()
+            api_server.server_close()
         if self.thread:
             self.thread.join()
         print("📅 Scheduler service stopped")
-    
+
+    def notify_changed(self):
+        """Wake the scheduler after jobs were added, edited or cancelled"""
+        with self.condition:
+            self.changed = True
+            self.condition.notify_all()
+
+    def _start_api(self):
+        try:
+            self.api_server = ThreadingHTTPServer((self.api_host, self.api_port), StatusAPIHandler)
+        except OSError as e:
+            print(f"⚠️ Status API unavailable on {self.api_host}:{self.api_port}: {e}")
+            return
+        self.api_server.daemon_threads = True
+        self.api_server.service = self
+        self.api_port = self.api_server.server_address[1]
+        threading.Thread(target=self.api_server.serve_forever, daemon=True).start()
+        print(f"🌐 Status API listening on http://{self.api_host}:{self.api_port}")
+
+    def health(self):
+        """Liveness and scheduler state for /health"""
+        next_due = self.next_due_time()
+        return {
+            'status': 'ok' if self.running and self.thread and self.thread.is_alive() else 'stopped',
+            'node_id': self.job_queue.node_id,
+            'uptime_seconds': time.time() - self.started_at if self.started_at else 0,
+            'next_due': datetime.fromtimestamp(next_due).isoformat() if next_due else None,
+            'last_full_check': datetime.fromtimestamp(self.last_full_check).isoformat() if self.last_full_check else None,
+            'version': self.status_board.version
+        }
+
+    def queue_status(self):
+        """Queue depth, queued jobs with position and wait time, and running jobs for /queue"""
+        snapshot = self.job_queue.snapshot()
+        with self.condition:
+            waiting = len(self.jobs)
+        snapshot.update({'depth': len(snapshot['queued']), 'running': len(snapshot['active']), 'scheduled': waiting})
+        return snapshot
+
+    def _start_watcher(self):
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            return
+
+        service = self
+        schedule_path = os.path.abspath(self.schedule_file)
+
+        class ScheduleFileHandler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                paths = [getattr(event, 'src_path', None), getattr(event, 'dest_path', None)]
+                if schedule_path in [os.path.abspath(path) for path in paths if path]:
+                    service.notify_changed()
+
+        try:
+            self.observer = Observer()
+            self.observer.schedule(ScheduleFileHandler(), os.path.dirname(schedule_path), recursive=False)
+            self.observer.daemon = True
+            self.observer.start()
+        except Exception as e:
+            print(f"⚠️ File watcher unavailable, polling {self.schedule_file}: {e}")
+            self.observer = None
+
+    def _file_changed(self):
+        try:
+            mtime = os.stat(self.schedule_file).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self.file_mtime:
+            self.file_mtime = mtime
+            return True
+        return False
+
+    def set_jobs(self, scheduled_downloads):
+        """Synchronise the heap with a full list of scheduled downloads"""
+        self.status_board.publish(scheduled_downloads)
+        with self.condition:
+            seen = set()
+            for download in scheduled_downloads:
+                if download.get('status') not in RUNNABLE_STATUSES:
+                    continue
+                lease_owner = download.get('lease_owner')
+                if lease_owner == self.job_queue.node_id:
+                    continue  # Our own job, kept alive by the queue's heartbeat
+                if download.get('status') == 'downloading' and not lease_owner:
+                    continue  # Started before leases existed, nothing to take over
+                job_id = download.get('id')
+                scheduled_time = download.get('scheduled_time')
+                cached = self.due_times.get(job_id)
+                if cached and cached[0] == scheduled_time:
+                    due = cached[1]
+                else:
+                    try:
+                        due = datetime.fromisoformat(scheduled_time).timestamp()
+                    except (TypeError, ValueError):
+                        continue
+                    self.due_times[job_id] = (scheduled_time, due)
+                if lease_owner:
+                    # Held by another scheduler: due again when its lease runs out
+                    due = max(due, download.get('lease_expires', 0))
+                if self.launched.get(job_id) == due:
+                    continue  # Started, but the worker has not marked it downloading yet
+                seen.add(job_id)
+                current = self.jobs.get(job_id)
+                self.jobs[job_id] = (due, download)
+                if current is None or current[0] != due:
+                    self.sequence += 1
+                    heapq.heappush(self.heap, (due, self.sequence, job_id))
+
+            # Cancelled or already started jobs leave stale heap entries that are skipped lazily
+            for job_id in list(self.jobs):
+                if job_id not in seen:
+                    del self.jobs[job_id]
+            for job_id in list(self.due_times):
+                if job_id not in seen:
+                    del self.due_times[job_id]
+            still_scheduled = {download.get('id') for download in scheduled_downloads
+                               if download.get('status') in RUNNABLE_STATUSES}
+            for job_id in list(self.launched):
+                if job_id not in still_scheduled:
+                    del self.launched[job_id]
+            self.condition.notify_all()
+
+    def pop_due_jobs(self, now=None):
+        """Remove and return the jobs whose due time has passed"""
+        now = time.time() if now is None else now
+        due_jobs = []
+        with self.condition:
+            while self.heap and self.heap[0][0] <= now:
+                due, _, job_id = heapq.heappop(self.heap)
+                current = self.jobs.get(job_id)
+                if current is None or current[0] != due:
+                    continue  # Stale entry for a cancelled or rescheduled job
+                del self.jobs[job_id]
+                self.launched[job_id] = due
+                due_jobs.append(current[1])
+        return due_jobs
+
+    def next_due_time(self):
+        """Return the earliest due timestamp, or None when nothing is scheduled"""
+        with self.condition:
+            while self.heap:
+                due, _, job_id = self.heap[0]
+                current = self.jobs.get(job_id)
+                if current is not None and current[0] == due:
+                    return due
+                heapq.heappop(self.heap)
+            return None
+
     def _run_scheduler(self):
         """Main scheduler loop"""
         while self.running:
@@ -47,45 +391,61 @@ class SchedulerService:
                 self._check_scheduled_downloads()
             except Exception as e:
                 print(f"❌ Scheduler error: {e}")
-            
-            # Wait for next check
-            time.sleep(self.check_interval)
-    
+
+            # Sleep until the next job is due or something changes
+            with self.condition:
+                if not self.running or self.changed:
+                    continue
+                timeout = self.check_interval - (time.time() - self.last_full_check)
+                next_due = self.next_due_time()
+                if next_due is not None:
+                    timeout = min(timeout, next_due - time.time())
+                if not self.observer:
+                    timeout = min(timeout, self.reload_interval)
+                if timeout > 0:
+                    self.condition.wait(timeout)
+
     def _check_scheduled_downloads(self):
-        """Check for downloads that are ready to execute"""
-        scheduled_downloads = get_scheduled_downloads()
-        current_time = datetime.now()
-        
-        for download in scheduled_downloads:
-            if download['status'] == 'scheduled':
-                scheduled_time = datetime.fromisoformat(download['scheduled_time'])
-                
-                # Check if it's time to start the download
-                if current_time >= scheduled_time:
-                    print(f"🚀 Starting scheduled download: {download['title']}")
-                    
-                    # Execute in a separate thread to not block the scheduler
-                    download_thread = threading.Thread(
-                        target=execute_scheduled_download,
-                        args=(download,),
-                        daemon=True
-                    )
-                    download_thread.start()
+        """Reload the schedule if it changed and start downloads that are due"""
+        with self.condition:
+            changed, self.changed = self.changed, False
+        if changed or self._file_changed() or time.time() - self.last_full_check >= self.check_interval:
+            self.set_jobs(self.load_jobs())
+            self.last_full_check = time.time()
+            with self.condition:
+                self.changed = False
+
+        for download in self.pop_due_jobs():
+            # Run on the bounded pool; jobs beyond the limit wait in priority/FIFO order
+            if self.job_queue.submit(download):
+                print(f"⏳ Queued scheduled download: {download['title']}")
 
 def main():
     """Main function to run the scheduler service"""
     print("📅 YouTube Downloader Scheduler Service")
     print("=" * 50)
-    
-    scheduler = SchedulerService()
-    
+
+    parser = argparse.ArgumentParser(description="Run scheduled downloads in the background")
+    parser.add_argument('--max-jobs', type=int, default=2, help="Maximum number of scheduled jobs running at once")
+    parser.add_argument('--lease-seconds', type=float, default=LEASE_SECONDS,
+                        help="How long a claimed job stays reserved without a heartbeat before another scheduler takes it over")
+    parser.add_argument('--api-host', default="127.0.0.1", help="Address of the status API")
+    parser.add_argument('--api-port', type=int, default=8765, help="Port of the status API")
+    parser.add_argument('--no-api', action='store_true', help="Don't start the status API")
+    parser.add_argument('--api-cors-origin', help="Origin allowed to read the status API from a browser page (e.g. http://localhost:3000)")
+    args = parser.parse_args()
+
+    scheduler = SchedulerService(max_concurrent_jobs=args.max_jobs, lease_seconds=args.lease_seconds,
+                                 api_host=args.api_host, api_port=None if args.no_api else args.api_port,
+                                 api_cors_origin=args.api_cors_origin)
+
     try:
         scheduler.start()
-        
+
         # Keep the service running
         while True:
             time.sleep(1)
-            
+
     except KeyboardInterrupt:
         print("\n🛑 Shutting down scheduler service...")
         scheduler.stop()
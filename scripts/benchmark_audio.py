@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark the audio-only conversion modes.
+
+Generates an opus test track (as YouTube serves it), then measures the
+FFmpeg CPU seconds per hour of audio for keeping the original stream and
+for each transcode codec, and the wall time of converting several files
+at once on the post-processing pool. Requires ffmpeg with libmp3lame
+and libopus. Windows doesn't report the CPU time of child processes, so
+there only wall times are shown.
+
+Usage: python scripts/benchmark_audio.py [--minutes 10] [--files 4] [--bitrate 192]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import AUDIO_FORMATS, PostProcessingPool, extract_audio
+
+
+def make_source(path, seconds):
+    """Encode a stereo test tone to an opus stream in a webm container"""
+    subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-f', 'lavfi', '-i', f"sine=frequency=440:duration={seconds}",
+                    '-ac', '2', '-c:a', 'libopus', '-b:a', '128k', path], check=True)
+
+
+def child_cpu_seconds():
+    """CPU time used by finished child processes (the ffmpeg runs), or None where it isn't reported"""
+    if os.name == 'nt':
+        return None
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+def convert(source, workdir, name, codec, bitrate):
+    """Convert a copy of source; the copy keeps outputs of different runs apart"""
+    input_file = os.path.join(workdir, f"{name}.webm")
+    shutil.copyfile(source, input_file)
+    # The original mode knows the source codec; transcodes are measured even when it matches
+    source_codec = 'opus' if codec == 'original' else None
+    output_file = extract_audio(input_file, codec, bitrate, source_codec)
+    if not output_file:
+        raise RuntimeError(f"{codec} conversion failed")
+    return output_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--minutes', type=float, default=10.0, help="Length of the test track")
+    parser.add_argument('--files', type=int, default=4, help="Files converted at once in the pool run")
+    parser.add_argument('--bitrate', default='192', help="Bitrate of the transcodes in kbps")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="audio_bench_")
+    source = os.path.join(workdir, "source.webm")
+    audio_hours = args.minutes / 60
+    try:
+        make_source(source, int(args.minutes * 60))
+
+        print(f"🎧 Audio conversion benchmark, {args.minutes:.0f} min track, {args.bitrate}k")
+        print("=" * 50)
+        for codec in AUDIO_FORMATS:
+            cpu_before = child_cpu_seconds()
+            start = time.perf_counter()
+            convert(source, workdir, f"single_{codec}", codec, args.bitrate)
+            wall = time.perf_counter() - start
+            if cpu_before is None:
+                print(f"{codec:<9} CPU per audio hour:       n/a   (wall {wall:6.2f} s)")
+            else:
+                cpu = child_cpu_seconds() - cpu_before
+                print(f"{codec:<9} CPU per audio hour:  {cpu / audio_hours:8.1f} s   (wall {wall:6.2f} s)")
+
+        pool = PostProcessingPool()
+        print(f"\nPool of {pool.max_workers} workers, {args.files} files each")
+        for codec in AUDIO_FORMATS:
+            start = time.perf_counter()
+            futures = [pool.submit(lambda i=i, codec=codec: convert(source, workdir, f"pool_{codec}_{i}", codec, args.bitrate))
+                       for i in range(args.files)]
+            for future in futures:
+                future.result()
+            wall = time.perf_counter() - start
+            print(f"{codec:<9} audio hours per wall hour: {args.files * audio_hours * 3600 / wall:8.1f}   (wall {wall:6.2f} s)")
+        pool.executor.shutdown()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
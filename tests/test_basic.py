@@ -2,10 +2,19 @@
 Basic tests for the YouTube Downloader application.
 """
 
+import concurrent.futures
+import json
 import os
+import shutil
 import sys
+import tempfile
+import threading
+import time
 import unittest
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch, MagicMock
+from urllib.request import urlopen
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -145,6 +154,1578 @@ class TestYouTubeDownloader(unittest.TestCase):
             self.fail("requirements.txt not found")
 
 
+class TestDownloadArchive(unittest.TestCase):
+    """Test the download archive used to skip already-fetched videos."""
+    
+    def setUp(self):
+        """Run each test from an empty working directory."""
+        self.original_cwd = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+    
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_get_video_id(self):
+        """Test that common URL forms resolve to the same video ID."""
+        from app import get_video_id
+        
+        for url in [
+            "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+            "https://youtube.com/watch?v=dQw4w9WgXcQ&t=42s&list=PL123",
+            "https://youtu.be/dQw4w9WgXcQ",
+            "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+            "https://m.youtube.com/watch?v=dQw4w9WgXcQ",
+        ]:
+            self.assertEqual(get_video_id(url), "dQw4w9WgXcQ", url)
+        
+        self.assertIsNone(get_video_id("https://vimeo.com/123456789"))
+        self.assertIsNone(get_video_id("not_a_url"))
+    
+    def test_archive_key_normalizes_time_range(self):
+        """Test that equivalent time ranges share one archive key."""
+        from app import build_archive_key
+        
+        self.assertEqual(
+            build_archive_key("abc", "720p", "with_audio", "00:00:00", "01:30"),
+            build_archive_key("abc", "720p", "with_audio", None, "00:01:30"),
+        )
+        self.assertNotEqual(
+            build_archive_key("abc", "720p", "with_audio"),
+            build_archive_key("abc", "1080p", "with_audio"),
+        )
+    
+    def test_download_skips_archived_video_without_network(self):
+        """Test that archived videos are skipped before yt-dlp is created."""
+        from app import add_to_download_archive, build_archive_key, download_video, precheck_archived_urls
+        
+        file_path = os.path.join(self.temp_dir, "video.mp4")
+        with open(file_path, 'w') as f:
+            f.write("data")
+        add_to_download_archive(build_archive_key("dQw4w9WgXcQ", "720p", "with_audio"), {'title': 'Test'}, file_path)
+        
+        with patch('app.yt_dlp.YoutubeDL') as mock_ytdl:
+            success, result = download_video("https://youtu.be/dQw4w9WgXcQ", "720p", skip_existing=True)
+            mock_ytdl.assert_not_called()
+        self.assertTrue(success)
+        self.assertEqual(result, file_path)
+        
+        archived = precheck_archived_urls([
+            {'url': "https://www.youtube.com/watch?v=dQw4w9WgXcQ"},
+            {'url': "https://www.youtube.com/watch?v=aaaaaaaaaaa"},
+        ], "720p", "with_audio")
+        self.assertEqual(archived, {0})
+
+
+class TestBlobStore(unittest.TestCase):
+    """Test content-addressed storage with hardlink deduplication."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.blob_store = os.path.join(self.temp_dir, ".blobs")
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _write(self, relative_path, data):
+        path = os.path.join(self.temp_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+    
+    def test_duplicates_share_one_blob(self):
+        """Test that identical files in different date folders become hardlinks."""
+        from app import store_in_blob_store, prune_blob_store
+        
+        first = self._write(os.path.join("2024-01-01", "video.mp4"), b"same content")
+        second = self._write(os.path.join("2024-01-02", "video.mp4"), b"same content")
+        
+        first_hash = store_in_blob_store(first, blob_store_path=self.blob_store)
+        second_hash = store_in_blob_store(second, blob_store_path=self.blob_store)
+        
+        self.assertEqual(first_hash, second_hash)
+        self.assertTrue(os.path.samefile(first, second))
+        self.assertEqual(prune_blob_store(self.blob_store), (0, 0))
+        
+        os.remove(first)
+        os.remove(second)
+        self.assertEqual(prune_blob_store(self.blob_store), (1, len(b"same content")))
+    
+    def test_streaming_hasher_matches_file_hash(self):
+        """Test that hashing from progress hooks equals hashing the finished file."""
+        from app import StreamingHasher, hash_file
+        
+        partial = self._write("video.mp4.part", b"first chunk ")
+        hasher = StreamingHasher()
+        hasher.progress_hook({'status': 'downloading', 'tmpfilename': partial})
+        with open(partial, 'ab') as f:
+            f.write(b"second chunk")
+        final = os.path.join(self.temp_dir, "video.mp4")
+        os.rename(partial, final)
+        hasher.progress_hook({'status': 'finished', 'filename': final})
+        
+        self.assertEqual(hasher.hexdigest_for(final), hash_file(final))
+
+
+class TestFileInventory(unittest.TestCase):
+    """Test the incremental file inventory behind the File Manager tab."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.downloads = os.path.join(self.temp_dir, "downloads")
+        self.index_file = os.path.join(self.temp_dir, "file_inventory.json")
+        os.makedirs(os.path.join(self.downloads, "2024-01-01"))
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _write(self, relative_path, size):
+        path = os.path.join(self.downloads, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b"x" * size)
+        return path
+    
+    def test_directory_mtime_diffing(self):
+        """Test that totals follow additions, hardlinks and deletions."""
+        from app import FileInventory
+        
+        first = self._write(os.path.join("2024-01-01", "a.mp4"), 100)
+        inventory = FileInventory(self.downloads, self.index_file, use_watcher=False)
+        self.assertTrue(inventory.refresh())
+        self.assertEqual((inventory.file_count, inventory.total_size), (1, 100))
+        self.assertFalse(inventory.refresh())
+        
+        self._write(os.path.join("2024-01-02", "b.mp3"), 50)
+        os.link(first, os.path.join(self.downloads, "2024-01-01", "a_copy.mp4"))
+        self.assertTrue(inventory.refresh())
+        self.assertEqual((inventory.file_count, inventory.total_size), (3, 150))
+        self.assertEqual(inventory.sorted_files("size")[0][0], os.path.join("2024-01-01", "a.mp4"))
+        
+        shutil.rmtree(os.path.join(self.downloads, "2024-01-02"))
+        self.assertTrue(inventory.refresh())
+        self.assertEqual((inventory.file_count, inventory.total_size), (2, 100))
+    
+    def test_index_persists_across_instances(self):
+        """Test that a saved index is reused and revalidated by a new instance."""
+        from app import FileInventory
+        
+        self._write(os.path.join("2024-01-01", "a.mp4"), 10)
+        FileInventory(self.downloads, self.index_file, use_watcher=False).refresh()
+        
+        inventory = FileInventory(self.downloads, self.index_file, use_watcher=False)
+        self.assertEqual(inventory.file_count, 1)
+        self.assertFalse(inventory.refresh())
+    
+    def test_filtered_paginated_query(self):
+        """Test that queries filter and paginate the sorted listing."""
+        from app import FileInventory
+        
+        for i in range(30):
+            self._write(os.path.join("2024-01-01", f"video_{i:02d}.mp4"), i + 1)
+        self._write(os.path.join("2024-01-02", "song.mp3"), 1000)
+        inventory = FileInventory(self.downloads, self.index_file, use_watcher=False)
+        inventory.refresh()
+        
+        page, total = inventory.query(sort_key="name", reverse=False, page=1, page_size=10)
+        self.assertEqual(total, 31)
+        self.assertEqual(os.path.basename(page[0][0]), "video_09.mp4")
+        
+        page, total = inventory.query(sort_key="size", extensions=[".mp4"], min_size=25, page=0, page_size=10)
+        self.assertEqual(total, 6)
+        self.assertEqual(page[0][1]['size'], 30)
+        
+        page, total = inventory.query(subfolder="2024-01-02", name_filter="SONG")
+        self.assertEqual([os.path.basename(rel_path) for rel_path, _ in page], ["song.mp3"])
+        self.assertEqual(inventory.facets(), ([".mp3", ".mp4"], ["2024-01-01", "2024-01-02"]))
+    
+    def test_media_sorts_use_recorded_probes(self):
+        """Test that duration and resolution sorts run on recorded probes, with unprobed files last."""
+        from app import FileInventory
+        
+        for name in ("short.mp4", "long.mp4", "unprobed.mp4"):
+            self._write(os.path.join("2024-01-01", name), 10)
+        inventory = FileInventory(self.downloads, self.index_file, use_watcher=False)
+        inventory.refresh()
+        short, long_, unprobed = (os.path.join("2024-01-01", name) for name in ("short.mp4", "long.mp4", "unprobed.mp4"))
+        inventory.set_media(short, {'duration': 60, 'width': 1920, 'height': 1080})
+        inventory.set_media(long_, {'duration': 3600, 'width': 640, 'height': 360})
+        
+        self.assertEqual([rel_path for rel_path, _ in inventory.query(sort_key="duration", reverse=True)[0]], [long_, short, unprobed])
+        self.assertEqual([rel_path for rel_path, _ in inventory.query(sort_key="duration", reverse=False)[0]], [short, long_, unprobed])
+        self.assertEqual(inventory.query(sort_key="resolution", reverse=True)[0][0][0], short)
+        self.assertEqual([rel_path for rel_path, _ in inventory.unprobed_files()], [unprobed])
+        
+        # A probe arriving later re-sorts without a rescan, and the media columns persist
+        inventory.set_media(unprobed, {'duration': 7200})
+        self.assertEqual(inventory.query(sort_key="duration", reverse=True)[0][0][0], unprobed)
+        inventory.refresh()
+        self.assertEqual(FileInventory(self.downloads, self.index_file, use_watcher=False).media_count(), 3)
+        
+        # A changed file needs a new probe
+        self._write(short, 20)
+        os.utime(os.path.dirname(os.path.join(self.downloads, short)), ns=(0, 0))
+        inventory.refresh()
+        self.assertEqual(inventory.query(sort_key="duration", reverse=False)[0][-1][0], short)
+
+
+class TestMediaProbeCache(unittest.TestCase):
+    """Test the background media probe cache."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.temp_dir, "media_probe_cache.json")
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_probe_is_cached_and_invalidated_by_mtime(self):
+        """Test that probes run in the background once per (path, size, mtime)."""
+        from app import MediaProbeCache
+        
+        probe_result = {'duration': 12.0, 'width': 1280, 'height': 720, 'video_codec': 'h264', 'audio_codec': 'aac', 'bit_rate': None}
+        with patch('app.probe_media_file', return_value=probe_result) as mock_probe:
+            cache = MediaProbeCache(self.cache_file, max_workers=1)
+            self.assertIsNone(cache.get("video.mp4", 100, 1.0))
+            cache.executor.shutdown(wait=True)
+            self.assertEqual(cache.get("video.mp4", 100, 1.0), probe_result)
+            self.assertEqual(mock_probe.call_count, 1)
+            
+            cache.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+            self.assertIsNone(cache.get("video.mp4", 100, 2.0))
+            cache.executor.shutdown(wait=True)
+            self.assertEqual(mock_probe.call_count, 2)
+            self.assertEqual(len(cache.entries), 1)
+        
+        reloaded = MediaProbeCache(self.cache_file, max_workers=1)
+        self.assertEqual(reloaded.get("video.mp4", 100, 2.0), probe_result)
+    
+    def test_visible_files_are_probed_before_backfill(self):
+        """Test that low-priority backfill probes wait behind on-screen files and report through callbacks."""
+        from app import MediaProbeCache
+        
+        release = threading.Event()
+        probed = []
+        
+        def probe(path):
+            if path == "busy.mp4":
+                release.wait(timeout=5)
+            probed.append(path)
+            return {'duration': float(len(probed))}
+        
+        with patch('app.probe_media_file', side_effect=probe):
+            cache = MediaProbeCache(self.cache_file, max_workers=1)
+            cache.get("busy.mp4", 1, 1.0)
+            reported = {}
+            for name in ["a.mp4", "b.mp4", "c.mp4"]:
+                cache.get(name, 1, 1.0, priority=1, callback=lambda info, name=name: reported.setdefault(name, info))
+            cache.get("c.mp4", 1, 1.0, priority=1, callback=lambda info: reported.setdefault("duplicate", info))
+            cache.get("page.mp4", 1, 1.0)
+            cache.get("b.mp4", 1, 1.0)
+            release.set()
+            cache.executor.shutdown(wait=True)
+        
+        self.assertEqual(probed, ["busy.mp4", "page.mp4", "b.mp4", "a.mp4", "c.mp4"])
+        self.assertEqual(sorted(reported), ["a.mp4", "b.mp4", "c.mp4"])
+        self.assertEqual(reported["b.mp4"], {'duration': 3.0})
+        self.assertEqual(cache.pending_count(), 0)
+    
+    def test_format_media_info(self):
+        """Test display formatting of probe results."""
+        from app import format_media_info
+        
+        self.assertEqual(
+            format_media_info({'duration': 3725.4, 'width': 1920, 'height': 1080, 'video_codec': 'vp9', 'audio_codec': 'opus'}),
+            ("1:02:05", "1920x1080", "vp9 + opus"),
+        )
+        self.assertEqual(format_media_info(None), ("⏳", "⏳", "⏳"))
+
+
+class TestSchedulerService(unittest.TestCase):
+    """Test the timer-heap scheduler service."""
+    
+    def _make_job(self, job_id, delay_seconds, status='scheduled'):
+        return {
+            'id': job_id,
+            'type': 'single',
+            'title': job_id,
+            'status': status,
+            'scheduled_time': (datetime.now() + timedelta(seconds=delay_seconds)).isoformat()
+        }
+    
+    def test_pop_due_jobs_skips_cancelled_and_rescheduled(self):
+        """Test that only current, due entries are returned from the heap."""
+        from scheduler_service import SchedulerService
+        
+        service = SchedulerService(load_jobs=lambda: [], execute=lambda job, controller=None: None, use_watcher=False)
+        due_job = self._make_job('due', -1)
+        later_job = self._make_job('later', 3600)
+        service.set_jobs([due_job, self._make_job('cancelled', -1), self._make_job('moved', -1), later_job])
+        service.set_jobs([due_job, self._make_job('moved', 60), later_job])
+        
+        self.assertEqual([job['id'] for job in service.pop_due_jobs()], ['due'])
+        self.assertEqual([job['id'] for job in service.pop_due_jobs(time.time() + 120)], ['moved'])
+        
+        # A started job is not launched again while its status is still 'scheduled'
+        service.set_jobs([due_job, later_job])
+        self.assertEqual(service.pop_due_jobs(), [])
+        
+        # Rescheduling it makes it due again
+        service.set_jobs([dict(due_job, scheduled_time=(datetime.now() - timedelta(seconds=2)).isoformat()), later_job])
+        self.assertEqual([job['id'] for job in service.pop_due_jobs()], ['due'])
+    
+    def test_wakes_when_job_added(self):
+        """Test that a newly added job starts promptly without waiting for a poll."""
+        from scheduler_service import SchedulerService
+        
+        jobs = [self._make_job('far', 3600)]
+        started = threading.Event()
+        service = SchedulerService(load_jobs=lambda: list(jobs), execute=lambda job, controller=None: started.set(),
+                                   use_watcher=False, schedule_file=os.devnull)
+        service.start()
+        try:
+            time.sleep(0.2)
+            jobs.append(self._make_job('soon', 0.1))
+            service.notify_changed()
+            self.assertTrue(started.wait(timeout=2))
+        finally:
+            service.stop()
+
+
+class TestScheduledJobQueue(unittest.TestCase):
+    """Test the bounded pool that runs due scheduled jobs."""
+    
+    def _make_job(self, job_id, priority=0, minutes_ago=1):
+        return {
+            'id': job_id,
+            'title': job_id,
+            'priority': priority,
+            'scheduled_time': (datetime.now() - timedelta(minutes=minutes_ago)).isoformat()
+        }
+    
+    def test_limits_concurrency_and_orders_by_priority(self):
+        """Test that at most max_concurrent_jobs run and the queue is priority then FIFO."""
+        from app import ScheduledJobQueue
+        
+        release = threading.Event()
+        lock = threading.Lock()
+        running = []
+        peak = []
+        order = []
+        
+        def execute(job, controller=None):
+            with lock:
+                order.append(job['id'])
+                running.append(job['id'])
+                peak.append(len(running))
+            release.wait(timeout=5)
+            with lock:
+                running.remove(job['id'])
+        
+        job_queue = ScheduledJobQueue(max_concurrent_jobs=1, execute=execute, persist_status=False)
+        job_queue.submit(self._make_job('first', minutes_ago=10))
+        time.sleep(0.1)
+        job_queue.submit(self._make_job('old', minutes_ago=5))
+        job_queue.submit(self._make_job('new', minutes_ago=1))
+        job_queue.submit(self._make_job('urgent', priority=1, minutes_ago=0))
+        self.assertFalse(job_queue.submit(self._make_job('old', minutes_ago=5)))
+        
+        snapshot = job_queue.snapshot()
+        self.assertEqual(snapshot['active'], ['first'])
+        self.assertEqual([(job['id'], job['position']) for job in snapshot['queued']],
+                         [('urgent', 1), ('old', 2), ('new', 3)])
+        self.assertTrue(all(job['wait_seconds'] >= 0 for job in snapshot['queued']))
+        
+        release.set()
+        deadline = time.time() + 5
+        while len(order) < 4 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(order, ['first', 'urgent', 'old', 'new'])
+        self.assertEqual(max(peak), 1)
+
+
+class TestScheduledJobLeases(unittest.TestCase):
+    """Test lease-based claiming of scheduled jobs shared by several schedulers."""
+    
+    def setUp(self):
+        self.original_cwd = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+    
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _write_jobs(self, count):
+        from app import save_scheduled_downloads
+        
+        due = (datetime.now() - timedelta(minutes=1)).isoformat()
+        save_scheduled_downloads([
+            {'id': f"job_{i}", 'type': 'single', 'title': f"job_{i}", 'status': 'scheduled', 'scheduled_time': due}
+            for i in range(count)
+        ])
+    
+    def test_concurrent_claims_are_exclusive(self):
+        """Test that racing schedulers each claim a disjoint set of jobs."""
+        from app import claim_scheduled_download, get_scheduled_downloads
+        
+        self._write_jobs(20)
+        claims = {}
+        
+        def claim_all(owner):
+            claims[owner] = [job_id for job_id in (f"job_{i}" for i in range(20))
+                             if claim_scheduled_download(job_id, owner, fields={'status': 'queued'})]
+        
+        threads = [threading.Thread(target=claim_all, args=(f"node{n}",)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        claimed = [job_id for job_ids in claims.values() for job_id in job_ids]
+        self.assertEqual(sorted(claimed), sorted(f"job_{i}" for i in range(20)))
+        owners = {job['id']: job['lease_owner'] for job in get_scheduled_downloads()}
+        for owner, job_ids in claims.items():
+            self.assertTrue(all(owners[job_id] == owner for job_id in job_ids))
+    
+    def test_expired_lease_is_taken_over_and_old_owner_fenced(self):
+        """Test takeover after lease expiry and that the old owner can no longer write."""
+        from app import (claim_scheduled_download, renew_scheduled_download_leases,
+                         update_scheduled_download_status, get_scheduled_downloads)
+        
+        self._write_jobs(1)
+        self.assertIsNotNone(claim_scheduled_download('job_0', 'node_a', lease_seconds=30, fields={'status': 'queued'}))
+        self.assertIsNone(claim_scheduled_download('job_0', 'node_b', lease_seconds=30))
+        
+        # node_a stops renewing; once the lease has run out node_b takes over
+        taken = claim_scheduled_download('job_0', 'node_b', lease_seconds=30, now=time.time() + 31, fields={'status': 'queued'})
+        self.assertEqual(taken['lease_owner'], 'node_b')
+        self.assertEqual(taken['lease_takeovers'], 1)
+        
+        self.assertEqual(renew_scheduled_download_leases({'job_0'}, 'node_a'), set())
+        update_scheduled_download_status('job_0', 'completed', 'stale result', owner='node_a')
+        self.assertEqual(get_scheduled_downloads()[0]['status'], 'queued')
+        
+        update_scheduled_download_status('job_0', 'completed', 'done', owner='node_b')
+        job = get_scheduled_downloads()[0]
+        self.assertEqual(job['status'], 'completed')
+        self.assertNotIn('lease_owner', job)
+    
+    def test_two_queues_run_each_job_once(self):
+        """Test that two schedulers sharing one schedule execute every job exactly once."""
+        from app import ScheduledJobQueue, get_scheduled_downloads, update_scheduled_download_status
+        
+        self._write_jobs(10)
+        lock = threading.Lock()
+        runs = []
+        
+        def execute(job, controller=None):
+            with lock:
+                runs.append(job['id'])
+            update_scheduled_download_status(job['id'], 'completed', owner=job['lease_owner'])
+        
+        queues = [ScheduledJobQueue(max_concurrent_jobs=2, execute=execute, lease_seconds=30) for _ in range(2)]
+        for job in get_scheduled_downloads():
+            for job_queue in queues:
+                job_queue.submit(job)
+        
+        deadline = time.time() + 5
+        while len(runs) < 10 and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)
+        self.assertEqual(sorted(runs), sorted(f"job_{i}" for i in range(10)))
+        self.assertTrue(all(job['status'] == 'completed' for job in get_scheduled_downloads()))
+
+
+class TestSubscriptions(unittest.TestCase):
+    """Test recurring subscriptions with incremental playlist sync."""
+    
+    def setUp(self):
+        self.original_cwd = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+    
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_next_run_times(self):
+        """Test cron and interval recurrences."""
+        from app import next_cron_time, compute_next_run
+        
+        after = datetime(2024, 1, 1, 10, 30)  # A Monday
+        self.assertEqual(next_cron_time("0 3 * * *", after), datetime(2024, 1, 2, 3, 0))
+        self.assertEqual(next_cron_time("*/15 * * * *", after), datetime(2024, 1, 1, 10, 45))
+        self.assertEqual(next_cron_time("0 9 * * 6,0", after), datetime(2024, 1, 6, 9, 0))
+        self.assertEqual(next_cron_time("0 0 1 * *", after), datetime(2024, 2, 1, 0, 0))
+        with self.assertRaises(ValueError):
+            next_cron_time("61 * * * *", after)
+        
+        # Missed interval runs are skipped rather than run back to back
+        recurrence = {'type': 'interval', 'minutes': 60}
+        self.assertEqual(compute_next_run(recurrence, datetime(2024, 1, 1, 8, 0), after), datetime(2024, 1, 1, 11, 0))
+    
+    def _mock_listing(self, mock_ydl, ids):
+        consumed = []
+        
+        def entries():
+            for video_id in ids:
+                consumed.append(video_id)
+                yield {'id': video_id, 'title': f"Video {video_id}", 'ie_key': 'Youtube'}
+        
+        instance = mock_ydl.return_value.__enter__.return_value
+        instance.extract_info.side_effect = lambda *args, **kwargs: {'title': 'Channel', 'entries': entries()}
+        return consumed
+    
+    @patch('app.yt_dlp.YoutubeDL')
+    def test_listing_stops_at_first_known_id(self, mock_ydl):
+        """Test that newest-first listing never reads past the last-seen cursor."""
+        from app import list_new_playlist_entries
+        
+        consumed = self._mock_listing(mock_ydl, ['new2', 'new1', 'old1', 'old2', 'old3'])
+        entries, title = list_new_playlist_entries('https://www.youtube.com/@x/videos', ['old1', 'old2'])
+        
+        self.assertEqual([entry['id'] for entry in entries], ['new2', 'new1'])
+        self.assertEqual(consumed, ['new2', 'new1', 'old1'])
+        self.assertEqual(title, 'Channel')
+        # Listing retries follow the shared throttle backoff like the download workers
+        self.assertEqual(set(mock_ydl.call_args.args[0]['retry_sleep_functions']), {'http', 'extractor'})
+    
+    @patch('app.yt_dlp.YoutubeDL')
+    def test_listing_error_on_later_page_retries(self, mock_ydl):
+        """Test that a page failing mid-listing leaves the subscription to retry with its cursor unchanged."""
+        from app import list_new_playlist_entries, save_scheduled_downloads, get_scheduled_downloads, sync_subscription
+        
+        def entries():
+            yield {'id': 'new1', 'title': "Video new1", 'ie_key': 'Youtube'}
+            raise Exception("HTTP Error 404: Not Found")
+        
+        instance = mock_ydl.return_value.__enter__.return_value
+        instance.extract_info.side_effect = lambda *args, **kwargs: {'title': 'Channel', 'entries': entries()}
+        self.assertEqual(list_new_playlist_entries('https://www.youtube.com/@x/videos', ['old1']), (None, None))
+        
+        subscription = {
+            'id': 'subscription_1', 'type': 'subscription', 'title': 'Sub', 'url': 'https://www.youtube.com/@x/videos',
+            'recurrence': {'type': 'interval', 'minutes': 60}, 'newest_first': True, 'seen_ids': ['old1'],
+            'last_synced': '2024-01-01T11:00:00', 'quality': 'best', 'audio_choice': 'with_audio',
+            'scheduled_time': '2024-01-01T12:00:00', 'status': 'downloading'
+        }
+        save_scheduled_downloads([subscription])
+        
+        self.assertIn("will retry", sync_subscription(subscription, now=datetime(2024, 1, 1, 12, 0)))
+        jobs = get_scheduled_downloads()
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(jobs[0]['status'], 'scheduled')
+        self.assertEqual(jobs[0]['seen_ids'], ['old1'])
+    
+    @patch('app.yt_dlp.YoutubeDL')
+    def test_sync_queues_new_videos_and_reschedules(self, mock_ydl):
+        """Test that a sync queues only new videos in upload order and reschedules itself."""
+        from app import save_scheduled_downloads, get_scheduled_downloads, sync_subscription
+        
+        now = datetime(2024, 1, 1, 12, 0)
+        subscription = {
+            'id': 'subscription_1', 'type': 'subscription', 'title': 'Sub', 'url': 'https://www.youtube.com/@x/videos',
+            'recurrence': {'type': 'interval', 'minutes': 60}, 'newest_first': True, 'seen_ids': ['old1'],
+            'last_synced': '2024-01-01T11:00:00', 'quality': 'best', 'audio_choice': 'with_audio',
+            'scheduled_time': '2024-01-01T12:00:00', 'status': 'downloading'
+        }
+        save_scheduled_downloads([subscription])
+        self._mock_listing(mock_ydl, ['new2', 'new1', 'old1'])
+        
+        self.assertEqual(sync_subscription(subscription, now=now), "2 new videos queued")
+        
+        jobs = {job['id']: job for job in get_scheduled_downloads()}
+        updated = jobs.pop('subscription_1')
+        self.assertEqual(updated['status'], 'scheduled')
+        self.assertEqual(updated['scheduled_time'], '2024-01-01T13:00:00')
+        self.assertEqual(updated['seen_ids'], ['new2', 'new1', 'old1'])
+        
+        child = list(jobs.values())[0]
+        self.assertEqual(child['type'], 'playlist')
+        self.assertEqual([video['url'] for video in child['videos']],
+                         ['https://www.youtube.com/watch?v=new1', 'https://www.youtube.com/watch?v=new2'])
+    
+    @patch('app.yt_dlp.YoutubeDL')
+    def test_oldest_first_sync_beyond_seen_limit(self, mock_ydl):
+        """Test that an oldest-first playlist longer than the ID cap queues nothing once it is tracked."""
+        from app import SUBSCRIPTION_SEEN_LIMIT, save_scheduled_downloads, get_scheduled_downloads, sync_subscription
+        
+        ids = [f"v{i}" for i in range(SUBSCRIPTION_SEEN_LIMIT + 500)]
+        save_scheduled_downloads([{
+            'id': 'subscription_1', 'type': 'subscription', 'title': 'Sub', 'url': 'https://www.youtube.com/playlist?list=PLx',
+            'recurrence': {'type': 'interval', 'minutes': 60}, 'newest_first': False, 'quality': 'best',
+            'audio_choice': 'with_audio', 'scheduled_time': '2024-01-01T12:00:00', 'status': 'downloading'
+        }])
+        self._mock_listing(mock_ydl, ids)
+        
+        subscription = get_scheduled_downloads()[0]
+        self.assertEqual(sync_subscription(subscription, now=datetime(2024, 1, 1, 12, 0)),
+                         f"Started tracking {len(ids)} existing videos")
+        subscription = get_scheduled_downloads()[0]
+        self.assertEqual(len(subscription['seen_ids']), SUBSCRIPTION_SEEN_LIMIT)
+        self.assertEqual(subscription['seen_count'], len(ids))
+        
+        self.assertEqual(sync_subscription(subscription, now=datetime(2024, 1, 1, 13, 0)), "No new videos")
+        self.assertEqual(len(get_scheduled_downloads()), 1)
+        
+        # Videos appended later are queued, earlier ones are not
+        self._mock_listing(mock_ydl, ids + ['new1'])
+        subscription = get_scheduled_downloads()[0]
+        self.assertEqual(sync_subscription(subscription, now=datetime(2024, 1, 1, 14, 0)), "1 new videos queued")
+
+
+class TestDownloadWindows(unittest.TestCase):
+    """Test off-peak window packing for scheduled batches."""
+    
+    def setUp(self):
+        self.original_cwd = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+    
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_window_bounds(self):
+        """Test windows that cross midnight."""
+        from app import get_download_window
+        
+        window = {'start': '23:00', 'end': '02:00'}
+        self.assertEqual(get_download_window(window, datetime(2024, 1, 2, 1, 0)),
+                         (datetime(2024, 1, 1, 23, 0), datetime(2024, 1, 2, 2, 0)))
+        self.assertEqual(get_download_window(window, datetime(2024, 1, 2, 12, 0)),
+                         (datetime(2024, 1, 2, 23, 0), datetime(2024, 1, 3, 2, 0)))
+    
+    def test_packing_and_projected_completion(self):
+        """Test first-fit packing, oversized items spanning windows and projected completion."""
+        from app import plan_download_windows
+        
+        mb = 1000 * 1000
+        window = {'start': '01:00', 'end': '03:00'}  # 7200 MB per window at 1 MB/s
+        sizes = [(0, 5000 * mb), (1, 3000 * mb), (2, 2000 * mb), (3, 9000 * mb)]
+        windows, projected = plan_download_windows(sizes, window, mb, datetime(2024, 1, 1, 1, 0))
+        
+        self.assertEqual([w['items'] for w in windows], [[0, 2], [1], [3], [3]])
+        self.assertEqual(windows[1]['start'], datetime(2024, 1, 2, 1, 0).isoformat())
+        self.assertEqual(projected, datetime(2024, 1, 4, 1, 30))
+    
+    @patch('app.download_video')
+    @patch('app.estimate_download_size')
+    def test_pauses_items_that_do_not_fit_the_window(self, mock_estimate, mock_download):
+        """Test that only items fitting the remaining window run and the job resumes next window."""
+        from app import save_scheduled_downloads, get_scheduled_downloads, execute_scheduled_download, get_download_window
+        
+        mb = 1000 * 1000
+        sizes = {'a': 100 * mb, 'b': 1000 * mb, 'c': 200 * mb}
+        mock_estimate.side_effect = lambda url, quality, audio_choice: sizes[url[-1]]
+        mock_download.return_value = (True, 'file.mp4')
+        
+        now = datetime.now()
+        window = {'start': (now - timedelta(minutes=60)).strftime('%H:%M'), 'end': (now + timedelta(minutes=10)).strftime('%H:%M')}
+        job = {
+            'id': 'batch_1', 'type': 'batch', 'title': 'Batch', 'status': 'queued',
+            'urls': [{'url': f"https://example.com/{name}"} for name in 'abc'],
+            'quality': 'best', 'audio_choice': 'with_audio', 'scheduled_time': now.isoformat(),
+            'create_subfolder': False, 'window': window, 'bandwidth_mbps': 8  # 1 MB/s, under 600 MB left
+        }
+        save_scheduled_downloads([job])
+        
+        execute_scheduled_download(job)
+        
+        self.assertEqual([call.args[0][-1] for call in mock_download.call_args_list], ['a', 'c'])
+        saved = get_scheduled_downloads()[0]
+        self.assertEqual(saved['status'], 'scheduled')
+        self.assertEqual(sorted(saved['item_results']), ['0', '2'])
+        _, current_end = get_download_window(window, now)
+        self.assertEqual(saved['scheduled_time'], get_download_window(window, current_end)[0].isoformat())
+        self.assertEqual(saved['window_plan'][0]['items'], [1])
+        self.assertIn('projected_completion', saved)
+
+
+class ThrottlingHandler(BaseHTTPRequestHandler):
+    """Local stand-in for a video host that answers the first requests with 429."""
+    throttled_requests = 0
+    
+    def log_message(self, *args):
+        pass
+    
+    def do_HEAD(self):
+        self.do_GET(send_body=False)
+    
+    def do_GET(self, send_body=True):
+        if ThrottlingHandler.throttled_requests > 0:
+            ThrottlingHandler.throttled_requests -= 1
+            self.send_response(429)
+            self.send_header('Retry-After', '1')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        data = b'\0' * 20000
+        self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(data)
+
+
+class TestThrottleBackoff(unittest.TestCase):
+    """Test shared AIMD backoff and re-queueing of throttled scheduled jobs."""
+    
+    def setUp(self):
+        self.original_cwd = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ThrottlingHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/clip.mp4"
+    
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_aimd_and_shared_pause(self):
+        """Test that a throttle halves slots and rate for everyone and successes restore them."""
+        from app import ThrottleController, classify_download_error
+        
+        throttle = ThrottleController(max_concurrency=4, base_rate=1000, min_rate=100, rate_step=250, base_delay=0.2)
+        throttle.record_throttle()
+        self.assertEqual(throttle.status()['limit'], 2)
+        self.assertEqual(throttle.rate_limit(), 500)
+        
+        # Every worker waits out the shared pause
+        start = time.time()
+        self.assertTrue(throttle.acquire())
+        self.assertGreaterEqual(time.time() - start, 0.1)
+        self.assertTrue(throttle.acquire())
+        blocked = threading.Event()
+        threading.Thread(target=lambda: (throttle.acquire(), blocked.set()), daemon=True).start()
+        self.assertFalse(blocked.wait(0.3))  # Only two slots while throttled
+        throttle.release()
+        self.assertTrue(blocked.wait(1))
+        
+        for _ in range(2):
+            throttle.record_success()
+        self.assertEqual(throttle.status()['limit'], 4)
+        self.assertIsNone(throttle.rate_limit())
+        
+        self.assertEqual(classify_download_error("HTTP Error 429: Too Many Requests"), 'throttled')
+        self.assertEqual(classify_download_error("Read timed out"), 'transient')
+        self.assertEqual(classify_download_error("Private video"), 'permanent')
+    
+    def test_throttled_job_is_requeued_and_then_completes(self):
+        """Test a scheduled download against a server injecting 429s."""
+        from app import ThrottleController, save_scheduled_downloads, get_scheduled_downloads, execute_scheduled_download
+        
+        throttle = ThrottleController(base_delay=0.05, max_delay=0.1)
+        ThrottlingHandler.throttled_requests = 1
+        job = {
+            'id': 'single_1', 'type': 'single', 'title': 'Clip', 'url': self.url, 'status': 'queued',
+            'quality': 'Best Quality', 'audio_choice': 'with_audio', 'create_subfolder': False,
+            'scheduled_time': datetime.now().isoformat()
+        }
+        save_scheduled_downloads([job])
+        
+        with patch('app.get_throttle_controller', return_value=throttle), patch('app.save_download_history'):
+            execute_scheduled_download(job)
+            requeued = get_scheduled_downloads()[0]
+            self.assertEqual(requeued['status'], 'scheduled')
+            self.assertEqual(requeued['retry_count'], 1)
+            self.assertGreater(datetime.fromisoformat(requeued['scheduled_time']), datetime.now())
+            self.assertEqual(throttle.status()['throttle_count'], 1)
+            self.assertEqual(throttle.status()['limit'], 4)
+            
+            execute_scheduled_download(requeued)
+        
+        completed = get_scheduled_downloads()[0]
+        self.assertEqual(completed['status'], 'completed')
+        self.assertTrue(os.path.exists(completed['result']))
+        self.assertEqual(throttle.status()['limit'], 5)
+
+
+class TestItemState(unittest.TestCase):
+    """Test per-item state and retrying only the failed items of a batch job."""
+    
+    def setUp(self):
+        self.original_cwd = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+    
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    @patch('app.download_video')
+    def test_retry_failed_items_runs_only_those(self, mock_download):
+        """Test that item state is stored and a retry downloads only the failed items."""
+        from app import save_scheduled_downloads, get_scheduled_downloads, execute_scheduled_download, retry_failed_items
+        
+        outcomes = {'a': (True, '/downloads/a.mp4'), 'b': (False, 'Error downloading video: Private video'), 'c': (True, '/downloads/c.mp4')}
+        mock_download.side_effect = lambda url, *args, **kwargs: outcomes[url[-1]]
+        job = {
+            'id': 'batch_1', 'type': 'batch', 'title': 'Batch', 'status': 'queued',
+            'urls': [{'url': f"https://example.com/{name}"} for name in 'abc'],
+            'quality': 'best', 'audio_choice': 'with_audio', 'create_subfolder': False,
+            'scheduled_time': datetime.now().isoformat()
+        }
+        save_scheduled_downloads([job])
+        execute_scheduled_download(job)
+        
+        finished = get_scheduled_downloads()[0]
+        self.assertEqual(finished['status'], 'completed')
+        self.assertEqual(finished['item_results']['0']['output_path'], '/downloads/a.mp4')
+        self.assertEqual(finished['item_results']['1']['status'], 'failed')
+        self.assertEqual(finished['item_results']['1']['error_class'], 'permanent')
+        
+        self.assertEqual(retry_failed_items('batch_1'), 1)
+        retried = get_scheduled_downloads()[0]
+        self.assertEqual(retried['status'], 'scheduled')
+        
+        outcomes['b'] = (True, '/downloads/b.mp4')
+        mock_download.reset_mock()
+        execute_scheduled_download(retried)
+        
+        self.assertEqual([call.args[0] for call in mock_download.call_args_list], ['https://example.com/b'])
+        final = get_scheduled_downloads()[0]
+        self.assertEqual(final['result'], "3/3 videos downloaded successfully")
+        self.assertEqual(retry_failed_items('batch_1'), 0)
+
+
+class TestStatusAPI(unittest.TestCase):
+    """Test the scheduler service's local HTTP status API."""
+    
+    def setUp(self):
+        from scheduler_service import SchedulerService
+        
+        self.jobs = [
+            {'id': 'job_1', 'type': 'single', 'title': 'First', 'status': 'scheduled',
+             'scheduled_time': (datetime.now() + timedelta(hours=1)).isoformat()},
+            {'id': 'job_2', 'type': 'batch', 'title': 'Second', 'status': 'completed',
+             'scheduled_time': datetime.now().isoformat(), 'urls': [{'url': 'a'}, {'url': 'b'}],
+             'item_results': {'0': {'success': True}, '1': {'success': False}}}
+        ]
+        self.service = SchedulerService(load_jobs=lambda: list(self.jobs), execute=lambda job, controller=None: None,
+                                        use_watcher=False, schedule_file=os.devnull, api_port=0)
+        self.service.start()
+        self.base_url = f"http://127.0.0.1:{self.service.api_port}"
+        time.sleep(0.2)
+    
+    def tearDown(self):
+        self.service.stop()
+    
+    def _get(self, path):
+        with urlopen(self.base_url + path, timeout=5) as response:
+            return json.loads(response.read())
+    
+    def test_health_queue_and_jobs(self):
+        """Test the health, queue depth and job listing endpoints."""
+        self.assertEqual(self._get('/health')['status'], 'ok')
+        self.assertEqual(self._get('/queue')['scheduled'], 1)
+        
+        jobs = {job['id']: job for job in self._get('/jobs')['jobs']}
+        self.assertEqual(set(jobs), {'job_1', 'job_2'})
+        self.assertEqual((jobs['job_2']['items_done'], jobs['job_2']['items_failed']), (2, 1))
+        self.assertEqual([job['id'] for job in self._get('/jobs?status=completed')['jobs']], ['job_2'])
+        self.assertEqual(self._get('/jobs/job_1')['job']['title'], 'First')
+    
+    def test_long_poll_returns_on_change(self):
+        """Test that a long-poll request returns as soon as a job changes instead of waiting out the timeout."""
+        version = self._get('/jobs')['version']
+        
+        def update():
+            time.sleep(0.3)
+            self.jobs[0] = dict(self.jobs[0], status='downloading', progress={'percent': 42})
+            self.service.status_board.publish(self.jobs)
+        
+        threading.Thread(target=update).start()
+        start = time.time()
+        result = self._get(f'/jobs?since={version}&wait=10')
+        
+        self.assertLess(time.time() - start, 5)
+        self.assertGreater(result['version'], version)
+        self.assertEqual(next(job for job in result['jobs'] if job['id'] == 'job_1')['progress'], {'percent': 42})
+    
+    def test_event_stream(self):
+        """Test that the event stream sends job state as server-sent events."""
+        with urlopen(self.base_url + '/events?job=job_1', timeout=5) as response:
+            self.assertEqual(response.headers['Content-Type'], 'text/event-stream')
+            lines = [response.readline().decode('utf-8').strip() for _ in range(3)]
+        
+        self.assertEqual(lines[1], 'event: job')
+        self.assertEqual(json.loads(lines[2][len('data: '):])['id'], 'job_1')
+    
+    def test_invalid_query_and_cors(self):
+        """Test that malformed long-poll parameters get a 400 and no page origin is allowed by default."""
+        from urllib.error import HTTPError
+        
+        for query in ('since=abc', 'wait=soon'):
+            with self.assertRaises(HTTPError) as raised:
+                self._get(f'/jobs?{query}')
+            self.assertEqual(raised.exception.code, 400)
+        
+        start = time.time()
+        self.assertEqual(len(self._get('/jobs?since=999999&wait=-5')['jobs']), 2)
+        self.assertLess(time.time() - start, 2)
+        
+        with urlopen(self.base_url + '/jobs', timeout=5) as response:
+            self.assertIsNone(response.headers['Access-Control-Allow-Origin'])
+        self.service.api_cors_origin = 'http://localhost:3000'
+        with urlopen(self.base_url + '/jobs', timeout=5) as response:
+            self.assertEqual(response.headers['Access-Control-Allow-Origin'], 'http://localhost:3000')
+
+
+class TestPlaylistListing(unittest.TestCase):
+    """Test flat playlist listing and on-demand entry details."""
+    
+    @patch('app.yt_dlp.YoutubeDL')
+    def test_flat_listing_stops_at_limit(self, mock_ydl):
+        """Test that a capped flat listing reads only the entries it returns."""
+        from app import get_playlist_info
+        
+        consumed = []
+        
+        def entries():
+            for i in range(1000):
+                consumed.append(i)
+                yield {'id': f"v{i}", 'title': f"Video {i}", 'duration': 61.0, 'ie_key': 'Youtube'}
+        
+        instance = mock_ydl.return_value.__enter__.return_value
+        instance.extract_info.side_effect = lambda *args, **kwargs: {'title': 'List', 'entries': entries()}
+        info = get_playlist_info('https://www.youtube.com/playlist?list=x', flat=True, max_entries=6)
+        
+        self.assertEqual(len(consumed), 6)
+        self.assertEqual(instance.extract_info.call_args.kwargs['process'], False)
+        self.assertEqual(mock_ydl.call_args.args[0]['extract_flat'], 'in_playlist')
+        self.assertFalse(info['complete'])
+        self.assertEqual(info['entries'][0], {'id': 'v0', 'title': 'Video 0', 'url': 'https://www.youtube.com/watch?v=v0', 'duration': 61})
+    
+    @patch('app.yt_dlp.YoutubeDL')
+    def test_pager_loads_pages_on_demand(self, mock_ydl):
+        """Test that the pager lists only the pages asked for and prefetches in the background."""
+        from app import PlaylistPager
+        
+        consumed = []
+        
+        def entries():
+            for i in range(25):
+                consumed.append(i)
+                yield {'id': f"v{i}", 'title': f"Video {i}", 'ie_key': 'Youtube'}
+        
+        instance = mock_ydl.return_value.__enter__.return_value
+        instance.extract_info.side_effect = lambda *args, **kwargs: {'title': 'List', 'entries': entries()}
+        pager = PlaylistPager('https://www.youtube.com/playlist?list=x')
+        self.assertTrue(pager.open())
+        
+        self.assertEqual(len(pager.load_until(10)), 10)
+        self.assertEqual(len(consumed), 10)
+        self.assertIsNone(pager.total)
+        
+        pager.prefetch(20)
+        pager._prefetch_thread.join(timeout=5)
+        self.assertEqual(len(consumed), 20)
+        self.assertEqual(pager.playlist_info['entries'][19]['id'], 'v19')
+        
+        pager.load_until(None)
+        self.assertTrue(pager.done)
+        self.assertEqual(pager.total, 25)
+        self.assertTrue(pager.playlist_info['complete'])
+    
+    @patch('app.yt_dlp.YoutubeDL')
+    def test_pager_prefetch_does_not_block_loaded_pages(self, mock_ydl):
+        """Test that a background listing of the whole playlist doesn't hold up pages already loaded."""
+        from app import PlaylistPager
+        
+        def entries():
+            for i in range(40):
+                if i >= 5:
+                    time.sleep(0.05)
+                yield {'id': f"v{i}", 'title': f"Video {i}", 'ie_key': 'Youtube'}
+        
+        instance = mock_ydl.return_value.__enter__.return_value
+        instance.extract_info.side_effect = lambda *args, **kwargs: {'title': 'List', 'entries': entries()}
+        pager = PlaylistPager('https://www.youtube.com/playlist?list=x')
+        self.assertTrue(pager.open())
+        pager.load_until(5)
+        
+        pager.prefetch(None)
+        start = time.time()
+        self.assertEqual(len(pager.load_until(5)), 5)
+        self.assertEqual(len(pager.load_until(7)), 7)
+        self.assertLess(time.time() - start, 0.5)
+        
+        # Closing stops the prefetch once its current entry is in
+        pager.close()
+        pager._prefetch_thread.join(timeout=1)
+        self.assertFalse(pager.is_loading())
+        self.assertFalse(pager.done)
+        self.assertLess(len(pager.entries), 40)
+    
+    def test_playlist_table_filters_and_edits(self):
+        """Test vectorized filters, sorting, details sync and grid edits on the playlist table."""
+        from app import PlaylistTable
+        
+        entries = [{'id': f"v{i}", 'title': f"Episode {i}" + (" (live)" if i % 3 == 0 else ""), 'url': f"u{i}",
+                    'duration': 60 * (i + 1)} for i in range(6)]
+        table = PlaylistTable()
+        table.sync(entries[:4])
+        table.sync(entries)
+        self.assertEqual(len(table), 6)
+        
+        self.assertEqual(table.view(table.mask(title_pattern=r"\(live\)$")).index.tolist(), [0, 3])
+        self.assertEqual(table.view(table.mask(min_duration=120, max_duration=240)).index.tolist(), [1, 2, 3])
+        self.assertEqual(table.view(sort_option="Longest First").index.tolist()[:2], [5, 4])
+        
+        # Upload dates arrive with the details and can then be filtered on
+        entries[4].update({'enriched': True, 'upload_date': '20240105'})
+        entries[5].update({'enriched': True, 'upload_date': '20240301'})
+        table.sync(entries)
+        self.assertEqual(table.view(table.mask(date_from=datetime(2024, 1, 1), date_to=datetime(2024, 1, 31))).index.tolist(), [4])
+        
+        table.set_selected([0, 3], True)
+        grid = table.view(table.mask(title_pattern="live")).rename(columns={'selected': 'Select', 'start_time': 'Start', 'end_time': 'End'})
+        grid.loc[0, 'Select'] = False
+        grid.loc[3, ['Start', 'End']] = ["00:10", "00:05"]
+        table.apply_edits(grid)
+        self.assertEqual(table.selected_positions(), [3])
+        self.assertEqual(table.time_range(3), {'start': "00:10", 'end': "00:05"})
+        self.assertEqual(table.invalid_time_ranges(), [3])
+    
+    def test_sort_is_frozen_while_details_arrive(self):
+        """Test that arriving details and newly listed rows don't reorder a chosen sort until it is re-sorted."""
+        from app import PlaylistTable
+        
+        entries = [{'id': f"v{i}", 'title': f"Video {i}", 'url': f"u{i}", 'duration': None} for i in range(4)]
+        entries[1]['duration'] = 300
+        table = PlaylistTable()
+        table.sync(entries)
+        self.assertEqual(table.view(sort_option="Longest First").index.tolist(), [1, 0, 2, 3])
+        
+        entries[3].update({'enriched': True, 'duration': 900})
+        entries.append({'id': 'v4', 'title': 'Video 4', 'url': 'u4', 'duration': 1200, 'enriched': True})
+        table.sync(entries)
+        self.assertEqual(table.view(sort_option="Longest First").index.tolist(), [1, 0, 2, 3, 4])
+        self.assertEqual(table.view(table.mask(title_pattern="[34]"), "Longest First").index.tolist(), [3, 4])
+        self.assertTrue(table.sort_is_stale("Longest First"))
+        
+        table.resort("Longest First")
+        self.assertFalse(table.sort_is_stale("Longest First"))
+        self.assertEqual(table.view(sort_option="Longest First").index.tolist(), [4, 3, 1, 0, 2])
+        # Choosing another sort starts from the current details
+        self.assertEqual(table.view(sort_option="Shortest First").index.tolist()[:3], [1, 3, 4])
+    
+    @patch('app.get_video_info')
+    def test_enrich_entry_once(self, mock_info):
+        """Test that entry details are fetched on first use only."""
+        from app import enrich_playlist_entry
+        
+        mock_info.return_value = {'duration': 125, 'thumbnail': 'https://i.ytimg.com/x.jpg',
+                                  'formats': [{'height': 720}, {'height': 1080}, {'height': 720}, {'acodec': 'opus'}]}
+        entry = {'id': 'v0', 'title': 'Video 0', 'url': 'https://www.youtube.com/watch?v=v0', 'duration': None}
+        enrich_playlist_entry(entry)
+        enrich_playlist_entry(entry)
+        
+        self.assertEqual(mock_info.call_count, 1)
+        self.assertEqual(entry['duration'], 125)
+        self.assertEqual(entry['available_heights'], [1080, 720])
+    
+    @patch('app.get_video_info')
+    def test_enrichment_pool_is_concurrent_cached_and_cancellable(self, mock_info):
+        """Test that entry details are fetched in parallel, cached across entries and cancelled per owner."""
+        from app import EntryEnrichmentPool
+        
+        release = threading.Event()
+        running = []
+        
+        def fetch(url, format_option=None):
+            running.append(url)
+            release.wait(timeout=5)
+            return None if url.endswith('v1') else {'duration': 90.0, 'requested_formats': [{'filesize': 100}, {'filesize_approx': 50}]}
+        
+        mock_info.side_effect = fetch
+        pool = EntryEnrichmentPool(max_workers=2)
+        entries = [{'id': f"v{i}", 'url': f"https://www.youtube.com/watch?v=v{i}"} for i in range(4)]
+        
+        self.assertEqual(pool.enrich(entries, 'page1'), 4)
+        time.sleep(0.2)
+        self.assertEqual(len(running), 2)
+        
+        # Leaving the page drops the fetches that haven't started
+        pool.cancel('page1')
+        release.set()
+        pool.wait('page1', timeout=5)
+        time.sleep(0.1)
+        self.assertEqual(len(running), 2)
+        self.assertEqual((entries[0]['duration'], entries[0]['filesize_estimate']), (90, 150))
+        self.assertEqual(entries[1]['availability'], 'unavailable')
+        self.assertNotIn('enriched', entries[2])
+        
+        # The same video in another list is served from the cache
+        copy = {'id': 'v0', 'url': 'https://www.youtube.com/watch?v=v0'}
+        self.assertEqual(pool.enrich([copy], 'page2'), 0)
+        self.assertEqual(copy['duration'], 90)
+        self.assertEqual(mock_info.call_count, 2)
+
+
+class TestConcurrentPlaylistDownload(unittest.TestCase):
+    """Test downloading playlist videos on several workers."""
+    
+    @patch('app.download_video')
+    @patch('app.get_playlist_info')
+    def test_results_keep_playlist_order(self, mock_info, mock_download):
+        """Test that parallel downloads report results and number files in playlist order."""
+        from app import download_playlist
+        
+        entries = [{'id': f"v{i}", 'title': f"Video {i}", 'url': f"https://www.youtube.com/watch?v=v{i}"} for i in range(4)]
+        mock_info.return_value = {'title': 'List', 'entries': entries, 'flat': True}
+        active = []
+        peak = []
+        lock = threading.Lock()
+        
+        def download(url, *args, filename_prefix="", **kwargs):
+            with lock:
+                active.append(url)
+                peak.append(len(active))
+            # Later videos finish first
+            time.sleep(0.05 * (4 - int(url[-1])))
+            with lock:
+                active.remove(url)
+            return True, f"downloads/{filename_prefix}{url[-2:]}.mp4"
+        
+        mock_download.side_effect = download
+        success, results = download_playlist('https://www.youtube.com/playlist?list=x', 'best', max_downloads=4, workers=2)
+        
+        self.assertTrue(success)
+        self.assertEqual(mock_info.call_args.kwargs, {'flat': True, 'max_entries': 4})
+        self.assertEqual([result['title'] for result in results], [f"Video {i}" for i in range(4)])
+        self.assertEqual(results[2]['filename'], "downloads/3 - v2.mp4")
+        self.assertEqual(max(peak), 2)
+        # Entry URLs are used as listed
+        self.assertEqual(sorted(call.args[0] for call in mock_download.call_args_list), [entry['url'] for entry in entries])
+
+
+class TestBackgroundDownloads(unittest.TestCase):
+    """Test the background executor for Playlist Manager downloads."""
+    
+    def _wait_until(self, condition, timeout=5):
+        deadline = time.time() + timeout
+        while not condition() and time.time() < deadline:
+            time.sleep(0.05)
+        return condition()
+    
+    @patch('app.download_video')
+    def test_skip_pause_and_stop(self, mock_download):
+        """Test that videos run in parallel with live progress and can be skipped, paused and stopped."""
+        from app import BackgroundDownloadManager
+        
+        def download(url, quality, audio_choice, output_path, progress_callback, controller, *args, **kwargs):
+            progress_callback({'status': 'downloading', 'downloaded_bytes': 50, 'total_bytes': 100})
+            while not controller.should_stop:
+                if url == 'u1' and not controller.is_paused:
+                    return True, f"{output_path}/{url}.mp4"
+                time.sleep(0.02)
+            return False, "Download stopped by user"
+        
+        mock_download.side_effect = download
+        manager = BackgroundDownloadManager()
+        videos = [{'url': f"u{i}", 'title': f"Video {i}", 'index': i + 1} for i in range(5)]
+        batch_id = manager.submit('Batch', videos, 'best', output_path='downloads', workers=2)
+        items = manager.get_batch(batch_id)['items']
+        
+        # Two workers: u0 keeps downloading, u1 finishes, u2 takes its slot
+        self.assertTrue(self._wait_until(lambda: items[1]['status'] == 'completed' and items[2]['status'] == 'downloading'))
+        self.assertEqual(items[1]['result'], 'downloads/u1.mp4')
+        self.assertEqual(items[0]['progress'].progress, 50)
+        
+        manager.skip(batch_id, 3)
+        self.assertEqual(items[3]['status'], 'skipped')
+        manager.skip(batch_id, 0)
+        self.assertTrue(self._wait_until(lambda: items[0]['status'] == 'skipped' and items[4]['status'] == 'downloading'))
+        
+        manager.pause(batch_id)
+        self.assertTrue(items[2]['controller'].is_paused)
+        manager.stop(batch_id)
+        self.assertTrue(self._wait_until(lambda: not manager.is_active(manager.get_batch(batch_id))))
+        self.assertEqual([item['status'] for item in items], ['skipped', 'completed', 'stopped', 'skipped', 'stopped'])
+        self.assertEqual(mock_download.call_count, 4)
+    
+    def test_file_converted_after_stop_counts_as_completed(self):
+        """Test that a video whose post-processing finishes after Stop is recorded as completed."""
+        from app import BackgroundDownloadManager, DownloadController
+        
+        with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as f:
+            path = f.name
+        try:
+            manager = BackgroundDownloadManager()
+            converted = {'controller': DownloadController(), 'status': 'processing'}
+            interrupted = {'controller': DownloadController(), 'status': 'downloading'}
+            for item in (converted, interrupted):
+                item['controller'].stop()
+            manager._finish_item(converted, True, path)
+            manager._finish_item(interrupted, False, "Download stopped by user")
+            self.assertEqual(converted['status'], 'completed')
+            self.assertEqual(interrupted['status'], 'stopped')
+        finally:
+            os.remove(path)
+
+
+class TestChannelMirror(unittest.TestCase):
+    """Test resumable channel mirrors."""
+    
+    def setUp(self):
+        self.original_cwd = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+    
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    @patch('app.list_new_playlist_entries')
+    @patch('app.download_video')
+    @patch('app.yt_dlp.YoutubeDL')
+    def test_resume_from_cursor(self, mock_ydl, mock_download, mock_list_new):
+        """Test that a restarted mirror continues listing at its cursor and skips finished videos."""
+        from app import channel_base_url, load_mirror_state, run_channel_mirror
+        
+        def entries(fail_at=None):
+            for i in range(250):
+                if i == fail_at:
+                    raise Exception("Connection reset by peer")
+                yield {'id': f"v{i}", 'title': f"Video {i}", 'url': f"https://www.youtube.com/watch?v=v{i}"}
+        
+        listings = [entries(fail_at=150), entries()]
+        mock_ydl.return_value.__enter__.return_value.extract_info.side_effect = lambda *args, **kwargs: {'entries': listings.pop(0)}
+        mock_download.side_effect = lambda url, *args, **kwargs: (True, f"downloads/{url[-4:]}.mp4")
+        mock_list_new.return_value = ([], 'Uploads')
+        job = {'mirror_id': 'mirror_1', 'url': channel_base_url('https://www.youtube.com/@chan/videos'),
+               'tabs': ['videos'], 'quality': 'best', 'audio_choice': 'with_audio', 'workers': 2}
+        self.assertEqual(job['url'], 'https://www.youtube.com/@chan')
+        
+        # Listing breaks off after 150 entries; the cursor was saved at 100
+        with self.assertRaises(Exception):
+            run_channel_mirror(job, 'downloads')
+        state = load_mirror_state('mirror_1')
+        self.assertEqual(state['cursor']['videos'], {'offset': 100, 'complete': False})
+        self.assertEqual(mock_download.call_count, 0)
+        
+        success, summary = run_channel_mirror(job, 'downloads')
+        self.assertTrue(success)
+        self.assertEqual(summary, "250/250 videos mirrored")
+        # Entries before the cursor are passed over, so none is listed twice
+        state = load_mirror_state('mirror_1')
+        self.assertEqual([video['id'] for video in state['videos']], [f"v{i}" for i in range(250)])
+        self.assertTrue(state['cursor']['videos']['complete'])
+        
+        # A later run only looks for new uploads and downloads nothing again
+        mock_list_new.return_value = ([{'id': 'v250', 'title': 'New', 'url': 'https://www.youtube.com/watch?v=v250'}], 'Uploads')
+        success, summary = run_channel_mirror(job, 'downloads')
+        self.assertEqual(summary, "251/251 videos mirrored")
+        self.assertEqual(mock_download.call_count, 251)
+        self.assertEqual(mock_list_new.call_args.args[0], 'https://www.youtube.com/@chan/videos')
+
+
+class TestDownloadCoalescing(unittest.TestCase):
+    """Test that identical requests from different jobs share one download."""
+    
+    def setUp(self):
+        self.original_cwd = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+    
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_canonical_video_url(self):
+        """Test that every URL form of a video maps to one watch URL."""
+        from app import canonical_video_url
+        
+        for url in ("https://youtu.be/dQw4w9WgXcQ?t=42",
+                    "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+                    "https://m.youtube.com/watch?v=dQw4w9WgXcQ&list=PL123&index=3",
+                    "https://www.youtube.com/watch?t=10&v=dQw4w9WgXcQ"):
+            self.assertEqual(canonical_video_url(url), "https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        self.assertEqual(canonical_video_url(" https://vimeo.com/123 "), "https://vimeo.com/123")
+    
+    @patch('app._start_video_download')
+    def test_identical_requests_share_one_download(self, mock_start):
+        """Test that a request joining an in-flight download gets the file linked into its own folder."""
+        from app import download_video
+        
+        started = threading.Event()
+        release = threading.Event()
+        progress = []
+        
+        def start(url, quality, audio_choice, output_path, progress_callback, *args):
+            started.set()
+            release.wait(5)
+            progress_callback({'status': 'finished'})
+            os.makedirs(output_path, exist_ok=True)
+            path = os.path.join(output_path, "01 - Video.mp4")
+            with open(path, 'w') as f:
+                f.write("video")
+            return True, path
+        
+        mock_start.side_effect = start
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(download_video, "https://youtu.be/dQw4w9WgXcQ", 'best', 'with_audio', 'playlist_a',
+                                    filename_prefix="01 - ")
+            self.assertTrue(started.wait(5))
+            second = executor.submit(download_video, "https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL1&t=5", 'best',
+                                     'with_audio', 'batch_b', progress.append)
+            time.sleep(0.3)
+            release.set()
+            self.assertEqual(first.result(), (True, os.path.join('playlist_a', "01 - Video.mp4")))
+            self.assertEqual(second.result(), (True, os.path.join('batch_b', "Video.mp4")))
+        
+        self.assertEqual(mock_start.call_count, 1)
+        self.assertEqual(mock_start.call_args.args[0], "https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        self.assertTrue(os.path.samefile(os.path.join('playlist_a', "01 - Video.mp4"), os.path.join('batch_b', "Video.mp4")))
+        # The follower saw the leader's progress
+        self.assertEqual(progress, [{'status': 'finished'}])
+        
+        # A different time range is a different request
+        release.set()
+        download_video("https://youtu.be/dQw4w9WgXcQ", 'best', 'with_audio', 'clips', start_time="00:10", end_time="00:20")
+        self.assertEqual(mock_start.call_count, 2)
+
+
+class TestPreflightPlan(unittest.TestCase):
+    """Test size and disk space estimates made before a batch starts."""
+    
+    @patch('app.free_disk_bytes')
+    @patch('app.get_video_info')
+    def test_plan_totals_and_disk_check(self, mock_info, mock_free):
+        """Test that sizes come from cached metadata or the items and that a full disk blocks the batch."""
+        from app import DEFAULT_ITEM_ESTIMATE_BYTES, plan_preflight
+        
+        def info(url, format_option=None):
+            if url.endswith('pfUnavail01'):
+                return None
+            return {'id': url[-11:], 'duration': 600, 'requested_formats': [{'filesize': 300}, {'filesize_approx': 100}]}
+        
+        mock_info.side_effect = info
+        mock_free.return_value = 10 ** 12
+        items = [{'url': 'https://youtu.be/pfVideo0001'},
+                 {'url': 'https://www.youtube.com/watch?v=pfVideo0002', 'filesize_estimate': 50, 'duration': 60},
+                 {'url': 'https://www.youtube.com/watch?v=pfUnavail01'}]
+        
+        plan = plan_preflight(items, 'Best Quality', 'with_audio', 'downloads')
+        self.assertEqual([item['bytes'] for item in plan['items']], [400, 50, DEFAULT_ITEM_ESTIMATE_BYTES])
+        self.assertEqual(plan['total_duration'], 660)
+        self.assertEqual(plan['unknown_count'], 1)
+        self.assertEqual(plan['status'], 'warn')
+        # The item that already had a size was not fetched
+        self.assertEqual(sorted(call.args[0][-11:] for call in mock_info.call_args_list), ['pfUnavail01', 'pfVideo0001'])
+        
+        # Cached metadata is reused and the disk check blocks
+        mock_free.return_value = 100
+        plan = plan_preflight(items[:2], 'Best Quality', 'with_audio', 'downloads')
+        self.assertEqual(plan['total_bytes'], 450)
+        self.assertEqual(plan['status'], 'block')
+        self.assertEqual(mock_info.call_count, 2)
+    
+    def test_estimates_seed_batch_eta(self):
+        """Test that the whole-batch ETA uses pre-flight sizes before later videos start."""
+        from app import BatchProgress
+        
+        progress = BatchProgress()
+        progress.update_video_count(3)
+        progress.set_estimates([100 * 1024 * 1024, 200 * 1024 * 1024, 300 * 1024 * 1024])
+        progress.start_time = time.time() - 10
+        progress.next_video()
+        progress.progress_hook({'status': 'downloading', 'downloaded_bytes': 50 * 1024 * 1024,
+                                'total_bytes': 100 * 1024 * 1024, 'speed': 5 * 1024 * 1024})
+        # 550 MB left at the 5 MB/s seen so far
+        self.assertAlmostEqual(progress.overall_eta(), 110, delta=1)
+    
+    @patch('app.download_video')
+    @patch('app.plan_preflight')
+    @patch('app.get_playlist_info')
+    def test_playlist_download_checks_disk_first(self, mock_listing, mock_plan, mock_download):
+        """Test that a playlist download sizes the flat listing and downloads nothing when it won't fit."""
+        from app import download_playlist, preflight_warning
+        
+        mock_listing.return_value = {'title': 'List', 'entries': [
+            {'id': f"pfList{i:05d}", 'title': f"Video {i}", 'duration': 60, 'ie_key': 'Youtube'} for i in range(300)]}
+        mock_plan.return_value = {'items': [], 'total_bytes': 300 * 10 ** 9, 'unknown_count': 0, 'total_duration': 18000,
+                                  'free_bytes': 10 ** 9, 'required_bytes': 330 * 10 ** 9, 'status': 'block'}
+        
+        success, message = download_playlist('https://www.youtube.com/playlist?list=x', 'Best Quality', preflight=True)
+        self.assertFalse(success)
+        self.assertIn("Not enough disk space", message)
+        self.assertEqual(len(mock_plan.call_args.args[0]), 300)
+        self.assertEqual(mock_plan.call_args.args[0][0]['duration'], 60)
+        mock_download.assert_not_called()
+        
+        # Plans that fit without headroom or with guessed sizes explain why they warn
+        plan = dict(mock_plan.return_value, total_bytes=10 ** 9 - 1, unknown_count=2, status='warn')
+        self.assertIn("2 sizes could not be fetched", preflight_warning(plan))
+        self.assertIn("little space is left", preflight_warning(plan))
+        self.assertIsNone(preflight_warning(dict(plan, status='ok')))
+
+
+class TestPostProcessingPipeline(unittest.TestCase):
+    """Test that post-processing runs on its own pool after the network stage."""
+    
+    def setUp(self):
+        self.original_cwd = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+    
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    @patch('app.trim_video_segment')
+    @patch('app._run_video_download')
+    def test_network_slot_is_free_while_trimming(self, mock_fetch, mock_trim):
+        """Test that a deferred download returns once fetched and trims without holding a download slot."""
+        from app import download_video, get_throttle_controller
+        
+        trimming = threading.Event()
+        release = threading.Event()
+        slots_while_trimming = []
+        
+        def trim(path, start, end):
+            trimming.set()
+            slots_while_trimming.append(get_throttle_controller().status()['active'])
+            release.wait(5)
+            return None
+        
+        mock_fetch.return_value = (True, 'out/clip.mp4', {'info': {'id': 'clip'}, 'archive_key': None})
+        mock_trim.side_effect = trim
+        success, future = download_video('https://example.com/clip.mp4', 'best', 'with_audio', 'out',
+                                         start_time="00:10", end_time="00:20", defer_postprocessing=True)
+        self.assertTrue(success)
+        self.assertIsInstance(future, concurrent.futures.Future)
+        self.assertTrue(trimming.wait(5))
+        self.assertEqual(slots_while_trimming, [0])
+        self.assertFalse(future.done())
+        release.set()
+        self.assertEqual(future.result(timeout=5), (True, 'out/clip.mp4'))
+        
+        # Without post-processing work the download finishes inline
+        mock_fetch.return_value = (True, 'out/full.mp4', {'info': {'id': 'full'}, 'archive_key': None})
+        self.assertEqual(download_video('https://example.com/full.mp4', 'best', defer_postprocessing=True), (True, 'out/full.mp4'))
+    
+    def test_pool_applies_backpressure(self):
+        """Test that handing over blocks once the pool's queue is full and gives up when stopped."""
+        from app import DownloadController, PostProcessingPool
+        
+        pool = PostProcessingPool(max_workers=1, max_pending=1)
+        release = threading.Event()
+        first = pool.submit(lambda: release.wait(5))
+        controller = DownloadController()
+        threading.Timer(0.3, controller.stop).start()
+        started = time.time()
+        self.assertIsNone(pool.submit(lambda: None, controller))
+        self.assertGreaterEqual(time.time() - started, 0.25)
+        
+        release.set()
+        self.assertTrue(first.result(timeout=5))
+        self.assertIsNone(pool.submit(lambda: None).result(timeout=5))
+
+
+class TestAudioFormats(unittest.TestCase):
+    """Test the audio-only remux and transcode modes."""
+    
+    def setUp(self):
+        self.original_cwd = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+        with open('song.webm', 'wb') as f:
+            f.write(b'webm')
+    
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    @patch('app.subprocess.run')
+    def test_original_remuxes_and_transcodes_use_encoder(self, mock_run):
+        """Test that the original mode copies the stream and other codecs re-encode at the chosen bitrate."""
+        from app import extract_audio
+        
+        def run(cmd, **kwargs):
+            open(cmd[-1], 'wb').close()
+            return MagicMock(returncode=0, stderr='')
+        mock_run.side_effect = run
+        
+        self.assertEqual(extract_audio('song.webm', 'original', '192', 'opus'), 'song.opus')
+        self.assertEqual(mock_run.call_args[0][0][-3:], ['-c:a', 'copy', 'song.opus'])
+        
+        # A source already in the requested codec is not re-encoded unless a lower bitrate was asked for
+        self.assertEqual(extract_audio('song.webm', 'opus', '128', 'opus', 128), 'song.opus')
+        self.assertIn('copy', mock_run.call_args[0][0])
+        self.assertEqual(extract_audio('song.webm', 'opus', '96', 'opus', 160), 'song.opus')
+        cmd = mock_run.call_args[0][0]
+        self.assertEqual(cmd[cmd.index('-c:a') + 1:cmd.index('-b:a') + 2], ['libopus', '-b:a', '96k'])
+        extract_audio('song.webm', 'opus', '96', 'opus')
+        self.assertNotIn('copy', mock_run.call_args[0][0])
+        
+        self.assertEqual(extract_audio('song.webm', 'm4a', '128', 'opus'), 'song.m4a')
+        cmd = mock_run.call_args[0][0]
+        self.assertEqual(cmd[cmd.index('-c:a') + 1], 'aac')
+        self.assertEqual(cmd[cmd.index('-b:a') + 1], '128k')
+        self.assertEqual(cmd[cmd.index('-threads') + 1], '1')
+        
+        # An m4a download in original mode needs no ffmpeg run at all
+        calls = mock_run.call_count
+        with open('talk.m4a', 'wb') as f:
+            f.write(b'm4a')
+        self.assertEqual(extract_audio('talk.m4a', 'original', '192', 'mp4a.40.2'), 'talk.m4a')
+        self.assertEqual(mock_run.call_count, calls)
+    
+    def test_archive_key_depends_on_audio_format(self):
+        """Test that audio formats are archived apart while mp3 keys stay unchanged."""
+        from app import build_archive_key
+        
+        mp3 = build_archive_key('abc', 'Audio Only', 'with_audio')
+        self.assertEqual(build_archive_key('abc', 'Audio Only', 'with_audio', audio_format={'codec': 'mp3', 'bitrate': '192'}), mp3)
+        self.assertNotEqual(build_archive_key('abc', 'Audio Only', 'with_audio', audio_format={'codec': 'original', 'bitrate': '192'}), mp3)
+        self.assertEqual(build_archive_key('abc', '720p', 'with_audio', audio_format={'codec': 'opus', 'bitrate': '128'}),
+                         build_archive_key('abc', '720p', 'with_audio'))
+    
+    def test_audio_only_selects_audio_stream(self):
+        """Test that the audio_only option selects a format without a video track in every quality."""
+        import yt_dlp
+        from app import get_format_option
+        
+        formats = [
+            {'format_id': '140', 'ext': 'm4a', 'acodec': 'mp4a.40.2', 'vcodec': 'none', 'abr': 128, 'url': 'https://example.com/140'},
+            {'format_id': '251', 'ext': 'webm', 'acodec': 'opus', 'vcodec': 'none', 'abr': 160, 'url': 'https://example.com/251'},
+            {'format_id': '137', 'ext': 'mp4', 'acodec': 'none', 'vcodec': 'avc1', 'height': 1080, 'url': 'https://example.com/137'},
+            {'format_id': '18', 'ext': 'mp4', 'acodec': 'mp4a.40.2', 'vcodec': 'avc1', 'height': 360, 'url': 'https://example.com/18'},
+        ]
+        for quality in ["Best Quality", "1080p", "360p", "Audio Only"]:
+            info = {'id': 'abc', 'title': 'Song', 'formats': [dict(f) for f in formats], 'extractor': 'youtube',
+                    'extractor_key': 'Youtube', 'webpage_url': 'https://www.youtube.com/watch?v=abc'}
+            with yt_dlp.YoutubeDL({'format': get_format_option(quality, 'audio_only'), 'quiet': True, 'simulate': True}) as ydl:
+                selected = ydl.process_ie_result(info, download=False)
+            self.assertNotIn('requested_formats', selected)
+            self.assertEqual(selected['vcodec'], 'none')
+            self.assertEqual(selected['format_id'], '251')
+    
+    @patch('app.extract_audio')
+    @patch('app._run_video_download')
+    def test_audio_only_download_extracts_audio(self, mock_fetch, mock_extract):
+        """Test that an audio_only download fetches the audio stream and converts it to the chosen format."""
+        from app import download_video
+        
+        mock_fetch.return_value = (True, 'song.webm', {'info': {'id': 'abc', 'acodec': 'opus'}, 'archive_key': None})
+        mock_extract.return_value = 'song.opus'
+        result = download_video('https://example.com/song', 'Best Quality', 'audio_only', 'out',
+                                audio_format={'codec': 'original', 'bitrate': '192'})
+        self.assertEqual(result, (True, 'song.opus'))
+        self.assertEqual(mock_fetch.call_args[0][0]['format'], 'bestaudio/best')
+        mock_extract.assert_called_once_with('song.webm', 'original', '192', 'opus', None)
+
+
 class TestUtilityFunctions(unittest.TestCase):
     """Test utility functions."""
     